@@ -0,0 +1,252 @@
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from tracing import span
+from deadline import Deadline
+from http_client import make_session, mount_cache, cache_summaries
+import resilience
+import pacing
+
+# A board is a selector spec; the engine does the fetching, paging and parsing.
+#
+# url: first result page ({keywords} and {location} are filled in)
+# items: CSS selector of one listing, or a list tried in order until one matches
+# fields: record field -> CSS selector inside the item; "sel@attr" reads an
+#   attribute, "@attr" one of the item itself, plain "sel" the text. Links are
+#   resolved against the page URL.
+# required: fields an item must have to count (default: title)
+# constants: fields every record gets as is (source defaults to the board name)
+# defaults: values for fields the item doesn't have
+# strip: field -> substrings removed from its text (badges like "NEW")
+# min_length: field -> shortest text worth keeping
+# title_keywords: keep only titles containing one of these (case-insensitive)
+# pagination: {'param', 'start', 'step', 'max_pages'} pages by query parameter,
+#   fetched concurrently; {'next': selector, 'max_pages'} follows a next link
+#   one page at a time; none/None: first page only. Paging stops at the first
+#   page that adds no new listing (a site ignoring the parameter serves page 1 again).
+# cache: false fetches the board past the on-disk HTTP cache
+#
+# The config's "boards" entry adds boards or overrides these by name
+# (partially: keys are merged); false switches one off.
+BOARDS = {
+    'knighthunter': {
+        'url': "https://www.knighthunter.com/search.aspx?keywords={keywords}&location={location}",
+        'keywords': "developer",
+        'location': "London",
+        # Note: Selectors are hypothetical based on typical structure, needs adjustment if site changes
+        # If standard classes aren't found, try Knighthunter's table structure
+        'items': ['div.job-listing', 'table.jobList tr'],
+        'fields': {'title': 'a', 'url': 'a@href'},
+        'min_length': {'title': 4},
+        # Knighthunter often puts company in a separate col
+        'constants': {'company': "Knighthunter Listing", 'source': "Knighthunter"},
+        'user_agent': "Mozilla/5.0 (compatible; JobBot/1.0)",
+    },
+    'londontechjobs': {
+        'url': "https://londontechjobs.ca/joblist.aspx",
+        'items': 'div.gm-card',
+        'fields': {
+            'title': 'h4.gm-card-title',
+            'company': 'h3.gm-card-subtitle',
+            'url': 'a.gm-card-link@href',
+            'posted': 'div.gm-card-timestamp',
+        },
+        'required': ['title', 'company'],
+        'strip': {'title': ["NEW"]},
+        'defaults': {'posted': "Recent", 'url': ""},
+        'title_keywords': ["developer", "engineer", "programmer", "analyst", "ai", "software", "data", "web", "android"],
+        'constants': {'source': "LondonTechJobs.ca"},
+    },
+}
+BOARD_WORKERS = 4 # Pages in flight per board
+
+def boards_from_config(config):
+    """Built-in boards merged with the config's "boards" entry, minus the switched-off ones."""
+    boards = {name: dict(spec) for name, spec in BOARDS.items()}
+    for name, spec in (config.get('boards') or {}).items():
+        if spec is False:
+            boards.pop(name, None)
+        else:
+            boards[name] = {**boards.get(name, {}), **spec}
+    return boards
+
+class CompiledBoard:
+    """A board spec with its CSS selectors compiled to XPath once, not per page."""
+
+    def __init__(self, name, spec):
+        from lxml.cssselect import CSSSelector
+        self.name = name
+        self.spec = spec
+        items = spec['items']
+        self.items = [CSSSelector(s) for s in ([items] if isinstance(items, str) else items)]
+        self.fields = {}
+        for field, selector in spec.get('fields', {}).items():
+            css, _, attr = selector.partition('@')
+            self.fields[field] = (CSSSelector(css.strip()) if css.strip() else None, attr or None)
+        pagination = spec.get('pagination') or {}
+        self.next_link = CSSSelector(pagination['next']) if pagination.get('next') else None
+
+    def page_urls(self, keywords=None, location=None):
+        """URLs of every page for parameter pagination (just the first otherwise)."""
+        spec = self.spec
+        first = spec['url'].format(
+            keywords=urllib.parse.quote_plus(keywords or spec.get('keywords', '')),
+            location=urllib.parse.quote_plus(location or spec.get('location', ''))
+        )
+        pagination = spec.get('pagination') or {}
+        if not pagination.get('param'):
+            return [first]
+        urls = [first]
+        parts = urllib.parse.urlsplit(first)
+        query = urllib.parse.parse_qsl(parts.query)
+        for n in range(1, pagination.get('max_pages', 1)):
+            value = pagination.get('start', 1) + n * pagination.get('step', 1)
+            page_query = urllib.parse.urlencode(query + [(pagination['param'], value)])
+            urls.append(urllib.parse.urlunsplit(parts._replace(query=page_query)))
+        return urls
+
+    def field_value(self, item, field, page_url):
+        selector, attr = self.fields[field]
+        matches = selector(item) if selector is not None else [item]
+        if not matches:
+            return None
+        el = matches[0]
+        if attr:
+            value = el.get(attr)
+            if value and attr in ('href', 'src'):
+                value = urllib.parse.urljoin(page_url, value)
+        else:
+            value = el.text_content()
+        if value is None:
+            return None
+        for badge in self.spec.get('strip', {}).get(field, []):
+            value = value.replace(badge, "")
+        value = " ".join(value.split())
+        return value or None
+
+    def parse(self, html, page_url):
+        """(records, next page URL or None) of one page."""
+        import lxml.html
+        root = lxml.html.fromstring(html)
+        items = []
+        for selector in self.items:
+            items = selector(root)
+            if items:
+                break
+
+        spec = self.spec
+        required = spec.get('required', ['title'])
+        min_length = spec.get('min_length', {})
+        keywords = [kw.lower() for kw in spec.get('title_keywords', [])]
+        records = []
+        for item in items:
+            # Only the fields we need leave the tree, as plain strings
+            record = {field: self.field_value(item, field, page_url) for field in self.fields}
+            if any(not record.get(field) for field in required):
+                continue
+            if any(len(record.get(field) or '') < n for field, n in min_length.items()):
+                continue
+            if keywords and not any(kw in (record.get('title') or '').lower() for kw in keywords):
+                continue
+            for field, value in spec.get('defaults', {}).items():
+                if not record.get(field):
+                    record[field] = value
+            records.append({**record, 'source': self.name, **spec.get('constants', {})})
+
+        next_url = None
+        if self.next_link is not None:
+            links = self.next_link(root)
+            if links and links[0].get('href'):
+                next_url = urllib.parse.urljoin(page_url, links[0].get('href'))
+        return records, next_url
+
+def fetch_page(session, board, url, deadline):
+    def fetch():
+        pacer = pacing.pacer(board.name)
+        pacer.acquire()
+        response = session.get(url, headers=headers, timeout=deadline.timeout_s(15))
+        pacer.observe(response.status_code)
+        response.raise_for_status()
+        return response.content
+
+    headers = {'User-Agent': board.spec['user_agent']} if board.spec.get('user_agent') else None
+    with span('board_page', cat='http', board=board.name, url=url):
+        html = resilience.call(board.name, fetch, deadline=deadline)
+    with span('parse_board', cat='parse', board=board.name):
+        return board.parse(html, url)
+
+def mount_caches(session, boards, workers=BOARD_WORKERS):
+    """
+    Routes each board's host through the HTTP cache under its own name, so
+    unchanged pages come back as a 304 (http_cache.MAX_AGE[name] sets how long
+    they're trusted as is). Done before any fetching: mounting isn't thread-safe.
+    """
+    for name, spec in boards.items():
+        if spec.get('cache', True):
+            mount_cache(session, spec['url'], name, workers)
+
+def scrape_board(session, name, spec, deadline=None, keywords=None, location=None, workers=BOARD_WORKERS):
+    """Every listing of one board, deduped by URL in page order."""
+    deadline = deadline or Deadline()
+    board = CompiledBoard(name, spec)
+    max_pages = (spec.get('pagination') or {}).get('max_pages', 1)
+    jobs = []
+    seen = set()
+
+    def add(records):
+        """Keeps the page's unseen listings; False if it had none."""
+        added = False
+        for record in records:
+            key = record.get('url') or (record.get('title'), record.get('company'))
+            if key not in seen:
+                seen.add(key)
+                jobs.append(record)
+                added = True
+        return added
+
+    if board.next_link is not None:
+        url = board.page_urls(keywords, location)[0]
+        fetched = 0
+        while url and fetched < max_pages and not deadline.expired():
+            records, url = fetch_page(session, board, url, deadline)
+            fetched += 1
+            if not add(records):
+                break
+    else:
+        urls = board.page_urls(keywords, location)
+        more = add(fetch_page(session, board, urls[0], deadline)[0])
+        # The rest concurrently, a wave at a time, until a page adds nothing new
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for i in range(1, len(urls), workers):
+                if not more or deadline.expired():
+                    break
+                wave = urls[i:i + workers]
+                for records, _ in pool.map(lambda u: fetch_page(session, board, u, deadline), wave):
+                    more = add(records)
+                    if not more:
+                        break
+    return jobs
+
+def scrape_boards(boards, deadline=None, workers=BOARD_WORKERS):
+    """{name: jobs} for every board spec, boards scraped side by side over one pooled session."""
+    deadline = deadline or Deadline()
+    results = {}
+
+    def scrape(item):
+        name, spec = item
+        try:
+            with span(name, cat='http'):
+                jobs = scrape_board(session, name, spec, deadline, workers=workers)
+            print(f"   > Found {len(jobs)} on {name}")
+            return name, jobs
+        except Exception as e:
+            print(f"   > {name} failed: {e}")
+            return name, []
+
+    with make_session(workers * max(1, len(boards))) as session:
+        mount_caches(session, boards, workers)
+        with ThreadPoolExecutor(max_workers=max(1, len(boards))) as pool:
+            for name, jobs in pool.map(scrape, boards.items()):
+                results[name] = jobs
+        for line in cache_summaries(session):
+            print(line)
+    return results
@@ -0,0 +1,174 @@
+import os
+import time
+import shutil
+import asyncio
+import tempfile
+import threading
+import subprocess
+import contextlib
+import concurrent.futures
+
+# Set by the orchestrator while a shared browser is running. Stages started
+# in-process or as subprocesses read it to connect instead of launching.
+BROWSER_WS_ENV = 'JOBHUNTR_BROWSER_WS'
+STARTUP_TIMEOUT = 30
+
+SERVER_ARGS = [
+    "--remote-debugging-port=0",
+    "--remote-debugging-address=127.0.0.1",
+    "--no-first-run",
+    "--no-default-browser-check",
+    "--disable-blink-features=AutomationControlled",
+    "--no-sandbox",
+    "--disable-infobars",
+]
+
+def chromium_executable():
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        return p.chromium.executable_path
+
+def wait_for_endpoint(user_data_dir, proc, timeout=STARTUP_TIMEOUT):
+    # Chromium writes the chosen port and browser path here once DevTools is listening
+    port_file = os.path.join(user_data_dir, 'DevToolsActivePort')
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Chromium exited during startup (code {proc.returncode})")
+        if os.path.exists(port_file):
+            with open(port_file, 'r') as f:
+                lines = f.read().split()
+            if len(lines) >= 2:
+                return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+        time.sleep(0.1)
+    raise TimeoutError(f"Chromium did not expose a DevTools endpoint within {timeout}s")
+
+@contextlib.contextmanager
+def browser_server(headless=True):
+    """
+    Starts one Chromium with remote debugging enabled and publishes its
+    endpoint in BROWSER_WS_ENV for the duration of the block. Stages connect
+    to it with launch_browser() and only pay for their own context.
+    """
+    user_data_dir = tempfile.mkdtemp(prefix='jobhuntr-chromium-')
+    cmd = [chromium_executable(), f"--user-data-dir={user_data_dir}", *SERVER_ARGS]
+    if headless:
+        cmd.append("--headless=new")
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    previous = os.environ.get(BROWSER_WS_ENV)
+    try:
+        endpoint = wait_for_endpoint(user_data_dir, proc)
+        os.environ[BROWSER_WS_ENV] = endpoint
+        print(f"🌐 Shared browser listening on {endpoint}")
+        yield endpoint
+    finally:
+        if previous is None:
+            os.environ.pop(BROWSER_WS_ENV, None)
+        else:
+            os.environ[BROWSER_WS_ENV] = previous
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        shutil.rmtree(user_data_dir, ignore_errors=True)
+
+def shared_endpoint():
+    return os.environ.get(BROWSER_WS_ENV)
+
+def launch_browser(p, **launch_kwargs):
+    """
+    Connects to the shared browser if one is running, otherwise launches a
+    private Chromium with launch_kwargs. browser.close() only disconnects
+    from a shared browser, so callers don't need to care which one they got.
+    """
+    endpoint = shared_endpoint()
+    if endpoint:
+        try:
+            return p.chromium.connect_over_cdp(endpoint)
+        except Exception as e:
+            print(f"⚠️  Could not connect to shared browser ({e}). Launching a private one.")
+    return p.chromium.launch(**launch_kwargs)
+
+async def launch_browser_async(p, **launch_kwargs):
+    """Async API counterpart of launch_browser()."""
+    endpoint = shared_endpoint()
+    if endpoint:
+        try:
+            return await p.chromium.connect_over_cdp(endpoint)
+        except Exception as e:
+            print(f"⚠️  Could not connect to shared browser ({e}). Launching a private one.")
+    return await p.chromium.launch(**launch_kwargs)
+
+@contextlib.asynccontextmanager
+async def async_browser(browser=None, **launch_kwargs):
+    """
+    Yields browser when a caller already has one (it stays open), otherwise
+    starts async Playwright and a browser of our own for the block.
+    """
+    if browser is not None:
+        yield browser
+        return
+    from playwright.async_api import async_playwright
+    async with async_playwright() as p:
+        own = await launch_browser_async(p, **launch_kwargs)
+        try:
+            yield own
+        finally:
+            await own.close()
+
+class BrowserLoop:
+    """
+    One asyncio event loop on a background thread with one async Playwright
+    browser. The orchestrator runs the async stages of a hunt on it from its
+    worker threads (run()), so their network waits overlap on a single loop
+    and browser instead of each stage spinning up its own.
+    """
+
+    def __init__(self, **launch_kwargs):
+        self.launch_kwargs = launch_kwargs
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='browser-loop', daemon=True)
+        self.browser = None
+        self._playwright = None
+
+    def __enter__(self):
+        self.thread.start()
+        try:
+            self.run(self._start())
+        except BaseException:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.run(self._stop(), timeout=30)
+        except Exception as e:
+            print(f"⚠️  Browser loop shutdown: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=10)
+
+    async def _start(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self.browser = await launch_browser_async(self._playwright, **self.launch_kwargs)
+
+    async def _stop(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    def run(self, coro, timeout=None):
+        """
+        Runs coro on the loop and blocks the calling thread until it finishes.
+        After timeout seconds the coroutine is cancelled and TimeoutError raised.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
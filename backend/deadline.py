@@ -0,0 +1,50 @@
+import os
+import time
+
+# Absolute (epoch seconds) soft deadline of the current stage. The
+# orchestrator sets it for subprocess stages; in-process stages get the same
+# value as ctx.deadline.
+DEADLINE_ENV = 'JOBHUNTR_STAGE_DEADLINE'
+
+class Deadline:
+    """
+    Soft time budget for a stage. Scrapers check expired() between units of
+    work and stop early, keeping what they already collected, and use
+    timeout_ms()/timeout_s() so a single navigation can't overrun the budget.
+    A Deadline without a time never expires.
+    """
+
+    def __init__(self, at=None):
+        self.at = at
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(time.time() + seconds if seconds is not None else None)
+
+    @classmethod
+    def from_env(cls):
+        value = os.environ.get(DEADLINE_ENV)
+        try:
+            return cls(float(value)) if value else cls()
+        except ValueError:
+            return cls()
+
+    def remaining(self):
+        if self.at is None:
+            return float('inf')
+        return max(0.0, self.at - time.time())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout_s(self, default, minimum=1.0):
+        """default, capped to what's left of the budget (but at least minimum)."""
+        return max(minimum, min(default, self.remaining()))
+
+    def timeout_ms(self, default_ms, minimum_ms=1000):
+        return int(self.timeout_s(default_ms / 1000, minimum_ms / 1000) * 1000)
+
+    def __repr__(self):
+        if self.at is None:
+            return "Deadline(None)"
+        return f"Deadline({self.remaining():.1f}s left)"
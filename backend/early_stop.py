@@ -0,0 +1,73 @@
+import logging
+from collections import deque
+from rank_jobs import keywords_from_config, score_job
+
+# Config "early_stop" entry, merged over these defaults:
+# score_threshold: a card scoring at least this counts as a hit
+# window: how many of the latest cards the hit rate is measured over
+# min_yield: stop once the hit rate of the last window cards drops below this
+# enough: stop once this many hits are collected (None: only max_jobs limits)
+# Set "early_stop": false to always scrape up to max_jobs.
+DEFAULT_EARLY_STOP = {'score_threshold': 2, 'window': 20, 'min_yield': 0.1, 'enough': None}
+
+class YieldMonitor:
+    """
+    Scores listing cards with rank_jobs.score_job as a scraper captures them
+    (title and salary only, descriptions come later) and tells it when the
+    next pages aren't worth loading: the recent cards are nearly all jobs the
+    ranking would bury (Senior, Staff, ...), or it already has enough good ones.
+    """
+
+    def __init__(self, positive_keywords, negative_keywords, score_threshold=2, window=20, min_yield=0.1, enough=None):
+        self.positive_keywords = positive_keywords
+        self.negative_keywords = negative_keywords
+        self.score_threshold = score_threshold
+        self.window = window
+        self.min_yield = min_yield
+        self.enough = enough
+        self.recent = deque(maxlen=window)
+        self.seen = 0
+        self.hits = 0
+
+    def reset(self):
+        """Forgets every card scored so far (same settings), e.g. when a scraper falls back to another listing."""
+        self.recent.clear()
+        self.seen = 0
+        self.hits = 0
+
+    def add(self, job):
+        """Scores one captured job. Returns True if it's a hit."""
+        score, _ = score_job(job, self.positive_keywords, self.negative_keywords)
+        hit = score >= self.score_threshold
+        self.recent.append(hit)
+        self.seen += 1
+        self.hits += hit
+        return hit
+
+    def rate(self):
+        return sum(self.recent) / len(self.recent) if self.recent else 1.0
+
+    def stop_reason(self):
+        """Why to stop scraping now, or None to carry on."""
+        if self.enough and self.hits >= self.enough:
+            return f"{self.hits} jobs scoring {self.score_threshold}+ collected"
+        if len(self.recent) >= self.window and self.rate() < self.min_yield:
+            return f"only {sum(self.recent)}/{self.window} recent cards score {self.score_threshold}+"
+        return None
+
+    def should_stop(self):
+        reason = self.stop_reason()
+        if reason:
+            logging.info(f"📉 Stopping early: {reason}.")
+        return bool(reason)
+
+    def summary(self):
+        return f"🎯 {self.hits}/{self.seen} captured jobs score {self.score_threshold}+"
+
+def from_config(config):
+    """The YieldMonitor for a run's config, or None when early_stop is switched off."""
+    settings = config.get('early_stop', {})
+    if settings is False:
+        return None
+    positive_keywords, negative_keywords = keywords_from_config(config)
+    return YieldMonitor(positive_keywords, negative_keywords, **{**DEFAULT_EARLY_STOP, **(settings or {})})
@@ -1,8 +1,10 @@
 import json
 import os
 from playwright.sync_api import sync_playwright
-import time
-import random
+from browser_server import launch_browser
+from tracing import span
+import request_policy
+import pacing
 
 OUTPUT_DIR = 'data/jobs/descriptions'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -10,14 +12,17 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 def get_job_text(page, url):
     try:
         print(f"   -> Navigating to {url[:60]}...")
-        page.goto(url, timeout=30000)
-        page.wait_for_load_state('domcontentloaded')
+        pacing.pacer('descriptions').acquire()
+        with span('navigate', cat='browser', url=url):
+            page.goto(url, timeout=30000)
+            page.wait_for_load_state('domcontentloaded')
         
         # Indeed specific handling
         if "indeed" in url:
             try:
                 # Click "Read more" if description is truncated (common on mobile views, less on desktop)
                 # But mostly we just want #jobDescriptionText
+                pacing.wait_for_selector(page, '#jobDescriptionText', 5000)
                 desc = page.locator('#jobDescriptionText').inner_text()
                 return desc
             except:
@@ -29,6 +34,7 @@ def get_job_text(page, url):
                 page.locator('.show-more-less-html__button').click(timeout=2000)
             except: pass
             try:
+                pacing.wait_for_selector(page, '.description__text', 5000)
                 return page.locator('.description__text').inner_text()
             except:
                 return page.inner_text("body")
@@ -70,8 +76,10 @@ def main():
     print(f"🕷️  Fetching descriptions for top {len(top_5)} active listings...")
     
     with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
+        browser = launch_browser(p, headless=True)
         context = browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+        route_stats = request_policy.apply(context, 'descriptions')
+        pacing.pacer('descriptions').watch(context)
         page = context.new_page()
         
         results = []
@@ -92,11 +100,11 @@ def main():
                     "file": filepath,
                     "preview": text[:200].replace('\n', ' ') + "..."
                 })
-            
-            time.sleep(random.uniform(2, 5))
+
             
         browser.close()
         
+    print(route_stats.summary())
     print("\n✅ Fetch complete. Summaries:")
     for r in results:
         print(f"* {r['title']} (@ {r['company']}) -> Saved to {r['file']}")
@@ -2,6 +2,7 @@ import markdown
 import os
 import asyncio
 from playwright.async_api import async_playwright
+from browser_server import launch_browser_async
 
 # Professional CSS for a two-column resume matching your template style
 CSS = """
@@ -139,7 +140,7 @@ async def generate_pdf(md_path, pdf_path):
     """
 
     async with async_playwright() as p:
-        browser = await p.chromium.launch()
+        browser = await launch_browser_async(p)
         page = await browser.new_page()
         await page.set_content(full_html)
         await page.pdf(path=pdf_path, format="Letter", print_background=True)
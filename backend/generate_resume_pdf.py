@@ -2,6 +2,7 @@ import markdown
 import os
 import asyncio
 from playwright.async_api import async_playwright
+from browser_server import launch_browser_async
 
 # Professional CSS from professional-style.json
 CSS = """
@@ -196,7 +197,7 @@ async def convert_md_to_pdf(md_path, pdf_path):
 
     # Use playwright to render PDF
     async with async_playwright() as p:
-        browser = await p.chromium.launch()
+        browser = await launch_browser_async(p)
         page = await browser.new_page()
         await page.set_content(full_html)
         await page.pdf(path=pdf_path, format="Letter", print_background=True, margin={"top": "0", "bottom": "0", "left": "0", "right": "0"})
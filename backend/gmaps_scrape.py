@@ -1,12 +1,17 @@
 import os
-import json
 import argparse
 from apify_client import ApifyClient
+from tracing import span
+from deadline import Deadline
 
 # Configuration
 APIFY_TOKEN = os.getenv('APIFY_TOKEN')
+DEFAULT_LOCATION = "London, Ontario"
+DEFAULT_MAX_PLACES = 20
+OUTPUT_FILE = "gmaps_discovered.json"
 
-def scrape_gmaps_companies(search_term, location, max_places=20):
+def scrape_gmaps_companies(search_term, location, max_places=20, deadline=None):
+    deadline = deadline or Deadline()
     if not APIFY_TOKEN:
         print("⚠️  APIFY_TOKEN not found. Skipping Google Maps scrape.")
         return []
@@ -24,7 +29,10 @@ def scrape_gmaps_companies(search_term, location, max_places=20):
     
     try:
         # Start the actor
-        run = client.actor("compass/crawler-google-places").call(run_input=run_input)
+        with span('apify_actor', cat='http', query=search_term):
+            # The actor is stopped at the deadline; whatever it scraped so far is kept in its dataset
+            timeout_secs = int(deadline.timeout_s(3600, minimum=10)) if deadline.at else None
+            run = client.actor("compass/crawler-google-places").call(run_input=run_input, timeout_secs=timeout_secs)
         
         # Fetch results
         print(f"✅  Map scan complete. Fetching place details...")
@@ -48,50 +56,46 @@ def scrape_gmaps_companies(search_term, location, max_places=20):
         print(f"❌  Google Maps scrape failed: {e}")
         return []
 
-def save_places(places, filename):
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
-    
-    with open(filename, 'w') as f:
-        json.dump(places, f, indent=2)
-    print(f"💾  Saved {len(places)} companies to {filename}")
+def run(ctx):
+    """Pipeline entry point (see stage.StageContext)."""
+    query = ctx.option('query')
+    if not query:
+        print("⚠️  No query given. Skipping Google Maps scrape.")
+        return []
+
+    results = scrape_gmaps_companies(query, ctx.option('location', DEFAULT_LOCATION), ctx.option('max', DEFAULT_MAX_PLACES), ctx.deadline)
+
+    if results:
+        output_file = ctx.option('output_file', OUTPUT_FILE)
+        ctx.sink.write(output_file, results)
+        print(f"💾  Saved {len(results)} companies to {ctx.sink.path(output_file)}")
+    else:
+        print("⚠️  No results found or Apify token missing.")
+    return results
 
 if __name__ == "__main__":
+    from stage import context_from_args
 
     parser = argparse.ArgumentParser(description="Scrape Google Maps for businesses")
 
     parser.add_argument("--query", required=True, help="Search term (e.g. 'Software Company')")
 
-    parser.add_argument("--location", default="London, Ontario", help="Location to search in")
+    parser.add_argument("--location", default=DEFAULT_LOCATION, help="Location to search in")
 
     parser.add_argument("--output-dir", default="data/companies", help="Output directory")
 
-    parser.add_argument("--run-id", type=str, help="Unused but accepted for consistency")
-
-    parser.add_argument("--max", type=int, default=20, help="Max results")
+    parser.add_argument("--output-file", default=OUTPUT_FILE, help="Output file name inside --output-dir")
 
-    
-
-    args = parser.parse_args()
-
-    
-
-    # Ensure output dir exists
+    parser.add_argument("--run-id", type=str, help="Unused but accepted for consistency")
 
-    os.makedirs(args.output_dir, exist_ok=True)
+    parser.add_argument("--config", type=str, help="Unused but accepted for consistency")
 
-    output_path = os.path.join(args.output_dir, "gmaps_discovered.json")
+    parser.add_argument("--max", type=int, default=DEFAULT_MAX_PLACES, help="Max results")
 
     
 
-    results = scrape_gmaps_companies(args.query, args.location, args.max)
+    args = parser.parse_args()
 
     
 
-    if results:
-
-        save_places(results, output_path)
-
-    else:
-
-        print("⚠️  No results found or Apify token missing.")
+    run(context_from_args(args, query=args.query, location=args.location, max=args.max, output_file=args.output_file))
@@ -0,0 +1,97 @@
+import os
+import json
+import time
+
+# HN items already downloaded, keyed by id. Restored between workflow runs
+# with actions/cache like the stage cache, never committed.
+CACHE_FILE = 'data/.hn_cache/items.json'
+# Comments can only be edited for two hours after posting: an item fetched
+# later than that is final, one fetched earlier may still change.
+EDIT_WINDOW = 2 * 3600
+# A hiring thread gets new posts for about a month
+ACTIVE_SECONDS = 35 * 24 * 3600
+KEEP_THREADS = 3 # Older threads are dropped from the cache
+
+class ItemCache:
+    """
+    {"threads": {story_id: {title, time, kids}}, "items": {id: item + thread, fetched_at}}.
+    Ids are stored as strings (JSON keys); the API methods take ints.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.data = self._load()
+        self.hits = 0
+        self.fetched = 0
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        data.setdefault('threads', {})
+        data.setdefault('items', {})
+        return data
+
+    def item(self, item_id):
+        return self.data['items'].get(str(item_id))
+
+    def is_active(self, story, now=None):
+        return (now or time.time()) - (story.get('time') or 0) < ACTIVE_SECONDS
+
+    def needs_fetch(self, item_id, story, now=None):
+        """Not cached yet, or cached within its edit window while the thread is still active."""
+        now = now or time.time()
+        cached = self.item(item_id)
+        if not cached:
+            return True
+        if not self.is_active(story, now):
+            return False
+        posted = cached.get('time') or 0
+        fetched_at = cached.get('fetched_at') or 0
+        return fetched_at - posted < EDIT_WINDOW
+
+    def missing(self, story, item_ids, now=None):
+        """The ids of item_ids to request; counts the others as hits."""
+        todo = [item_id for item_id in item_ids if self.needs_fetch(item_id, story, now)]
+        self.hits += len(item_ids) - len(todo)
+        return todo
+
+    def put_thread(self, story):
+        self.data['threads'][str(story['id'])] = {
+            'title': story.get('title'), 'time': story.get('time'), 'kids': story.get('kids', []),
+        }
+
+    def put(self, item, thread_id, now=None):
+        self.data['items'][str(item['id'])] = {
+            'id': item['id'], 'by': item.get('by'), 'time': item.get('time'), 'text': item.get('text'),
+            'deleted': item.get('deleted', False), 'dead': item.get('dead', False),
+            'thread': thread_id, 'fetched_at': now or time.time(),
+        }
+        self.fetched += 1
+
+    def prune(self, keep=KEEP_THREADS):
+        """Forgets every thread but the keep newest, with their items."""
+        newest = sorted(self.data['threads'], key=lambda t: self.data['threads'][t].get('time') or 0, reverse=True)[:keep]
+        kept = set(newest)
+        self.data['threads'] = {t: v for t, v in self.data['threads'].items() if t in kept}
+        self.data['items'] = {i: v for i, v in self.data['items'].items() if str(v.get('thread')) in kept}
+
+    def save(self):
+        # Another shard may have saved since we loaded: keep its items too
+        on_disk = self._load()
+        on_disk['threads'].update(self.data['threads'])
+        for item_id, item in self.data['items'].items():
+            if (item.get('fetched_at') or 0) >= (on_disk['items'].get(item_id, {}).get('fetched_at') or 0):
+                on_disk['items'][item_id] = item
+        self.data = on_disk
+        self.prune()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.tmp{os.getpid()}"
+        with open(tmp, 'w') as f:
+            json.dump(self.data, f)
+        os.replace(tmp, self.path)
+
+    def summary(self):
+        return f"🗃️  HN cache: {self.hits} posts reused, {self.fetched} fetched ({len(self.data['items'])} cached)"
@@ -1,59 +1,229 @@
-import requests
-import json
-import time
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from tracing import span
+from deadline import Deadline
+from http_client import make_session, cache_summaries
+import resilience
+import sharding
+import pacing
+from hn_cache import ItemCache
 
-def fetch_hn_jobs():
-    print("🕵️  Fetching 'Who is Hiring' from Hacker News...")
-    
-    # 1. Get the latest 'Who is Hiring' story ID
-    user_url = "https://hacker-news.firebaseio.com/v0/user/whoishiring.json"
-    user_data = requests.get(user_url).json()
+OUTPUT_FILE = "hn_results.json"
+HN_API = "https://hacker-news.firebaseio.com/v0"
+HN_WORKERS = 16 # Item requests in flight; the rate cap is pacing.PACING['hn']
+
+# Algolia's HN search returns whole pages of a story's comments (text included)
+# per request. Base URL is overridable so it can run against a fixture server.
+ALGOLIA_API = "https://hn.algolia.com/api/v1"
+ALGOLIA_API_ENV = "JOBHUNTR_HN_ALGOLIA_URL"
+ALGOLIA_PAGE_SIZE = 1000 # Algolia's maximum hits per page
+DEFAULT_BACKEND = "auto" # auto: Algolia, Firebase if it fails | algolia | firebase
+
+def get_json(session, url, deadline, params=None, source='hn'):
+    pacer = pacing.pacer(source)
+    pacer.acquire()
+    response = session.get(url, params=params, timeout=deadline.timeout_s(15))
+    pacer.observe(response.status_code)
+    response.raise_for_status()
+    return response.json()
+
+def is_relevant(text):
+    # Simple keyword filter for Canada/Remote, over the full post
+    return "Canada" in text or "Remote" in text or "London" in text
+
+def fetch_items(session, item_ids, deadline, workers=HN_WORKERS):
+    """
+    {id: item} for item_ids, fetched concurrently over session. Posts that
+    keep failing are skipped; once the breaker opens (or time is up) the
+    remaining ones aren't requested.
+    """
+    stop = threading.Event()
+
+    def fetch(item_id):
+        if stop.is_set():
+            return item_id, None
+        if deadline.expired():
+            stop.set()
+            return item_id, None
+        try:
+            with span('fetch_item', cat='http', item=item_id):
+                return item_id, resilience.call('hn', get_json, session, f"{HN_API}/item/{item_id}.json", deadline, deadline=deadline)
+        except resilience.CircuitOpen as e:
+            if not stop.is_set():
+                print(f"⏭️  Giving up on the remaining posts: {e}")
+            stop.set()
+        except Exception as e:
+            # One unreachable post shouldn't cost the whole thread
+            print(f"   x Skipping post {item_id}: {e}")
+        return item_id, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        items = {item_id: item for item_id, item in pool.map(fetch, item_ids) if item}
+    if deadline.expired():
+        print(f"⏰  Time budget used up. Fetched {len(items)}/{len(item_ids)} posts.")
+    return items
+
+def latest_thread(session, deadline):
+    """The newest 'Who is hiring' story from the Firebase API."""
+    with span('fetch_user', cat='http'):
+        user_data = resilience.call('hn', get_json, session, f"{HN_API}/user/whoishiring.json", deadline, deadline=deadline)
     # The first submission is usually the latest monthly post
     latest_story_id = user_data['submitted'][0] 
+    with span('fetch_story', cat='http', story=latest_story_id):
+        return resilience.call('hn', get_json, session, f"{HN_API}/item/{latest_story_id}.json", deadline, deadline=deadline)
+
+def fetch_posts_firebase(session, story, shard, cache, deadline):
+    """
+    Top-level post ids of story (in thread order), one request per post.
+    Posts already in the item cache are reused; only new ones (and, while the
+    thread is active, ones that were still editable when cached) are requested.
+    """
+    comment_ids = sharding.partition(story.get('kids', []), shard)
+    todo = cache.missing(story, comment_ids)
+    print(f"    Scanning {len(comment_ids)} top-level posts ({len(todo)} new or still editable)...")
+    with span('fetch_items', cat='http', items=len(todo)):
+        fetched = fetch_items(session, todo, deadline)
+    for item in fetched.values():
+        cache.put(item, story['id'])
+    return comment_ids
+
+def algolia_hit_to_item(hit):
+    """An Algolia comment hit as a Firebase-shaped item."""
+    return {
+        'id': int(hit['objectID']),
+        'by': hit.get('author'),
+        'time': hit.get('created_at_i'),
+        'text': hit.get('comment_text'),
+        'parent': hit.get('parent_id'),
+    }
+
+def fetch_posts_algolia(session, story, shard, cache, deadline, base_url=None, item_session=None):
+    """
+    Top-level post ids of story from Algolia's comment search, ALGOLIA_PAGE_SIZE
+    comments per request, text included. Every post lands in the item cache
+    (refreshing cached ones). Raises on failure so the caller can fall back.
+
+    The search returns replies too and stops at 1000 hits, so on a big thread
+    it misses top-level posts: the ids in story['kids'] it didn't return are
+    fetched from Firebase over item_session (default: session), or reused
+    from the cache.
+    """
+    base_url = (base_url or os.environ.get(ALGOLIA_API_ENV) or ALGOLIA_API).rstrip('/')
+    items = []
+    page = 0
+    while True:
+        params = {'tags': f"comment,story_{story['id']}", 'hitsPerPage': ALGOLIA_PAGE_SIZE, 'page': page}
+        with span('algolia_page', cat='http', page=page):
+            result = resilience.call('hn_algolia', get_json, session, f"{base_url}/search", deadline, params, 'hn_algolia',
+                                     deadline=deadline)
+        items.extend(algolia_hit_to_item(hit) for hit in result.get('hits', []))
+        page += 1
+        if page >= result.get('nbPages', 0) or not result.get('hits'):
+            break
+        if deadline.expired():
+            print(f"⏰  Time budget used up after {page} result pages.")
+            break
+
+    # Replies to posts come back too; job posts answer the story itself
+    top_level = {item['id']: item for item in items if item['parent'] == story['id']}
+    kids = story.get('kids', [])
+    # Thread order; posts newer than the story record Algolia already has go last
+    known = set(kids)
+    thread_ids = kids + [item_id for item_id in top_level if item_id not in known]
+    comment_ids = sharding.partition(thread_ids, shard)
+    for item_id in comment_ids:
+        if item_id in top_level:
+            cache.put(top_level[item_id], story['id'])
+    print(f"    Read {len(top_level)} top-level posts in {page} request(s) from Algolia.")
+
+    missing = [item_id for item_id in comment_ids if item_id not in top_level]
+    if missing:
+        todo = cache.missing(story, missing)
+        print(f"    {len(missing)} posts missing from Algolia's results ({len(todo)} not cached). Fetching them from Firebase...")
+        with span('fetch_items', cat='http', items=len(todo)):
+            fetched = fetch_items(item_session or session, todo, deadline)
+        for item in fetched.values():
+            cache.put(item, story['id'])
+    return comment_ids
+
+def fetch_hn_jobs(deadline=None, shard=None, cache=None, backend=DEFAULT_BACKEND, algolia_url=None):
+    """
+    Relevant posts of the latest hiring thread, read in bulk from Algolia
+    (backend 'auto'/'algolia') or item by item from Firebase ('firebase', and
+    the fallback when Algolia fails). Both fill the same item cache.
+    """
+    print("🕵️  Fetching 'Who is Hiring' from Hacker News...")
+    deadline = deadline or Deadline()
+    cache = cache or ItemCache()
     
-    # 2. Get the story details to confirm title
-    story_url = f"https://hacker-news.firebaseio.com/v0/item/{latest_story_id}.json"
-    story = requests.get(story_url).json()
-    print(f"📄  Found: {story.get('title')}")
-    
-    # 3. Get the top-level comments (job posts)
-    comment_ids = story.get('kids', [])[:50] # Limit to top 50 for quick test
-    print(f"    Scanning {len(comment_ids)} top-level posts...")
+    # The user/story records and Algolia's pages go through the HTTP cache. Posts
+    # don't: Firebase sends no validators, so cached copies could never be
+    # revalidated, and the item cache already keeps them between runs.
+    with make_session(1, cache_source='hn') as session, make_session(HN_WORKERS) as item_session:
+        try:
+            story = latest_thread(session, deadline)
+        except resilience.CircuitOpen as e:
+            print(f"⏭️  Skipping Hacker News: {e}")
+            return []
+        print(f"📄  Found: {story.get('title')}")
+        cache.put_thread(story)
+        
+        comment_ids = None
+        if backend in ('auto', 'algolia'):
+            try:
+                comment_ids = fetch_posts_algolia(session, story, shard, cache, deadline, algolia_url, item_session)
+            except Exception as e:
+                if backend == 'algolia':
+                    raise
+                print(f"⚠️  Algolia search unavailable ({e.__class__.__name__}: {e}). Falling back to the Firebase API.")
+        if comment_ids is None:
+            comment_ids = fetch_posts_firebase(item_session, story, shard, cache, deadline)
+        for line in cache_summaries(session):
+            print(line)
     
+    try:
+        cache.save()
+    except OSError as e:
+        print(f"⚠️  Could not save the HN cache: {e}")
+    print(cache.summary())
+
     jobs = []
     for cid in comment_ids:
-        comment_url = f"https://hacker-news.firebaseio.com/v0/item/{cid}.json"
-        comment = requests.get(comment_url).json()
-        
-        if comment and 'text' in comment:
+        comment = cache.item(cid)
+        if comment and comment.get('text') and not comment.get('deleted') and not comment.get('dead'):
             text = comment['text']
-            # Simple keyword filter for Canada/Remote
-            if "Canada" in text or "Remote" in text or "London" in text:
+            if is_relevant(text):
                 jobs.append({
                     "id": cid,
                     "by": comment.get('by'),
                     "time": comment.get('time'),
                     "text": text[:500] + "..." # Truncate for preview
                 })
-        time.sleep(0.1) # Be nice to API
         
     return jobs
 
-def save_jobs(jobs, filename):
-    with open(filename, 'w') as f:
-        json.dump(jobs, f, indent=2)
-    print(f"💾  Saved {len(jobs)} relevant jobs to {filename}")
+def run(ctx):
+    """Pipeline entry point (see stage.StageContext)."""
+    jobs = fetch_hn_jobs(
+        ctx.deadline, ctx.option('shard'),
+        backend=ctx.option('backend', ctx.config.get('hn_backend', DEFAULT_BACKEND)),
+        algolia_url=ctx.option('algolia_url')
+    )
+    ctx.sink.write(OUTPUT_FILE, jobs)
+    print(f"💾  Saved {len(jobs)} relevant jobs to {ctx.sink.path(OUTPUT_FILE)}")
+    return jobs
 
 if __name__ == "__main__":
     import argparse
-    import os
+    from stage import context_from_args
     parser = argparse.ArgumentParser()
     parser.add_argument("--output-dir", default="data/jobs")
+    parser.add_argument("--shard", type=str, help="Only fetch shard I/N of the posts")
+    parser.add_argument("--backend", choices=['auto', 'algolia', 'firebase'], help=f"Default: config hn_backend or {DEFAULT_BACKEND}")
+    parser.add_argument("--algolia-url", help=f"Algolia API base (default ${ALGOLIA_API_ENV} or {ALGOLIA_API})")
     parser.add_argument("--run-id", type=str, help="Unused but accepted for consistency")
+    parser.add_argument("--config", type=str, help="Unused but accepted for consistency")
     args = parser.parse_args()
 
-    # Ensure output dir exists
-    os.makedirs(args.output_dir, exist_ok=True)
-
-    jobs = fetch_hn_jobs()
-    save_jobs(jobs, os.path.join(args.output_dir, "hn_results.json"))
+    run(context_from_args(args, shard=args.shard, backend=args.backend, algolia_url=args.algolia_url))
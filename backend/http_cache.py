@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# GET responses of the requests-based sources, revalidated with ETag /
+# Last-Modified once they're older than the source's max-age. Restored between
+# workflow runs with actions/cache, never committed.
+CACHE_DIR = 'data/.http_cache'
+MAX_BYTES = 200 * 1024 * 1024 # Least recently used bodies are evicted beyond this
+DEFAULT_MAX_AGE = 0 # Seconds a response is served without asking the server (0: always revalidate)
+MAX_AGE = {
+    'hn': 300, # The hiring thread's record (its kids grow all month) and Algolia pages; posts live in hn_cache
+    'knighthunter': 1800,
+    'londontechjobs': 1800,
+}
+# Describe the bytes on the wire, not the decoded body we store
+DROPPED_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding', 'connection'}
+
+class HttpCache:
+    """
+    Bodies in <root>/<key>.body, status/headers/validators in <key>.json.
+    Shared by every session of the process; counts hits (served fresh),
+    revalidations (304) and misses per source.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.stats = {}
+        self.evicted = 0
+        self._size = None
+        self._lock = threading.Lock()
+
+    def key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        return os.path.join(self.root, f"{key}.json"), os.path.join(self.root, f"{key}.body")
+
+    def count(self, source, outcome):
+        with self._lock:
+            counts = self.stats.setdefault(source, {'hit': 0, 'revalidated': 0, 'miss': 0})
+            counts[outcome] += 1
+
+    def load(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        return meta, body
+
+    def _write(self, path, data, mode):
+        tmp = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+        with open(tmp, mode) as f:
+            if mode == 'w':
+                json.dump(data, f)
+            else:
+                f.write(data)
+        os.replace(tmp, path)
+
+    def store(self, key, response, body):
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in DROPPED_HEADERS}
+        meta = {
+            'url': response.url, 'status': response.status_code, 'reason': response.reason,
+            'headers': headers, 'stored_at': time.time(),
+        }
+        meta_path, body_path = self._paths(key)
+        os.makedirs(self.root, exist_ok=True)
+        previous = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        self._write(body_path, body, 'wb')
+        self._write(meta_path, meta, 'w')
+        with self._lock:
+            if self._size is not None:
+                self._size += len(body) - previous
+        self.evict()
+
+    def refresh(self, key, meta, response):
+        """After a 304: the stored body is current again (validators may have moved on)."""
+        for name in ('ETag', 'Last-Modified', 'Cache-Control', 'Expires'):
+            if response.headers.get(name):
+                meta['headers'][name] = response.headers[name]
+        meta['stored_at'] = time.time()
+        meta_path, body_path = self._paths(key)
+        self._write(meta_path, meta, 'w')
+        os.utime(body_path) # Recently used: evicted last
+
+    def touch(self, key):
+        try:
+            os.utime(self._paths(key)[1])
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drops the least recently used entries until the cache fits max_bytes."""
+        with self._lock:
+            bodies = []
+            if self._size is None or self._size > self.max_bytes:
+                for name in os.listdir(self.root):
+                    if name.endswith('.body'):
+                        path = os.path.join(self.root, name)
+                        try:
+                            stat = os.stat(path)
+                        except OSError:
+                            continue
+                        bodies.append((stat.st_mtime, stat.st_size, path))
+                self._size = sum(size for _, size, _ in bodies)
+            if self._size <= self.max_bytes:
+                return 0
+            evicted = 0
+            for _, size, path in sorted(bodies):
+                if self._size <= self.max_bytes:
+                    break
+                for stale in (path, path[:-len('.body')] + '.json'):
+                    try:
+                        os.remove(stale)
+                    except OSError:
+                        pass
+                self._size -= size
+                evicted += 1
+            self.evicted += evicted
+            return evicted
+
+    def summary(self, source):
+        counts = self.stats.get(source)
+        if not counts:
+            return None
+        total = counts['hit'] + counts['revalidated'] + counts['miss']
+        return (f"🗄️  {source} HTTP cache: {counts['hit']} fresh, {counts['revalidated']} revalidated (304), "
+                f"{counts['miss']} downloaded of {total} GETs"
+                f"{f'; {self.evicted} old entries evicted' if self.evicted else ''}")
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared():
+    """The process-wide cache in CACHE_DIR."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = HttpCache()
+        return _shared
+
+def to_response(meta, body, request):
+    response = Response()
+    response.status_code = meta['status']
+    response.reason = meta.get('reason')
+    response.headers = CaseInsensitiveDict(meta['headers'])
+    response._content = body
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    response.from_cache = True
+    return response
+
+def is_storable(response):
+    cache_control = response.headers.get('Cache-Control', '').lower()
+    return response.status_code == 200 and 'no-store' not in cache_control
+
+class CachingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter serving GETs from an HttpCache: fresh entries (younger than
+    the source's max-age) without a request, older ones after a conditional
+    GET (If-None-Match / If-Modified-Since) that the server answers with 304.
+    """
+
+    def __init__(self, source, cache=None, max_age=None, **kwargs):
+        super().__init__(**kwargs)
+        self.source = source
+        self.cache = cache or shared()
+        self.max_age = max_age if max_age is not None else MAX_AGE.get(source, DEFAULT_MAX_AGE)
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET':
+            return super().send(request, **kwargs)
+        key = self.cache.key(request.url)
+        cached = self.cache.load(key)
+        if cached:
+            meta, body = cached
+            if time.time() - meta.get('stored_at', 0) < self.max_age:
+                self.cache.count(self.source, 'hit')
+                self.cache.touch(key)
+                return to_response(meta, body, request)
+            headers = CaseInsensitiveDict(meta['headers'])
+            if headers.get('ETag'):
+                request.headers['If-None-Match'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                request.headers['If-Modified-Since'] = headers['Last-Modified']
+
+        response = super().send(request, **kwargs)
+        if cached and response.status_code == 304:
+            response.close()
+            self.cache.count(self.source, 'revalidated')
+            self.cache.refresh(key, meta, response)
+            return to_response(meta, body, request)
+
+        self.cache.count(self.source, 'miss')
+        if is_storable(response):
+            try:
+                self.cache.store(key, response, response.content)
+            except OSError as e:
+                print(f"⚠️  Could not cache {request.url}: {e}")
+        return response
@@ -0,0 +1,31 @@
+import urllib.parse
+import requests
+from requests.adapters import HTTPAdapter
+from http_cache import CachingAdapter
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+def make_session(workers=1, user_agent=DEFAULT_USER_AGENT, headers=None, cache_source=None):
+    """
+    A requests.Session keeping up to workers keep-alive connections per host,
+    so concurrent fetches reuse them instead of paying a handshake per request.
+    With cache_source, GETs go through the on-disk HTTP cache (http_cache)
+    under that source's max-age. Close it when done (or use it as a context manager).
+    """
+    session = requests.Session()
+    pool = {'pool_connections': 4, 'pool_maxsize': max(1, workers)}
+    adapter = CachingAdapter(cache_source, **pool) if cache_source else HTTPAdapter(**pool)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': user_agent, **(headers or {})})
+    return session
+
+def mount_cache(session, url, source, workers=1):
+    """Sends the session's requests to url's host through the HTTP cache, under source's max-age."""
+    parts = urllib.parse.urlsplit(url)
+    session.mount(f"{parts.scheme}://{parts.netloc}/", CachingAdapter(source, pool_connections=1, pool_maxsize=max(1, workers)))
+
+def cache_summaries(session):
+    """Hit/miss lines of the HTTP caches mounted on session, for the run log."""
+    sources = {adapter.source: adapter.cache for adapter in session.adapters.values() if isinstance(adapter, CachingAdapter)}
+    return [line for line in (cache.summary(source) for source, cache in sources.items()) if line]
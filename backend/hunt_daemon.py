@@ -0,0 +1,330 @@
+import os
+import re
+import sys
+import json
+import time
+import queue
+import argparse
+import importlib
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import tracing
+import orchestrate_search
+from browser_server import browser_server
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_QUEUED = 20
+MAX_FINISHED = 50 # Finished hunts kept for status/replay; older ones are forgotten
+KEEPALIVE_SECONDS = 15 # SSE comment sent while a hunt is quiet so proxies keep the stream open
+PASSWORD_ENV = 'APP_PASSWORD' # Same secret api/trigger.js checks
+# run_id names the hunt's directory under data/
+RUN_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+# The only client_payload entries that make it into the hunt config, with the
+# types they may have. Anything else (boards, backends, ...) stays with the
+# person running the daemon: a caller must not choose what this machine fetches.
+HUNT_CONFIG_KEYS = {
+    'run_id': (str,),
+    'query': (str, list),
+    'location': (str, list),
+    'positive_keywords': (dict,),
+    'negative_keywords': (dict,),
+    'deadline': (int, float),
+}
+
+class InvalidHunt(ValueError):
+    pass
+
+def hunt_config(client_payload):
+    """The hunt config for a client payload: allow-listed keys only, checked. Raises InvalidHunt."""
+    if client_payload is None:
+        client_payload = {}
+    if not isinstance(client_payload, dict):
+        raise InvalidHunt("client_payload must be an object")
+    config = {}
+    for key, types in HUNT_CONFIG_KEYS.items():
+        value = client_payload.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, types) or isinstance(value, bool):
+            raise InvalidHunt(f"Invalid {key}")
+        if isinstance(value, list) and not all(isinstance(v, str) for v in value):
+            raise InvalidHunt(f"Invalid {key}")
+        if isinstance(value, dict) and not all(isinstance(v, (int, float)) for v in value.values()):
+            raise InvalidHunt(f"Invalid {key}")
+        config[key] = value
+    if 'run_id' in config and not RUN_ID_PATTERN.match(config['run_id']):
+        raise InvalidHunt("run_id may only contain letters, digits, '_' and '-' (at most 64)")
+    return config
+
+class HuntQueue:
+    """
+    Accepts hunt requests, runs them one at a time on a warm worker and keeps
+    each hunt's progress events so SSE clients can replay them and then follow
+    along (for the last MAX_FINISHED finished hunts). One at a time because a hunt owns process-wide state (retry
+    budgets, the trace recorder, the shared browser env, cache stats).
+    """
+
+    def __init__(self, workers=orchestrate_search.DEFAULT_WORKERS):
+        self.workers = workers
+        self.pending = queue.Queue(maxsize=MAX_QUEUED)
+        self.hunts = {}
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._worker, name="hunt-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, client_payload):
+        """
+        Queues a hunt for client_payload (the config the workflow would get,
+        minus what hunt_config drops). Returns its run id.
+        """
+        payload = hunt_config(client_payload)
+        run_id = payload.get('run_id') or f"run_{int(time.time() * 1000)}"
+        payload['run_id'] = run_id
+        with self.cond:
+            if run_id in self.hunts and self.hunts[run_id]['status'] in ('queued', 'running'):
+                raise ValueError(f"Hunt {run_id} is already {self.hunts[run_id]['status']}")
+            self.hunts[run_id] = {'run_id': run_id, 'status': 'queued', 'events': [], 'payload': payload}
+        try:
+            self.pending.put_nowait(run_id)
+        except queue.Full:
+            with self.cond:
+                del self.hunts[run_id]
+            raise
+        self._record(run_id, 'hunt_queued', {'run_id': run_id, 'time': time.time(), 'position': self.pending.qsize()})
+        return run_id
+
+    def status(self, run_id=None):
+        with self.cond:
+            if run_id is not None:
+                hunt = self.hunts.get(run_id)
+                return None if hunt is None else {k: v for k, v in hunt.items() if k != 'events'}
+            return [{k: v for k, v in h.items() if k not in ('events', 'payload')} for h in self.hunts.values()]
+
+    def follow(self, run_id):
+        """Yields (event, fields) for run_id: everything so far, then new events until the hunt ends. None = keepalive."""
+        seen = 0
+        while True:
+            with self.cond:
+                hunt = self.hunts.get(run_id)
+                if hunt is None:
+                    return
+                if seen == len(hunt['events']) and hunt['status'] in ('queued', 'running'):
+                    self.cond.wait(timeout=KEEPALIVE_SECONDS)
+                new = hunt['events'][seen:]
+                seen += len(new)
+                done = hunt['status'] not in ('queued', 'running')
+            if not new and not done:
+                yield None
+            for item in new:
+                yield item
+            if done:
+                return
+
+    def _record(self, run_id, event, fields):
+        with self.cond:
+            hunt = self.hunts.get(run_id)
+            if hunt is None:
+                return
+            hunt['events'].append((event, fields))
+            if event == 'hunt_started':
+                hunt['status'] = 'running'
+            self.cond.notify_all()
+
+    def _worker(self):
+        while True:
+            run_id = self.pending.get()
+            with self.cond:
+                payload = self.hunts[run_id]['payload']
+            status = 'failed'
+            try:
+                status = 'done' if self._run(run_id, payload) else 'failed'
+            except BaseException as e:
+                # SystemExit included: a stage calling sys.exit() must not take the worker down
+                print(f"💥 Hunt {run_id} crashed: {e}")
+                self._record(run_id, 'hunt_error', {'run_id': run_id, 'time': time.time(), 'error': str(e)})
+            finally:
+                with self.cond:
+                    self.hunts[run_id].update(status=status, finished_at=time.time())
+                    self._forget_finished()
+                    self.cond.notify_all()
+                # Nothing left that could still need older trace events
+                tracing.discard_before(tracing.now_us())
+                self.pending.task_done()
+
+    def _forget_finished(self, keep=MAX_FINISHED):
+        """Drops the oldest finished hunts beyond keep (called with cond held), so a long-lived daemon doesn't grow."""
+        finished = sorted((h for h in self.hunts.values() if h['status'] not in ('queued', 'running')),
+                          key=lambda h: h['finished_at'])
+        for hunt in finished[:max(0, len(finished) - keep)]:
+            del self.hunts[hunt['run_id']]
+
+    def _run(self, run_id, payload):
+        # Same as the workflow: the client payload becomes the run's config file
+        run_dir = os.path.join("data", run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        config_path = os.path.join(run_dir, "config.json")
+        with open(config_path, 'w') as f:
+            json.dump(payload, f, indent=2)
+
+        args = orchestrate_search.build_parser().parse_args([
+            '--config', config_path, '--run-id', run_id, '--all', '--workers', str(self.workers),
+        ])
+        _, results = orchestrate_search.run_hunt(args, on_event=lambda event, fields: self._record(run_id, event, fields))
+        return all(results.values())
+
+def warm_up():
+    """Imports every stage module up front so the first hunt doesn't pay for it."""
+    for spec in orchestrate_search.STAGES.values():
+        try:
+            importlib.import_module(spec['module'])
+        except Exception as e:
+            print(f"⚠️  Could not preload {spec['module']}: {e}")
+
+def make_handler(hunts, password):
+    class HuntHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def cross_origin_refused(self):
+            """
+            Browsers send Origin on cross-site requests (and the daemon serves no
+            pages of its own), so without a password any web page the user opens
+            could start hunts here. Those are only let through with a password.
+            """
+            if password or not self.headers.get('Origin'):
+                return False
+            self.send_json(403, {'error': f"Cross-origin requests need a password ({PASSWORD_ENV})"})
+            return True
+
+        def cors_headers(self):
+            if password:
+                self.send_header('Access-Control-Allow-Origin', '*')
+
+        def send_json(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.cors_headers()
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_OPTIONS(self):
+            if self.cross_origin_refused():
+                return
+            self.send_response(204)
+            self.cors_headers()
+            self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def do_POST(self):
+            # Mirrors api/trigger.js: {password, client_payload}
+            if self.cross_origin_refused():
+                return
+            if self.path.rstrip('/') not in ('', '/api/trigger', '/hunts'):
+                return self.send_json(404, {'error': 'Not found'})
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                return self.send_json(400, {'error': 'Invalid JSON body'})
+            if not isinstance(body, dict):
+                return self.send_json(400, {'error': 'Invalid JSON body'})
+            if password and body.get('password') != password:
+                return self.send_json(401, {'error': 'Incorrect Password. Access Denied.'})
+            try:
+                run_id = hunts.submit(body.get('client_payload'))
+            except InvalidHunt as e:
+                return self.send_json(400, {'error': str(e)})
+            except queue.Full:
+                return self.send_json(503, {'error': 'Hunt queue is full. Try again later.'})
+            except ValueError as e:
+                return self.send_json(409, {'error': str(e)})
+            self.send_json(202, {
+                'message': 'Hunt queued successfully!',
+                'run_id': run_id,
+                'status': f"/hunts/{run_id}",
+                'events': f"/hunts/{run_id}/events",
+            })
+
+        def do_GET(self):
+            if self.cross_origin_refused():
+                return
+            parts = [p for p in self.path.split('?')[0].split('/') if p]
+            if parts == ['hunts']:
+                return self.send_json(200, hunts.status())
+            if len(parts) == 2 and parts[0] == 'hunts':
+                status = hunts.status(parts[1])
+                if status is None:
+                    return self.send_json(404, {'error': 'Unknown hunt'})
+                return self.send_json(200, status)
+            if len(parts) == 3 and parts[0] == 'hunts' and parts[2] == 'events':
+                if hunts.status(parts[1]) is None:
+                    return self.send_json(404, {'error': 'Unknown hunt'})
+                return self.stream_events(parts[1])
+            self.send_json(404, {'error': 'Not found'})
+
+        def stream_events(self, run_id):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.cors_headers()
+            self.end_headers()
+            self.close_connection = True
+            try:
+                for item in hunts.follow(run_id):
+                    if item is None:
+                        self.wfile.write(b": keepalive\n\n")
+                    else:
+                        event, fields = item
+                        self.wfile.write(f"event: {event}\ndata: {json.dumps(fields)}\n\n".encode())
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass # Client went away; the hunt keeps running
+
+    return HuntHandler
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=orchestrate_search.DEFAULT_WORKERS, password=None, shared_browser=True):
+    warm_up()
+    with contextlib.ExitStack() as stack:
+        if shared_browser:
+            try:
+                # Kept for the daemon's lifetime; hunts reuse it instead of starting their own
+                stack.enter_context(browser_server())
+            except Exception as e:
+                print(f"⚠️  Warm browser unavailable ({e}). Hunts will start their own.")
+        hunts = HuntQueue(workers=workers)
+        server = ThreadingHTTPServer((host, port), make_handler(hunts, password))
+        server.daemon_threads = True
+        if not password:
+            print(f"⚠️  No password set ({PASSWORD_ENV} / --password): local clients can start hunts, browsers (cross-origin) can't.")
+        print(f"🛰️  Hunt daemon listening on http://{host}:{port} (one hunt at a time, {workers} stage workers)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\n👋 Shutting down hunt daemon.")
+        finally:
+            server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="🛰️ Local hunt daemon: queue hunts over HTTP and stream their progress")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=orchestrate_search.DEFAULT_WORKERS, help="Stage workers per hunt")
+    parser.add_argument("--password", default=os.environ.get(PASSWORD_ENV), help=f"Required hunt password (default: ${PASSWORD_ENV})")
+    parser.add_argument("--no-shared-browser", action="store_true", help="Don't keep a warm Chromium between hunts")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.workers, args.password, not args.no_shared_browser)
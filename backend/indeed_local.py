@@ -1,175 +1,395 @@
-import time
-import random
-import json
+import asyncio
 import logging
 import urllib.parse
-from playwright.sync_api import sync_playwright
+import datetime
+from browser_server import async_browser
+from tracing import span
+from deadline import Deadline
+from stage import tag_search
+import resilience
+import request_policy
+import sessions
+import pacing
+import watermarks
+import early_stop
+
+DEFAULT_KEYWORDS = "Junior Developer"
+DEFAULT_LOCATION = "London, Ontario"
+DEFAULT_MAX_JOBS = 15
+OUTPUT_FILE = "indeed_local_results.json"
+BASE_URL = "https://ca.indeed.com"
+PAGE_SIZE = 10 # Results per page; page n is at start=n*PAGE_SIZE
+MAX_PARALLEL_PAGES = 3 # Result pages (each in its own context) loading at the same time
+FROMAGE_DAYS = (1, 3, 7, 14) # The "date posted" choices Indeed offers; older watermarks get a full scrape
+
+# Every context gets the same fingerprint so parallel pages look like one visitor's tabs
+CONTEXT_OPTIONS = {
+    'user_agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    'viewport': {"width": 1280, "height": 720},
+    'locale': "en-CA",
+    'timezone_id': "America/Toronto",
+}
+# Page is usable: results rendered (blob or cards) or a challenge we need to look at
+PAGE_SETTLED_JS = """
+() => !!(window.mosaic && window.mosaic.providerData && window.mosaic.providerData["mosaic-provider-jobcards"])
+    || !!document.querySelector('.job_seen_beacon, .resultContent')
+    || /challenge|verify/i.test(document.title)
+"""
+CHALLENGE_CLEARED_JS = "() => !/challenge|verify/i.test(document.title)"
+STEALTH_INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+# Indeed renders the result list from this blob; reading it costs one round trip per page.
+# The mapping to plain fields happens in the page so only what we use crosses the channel.
+MOSAIC_JOBS_JS = """
+() => {
+    const provider = window.mosaic && window.mosaic.providerData
+        && window.mosaic.providerData["mosaic-provider-jobcards"];
+    const model = provider && provider.metaData && provider.metaData.mosaicProviderJobCardsModel;
+    if (!model || !Array.isArray(model.results)) return null;
+    return model.results.map(r => ({
+        jobkey: r.jobkey,
+        title: r.displayTitle || r.title,
+        company: r.company,
+        location: r.formattedLocation,
+        salary: (r.salarySnippet && r.salarySnippet.text) || (r.extractedSalary && r.extractedSalary.text) || null,
+        posted: r.formattedRelativeTime || null,
+        pubDate: r.pubDate || null,
+    }));
+}
+"""
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def scrape_indeed_jobs(keywords, location, max_jobs=15):
-    """
-    Scrapes Indeed public job search using local Playwright with stealth techniques.
-    Indeed is notoriously aggressive with bot detection (Cloudflare).
-    """
-    logging.info(f"🕵️  Searching Indeed for '{keywords}' in '{location}' (Target: {max_jobs})...")
-    
+def job_key(url):
+    """Indeed's jk parameter, or the URL itself when there is none."""
+    params = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
+    return params.get('jk', [url])[0]
+
+def mosaic_to_job(result, location):
+    pub_date = None
+    if result.get('pubDate'):
+        # Epoch milliseconds
+        pub_date = datetime.datetime.fromtimestamp(result['pubDate'] / 1000, datetime.timezone.utc).date().isoformat()
+    return {
+        "title": result.get('title') or "Unknown Title",
+        "company": result.get('company') or "Unknown Company",
+        "location": result.get('location') or location,
+        "url": f"{BASE_URL}/viewjob?jk={result['jobkey']}",
+        "job_key": result['jobkey'],
+        "salary": result.get('salary'),
+        "posted": result.get('posted'),
+        "date": pub_date or "Recently",
+        "source": "Indeed (Local)"
+    }
+
+async def parse_embedded_jobs(page, location):
+    """Every job on the page from the mosaic JSON blob, or None if the page doesn't carry it."""
+    try:
+        results = await page.evaluate(MOSAIC_JOBS_JS)
+    except Exception as e:
+        logging.warning(f"Could not read embedded results: {e}")
+        return None
+    if not results:
+        return None
+    return [mosaic_to_job(r, location) for r in results if r.get('jobkey')]
+
+async def parse_dom_jobs(page, location):
+    """Fallback: walks the job card locators (slow, one round trip per field)."""
     jobs = []
-    
+    # Indeed job cards usually have class 'job_seen_beacon' or 'cardOutline'
+    job_cards = await page.locator(".job_seen_beacon, .resultContent").all()
+    logging.info(f"Found {len(job_cards)} visible cards on this page...")
+    for card in job_cards:
+        try:
+            title_el = card.locator("h2.jobTitle span").first
+            company_el = card.locator("[data-testid='company-name']")
+            location_el = card.locator("[data-testid='text-location']")
+            link_el = card.locator("h2.jobTitle a") # Usually the link is on the title
+        
+            # Sometimes link is parent
+            if not await link_el.count():
+                link_el = card.locator("a").first
+            
+            # Extract Text
+            title = (await title_el.inner_text()).strip() if await title_el.count() else "Unknown Title"
+            company = (await company_el.inner_text()).strip() if await company_el.count() else "Unknown Company"
+            loc = (await location_el.inner_text()).strip() if await location_el.count() else location
+        
+            # Extract URL
+            raw_url = await link_el.get_attribute("href")
+            if not raw_url:
+                continue
+            # Indeed URLs are messy. Clean them up.
+            url = raw_url if raw_url.startswith("http") else BASE_URL + raw_url
+
+            jobs.append({
+                "title": title,
+                "company": company,
+                "location": loc,
+                "url": url,
+                "job_key": job_key(url),
+                "source": "Indeed (Local)"
+            })
+        except Exception as e:
+            continue
+    return jobs
+
+def fromage(since):
+    """Smallest "posted in the last n days" filter covering everything after since, or None."""
+    if not since:
+        return None
+    days = -(-watermarks.age_seconds(since) // 86400)
+    return next((d for d in FROMAGE_DAYS if d >= days), None)
+
+def page_url(keywords, location, page_number, since=None):
     # URL Encode parameters
     q = urllib.parse.quote(keywords)
     l = urllib.parse.quote(location)
-    base_url = f"https://ca.indeed.com/jobs?q={q}&l={l}"
-    
-    with sync_playwright() as p:
-        # Launch browser - Headless often triggers detection, but let's try stealth args
-        # Sometimes 'headful' is actually safer for Indeed
-        browser = p.chromium.launch(
-            headless=False, # Indeed blocks headless aggressively. We need a visible window (can be minimized)
-            args=[
-                "--disable-blink-features=AutomationControlled",
-                "--no-sandbox",
-                "--disable-infobars"
-            ]
-        )
-        
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 720},
-            locale="en-CA",
-            timezone_id="America/Toronto"
-        )
-        
-        # Add stealth script
-        page = context.new_page()
-        page.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        logging.info(f"Navigating to {base_url}")
-        
+    # Always newest first, so a first run cut short by max_jobs can still set
+    # the watermark at the oldest posting it captured
+    url = f"{BASE_URL}/jobs?q={q}&l={l}&sort=date"
+    if fromage(since):
+        # Delta hunt: only recent postings
+        url += f"&fromage={fromage(since)}"
+    return url if page_number == 0 else f"{url}&start={page_number * PAGE_SIZE}"
+
+async def new_stealth_context(browser, route_stats=None, storage_state=None):
+    # storage_state: cookies of an earlier session that got past Cloudflare
+    context = await browser.new_context(**CONTEXT_OPTIONS, storage_state=storage_state)
+    # Add stealth script
+    await context.add_init_script(STEALTH_INIT_SCRIPT)
+    await request_policy.apply_async(context, 'indeed', route_stats)
+    return context
+
+async def is_challenge(page):
+    title = (await page.title()).lower()
+    return "challenge" in title or "verify" in title
+
+async def fetch_result_page(browser, url, location, deadline, semaphore, route_stats=None,
+                            storage_state=None, save_session=False):
+    """
+    Loads one result page in its own context and returns its jobs (page order).
+    save_session stores the context's cookies when the page got through.
+    """
+    from playwright.async_api import Error as PlaywrightError
+    async with semaphore:
+        if deadline.expired():
+            return []
+        context = await new_stealth_context(browser, route_stats, storage_state)
+        pacer = pacing.pacer('indeed')
+        pacer.watch(context)
         try:
-            page.goto(base_url, timeout=60000)
-            
-            # Human-like delay
-            time.sleep(random.uniform(3, 6))
-            
-            # Check for Cloudflare challenge
-            if "challenge" in page.title().lower() or "verify" in page.title().lower():
-                logging.warning("⚠️  Cloudflare Challenge Detected! Waiting for manual intervention or auto-solve...")
-                time.sleep(10) # Give it a moment, sometimes it auto-clears
+            page = await context.new_page()
+
+            async def open_page():
+                # Paced per source: slower after 429s/challenges, faster while Indeed stays happy
+                await pacer.acquire_async()
+                logging.info(f"Navigating to {url}")
+                with span('navigate', cat='browser', url=url):
+                    await page.goto(url, timeout=deadline.timeout_ms(60000))
+                
+                # Wait for results (or a challenge) instead of a fixed delay
+                with span('wait_results', cat='wait'):
+                    await pacing.wait_for_function_async(page, PAGE_SETTLED_JS, timeout_ms=deadline.timeout_ms(8000))
+                
+                # Check for Cloudflare challenge
+                if await is_challenge(page):
+                    logging.warning("⚠️  Cloudflare Challenge Detected! Waiting for manual intervention or auto-solve...")
+                    pacer.throttled("challenge")
+                    if storage_state:
+                        # The saved clearance didn't help; don't hand it to the next run
+                        sessions.invalidate('indeed', "challenged despite saved session")
+                    # Sometimes it auto-clears; stop waiting as soon as it does
+                    with span('wait_challenge', cat='wait'):
+                        await pacing.wait_for_function_async(page, CHALLENGE_CLEARED_JS, timeout_ms=deadline.timeout_ms(10000))
+                    if await is_challenge(page):
+                        raise resilience.Blocked("Cloudflare challenge did not clear")
+
+            # Navigation errors are retried with backoff. A challenge that didn't clear
+            # (Blocked) isn't: another try means another wait, and repeated blocks open
+            # the breaker so later hunts skip Indeed quickly.
+            await resilience.call_async('indeed', open_page, deadline=deadline, retry_on=(PlaywrightError, OSError))
             
             # Handle "Where" popup if it exists
             try:
-                page.get_by_label("Close").click(timeout=2000)
-            except:
+                await page.get_by_label("Close").click(timeout=1000)
+            except Exception:
                 pass
 
-            consecutive_failures = 0
-            
-            while len(jobs) < max_jobs and consecutive_failures < 3:
-                # Indeed job cards usually have class 'job_seen_beacon' or 'cardOutline'
-                job_cards = page.locator(".job_seen_beacon, .resultContent").all()
-                
-                logging.info(f"Found {len(job_cards)} visible cards on this page...")
-                
-                if not job_cards:
-                    logging.warning("No job cards found. Page structure might have changed or we are blocked.")
-                    # Dump debug info
-                    # page.screenshot(path="indeed_debug.png") 
-                    consecutive_failures += 1
-                    break
-                
-                for card in job_cards:
-                    if len(jobs) >= max_jobs:
+            with span('parse_cards', cat='parse', url=url):
+                page_jobs = await parse_embedded_jobs(page, location)
+                if page_jobs is None:
+                    logging.info("No embedded results JSON. Reading the cards instead.")
+                    page_jobs = await parse_dom_jobs(page, location)
+            if save_session and page_jobs:
+                await sessions.save_async(context, 'indeed')
+            return page_jobs
+        finally:
+            await context.close()
+
+async def scrape_indeed_jobs_async(keywords, location, max_jobs=15, deadline=None, headless=False, browser=None, since=None,
+                                   monitor=None, status=None):
+    """
+    Scrapes Indeed public job search using local Playwright with stealth techniques.
+    Indeed is notoriously aggressive with bot detection (Cloudflare).
+    The first result page is loaded alone (it tells us whether we're blocked),
+    the rest of the start= offsets in parallel contexts, in waves of MAX_PARALLEL_PAGES.
+    Between waves monitor (an early_stop.YieldMonitor) may end the scrape when
+    the cards stop scoring.
+    Contexts start from the cookies of the last session that got through
+    (data/sessions/indeed.json), which is what makes headless viable.
+    Pass browser to run in a caller's browser (e.g. the orchestrator's event
+    loop); it is left open, only our contexts are closed.
+    Postings come newest first. With since (epoch seconds of the last
+    complete run) the search is limited to recent postings; when the first page already reaches
+    older ones no further pages are loaded, and older jobs are dropped.
+    A scrape that fails before capturing anything raises; one that keeps
+    partial results (or is skipped by the breaker) says why in
+    status['degraded'], so the orchestrator doesn't cache it. status also gets
+    'complete' (a short page or the watermark ended it, nothing dropped for
+    max_jobs or the monitor) and 'newest_first'.
+    """
+    deadline = deadline or Deadline()
+    status = {} if status is None else status
+    status.update(complete=False, newest_first=True)
+    if resilience.breaker('indeed').is_open():
+        logging.warning("⏭️  Indeed has been blocking us lately (circuit open). Skipping.")
+        status['degraded'] = "circuit open"
+        return []
+    logging.info(f"🕵️  Searching Indeed for '{keywords}' in '{location}' (Target: {max_jobs})...")
+    
+    jobs = []
+    seen_keys = set()
+    page_count = -(-max_jobs // PAGE_SIZE)
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_PAGES)
+    route_stats = request_policy.RouteStats('indeed')
+    # How the listing ended: ran out (short page / watermark) or was cut (max_jobs / monitor)
+    ending = {'ran_out': False, 'cut': False}
+
+    def merge(page_jobs):
+        # Dedup by job key, keeping page order
+        if len(page_jobs) < PAGE_SIZE:
+            ending['ran_out'] = True
+        for job in page_jobs:
+            if watermarks.is_older(job.get('date'), since):
+                ending['ran_out'] = True
+                continue
+            if job['job_key'] in seen_keys:
+                continue
+            if len(jobs) >= max_jobs:
+                ending['cut'] = True
+                continue
+            seen_keys.add(job['job_key'])
+            jobs.append(job)
+            logging.info(f"   + Captured: {job['title']} at {job['company']}")
+            if monitor:
+                monitor.add(job)
+
+    # Launch browser - Headless often triggers detection, but let's try stealth args
+    # Sometimes 'headful' is actually safer for Indeed
+    # The orchestrator's shared browser already runs with the stealth flags, so it
+    # is used when available (a headful window needs a display the runners don't have)
+    async with async_browser(
+        browser,
+        headless=headless, # Indeed blocks headless aggressively. Without a saved session we need a visible window (can be minimized)
+        args=[
+            "--disable-blink-features=AutomationControlled",
+            "--no-sandbox",
+            "--disable-infobars"
+        ]
+    ) as browser:
+        try:
+            first = await fetch_result_page(browser, page_url(keywords, location, 0, since), location, deadline, semaphore, route_stats,
+                                            storage_state=sessions.load('indeed'), save_session=True)
+            if not first:
+                logging.warning("No job cards found. Page structure might have changed or we are blocked.")
+            merge(first)
+
+            reached_watermark = any(watermarks.is_older(job.get('date'), since) for job in first)
+            if reached_watermark:
+                logging.info("🌊 First page already reaches postings from before the last run. Not paging further.")
+            if first and len(first) >= PAGE_SIZE and len(jobs) < max_jobs and not reached_watermark:
+                urls = [page_url(keywords, location, n, since) for n in range(1, page_count)]
+                # The first page just refreshed the session; the others start from it
+                storage_state = sessions.load('indeed')
+                for i in range(0, len(urls), MAX_PARALLEL_PAGES):
+                    if ending['ran_out']:
                         break
-                        
-                    try:
-                        title_el = card.locator("h2.jobTitle span").first
-                        company_el = card.locator("[data-testid='company-name']")
-                        location_el = card.locator("[data-testid='text-location']")
-                        link_el = card.locator("h2.jobTitle a") # Usually the link is on the title
-                        
-                        # Sometimes link is parent
-                        if not link_el.count():
-                            link_el = card.locator("a").first
-                            
-                        # Extract Text
-                        title = title_el.inner_text().strip() if title_el.count() else "Unknown Title"
-                        company = company_el.inner_text().strip() if company_el.count() else "Unknown Company"
-                        loc = location_el.inner_text().strip() if location_el.count() else location
-                        
-                        # Extract URL
-                        raw_url = link_el.get_attribute("href")
-                        if raw_url:
-                            # Indeed URLs are messy. Clean them up.
-                            if not raw_url.startswith("http"):
-                                url = "https://ca.indeed.com" + raw_url
-                            else:
-                                url = raw_url
-                        else:
-                            continue
-
-                        # Dedup
-                        if not any(j['url'] == url for j in jobs):
-                            jobs.append({
-                                "title": title,
-                                "company": company,
-                                "location": loc,
-                                "url": url,
-                                "source": "Indeed (Local)"
-                            })
-                            logging.info(f"   + Captured: {title} at {company}")
-
-                    except Exception as e:
-                        continue
-
-                # Pagination
-                try:
-                    # Find 'Next' button
-                    next_btn = page.locator("[data-testid='pagination-page-next']")
-                    if next_btn.is_visible() and len(jobs) < max_jobs:
-                        logging.info("Clicking Next Page...")
-                        next_btn.click()
-                        time.sleep(random.uniform(4, 7)) # Long delay for Indeed
-                        
-                        # Check popup again
-                        try:
-                            page.locator("#mosaic-desktop-serpjapopup button[aria-label='close']").click(timeout=1000)
-                        except:
-                            pass
-                    else:
+                    if len(jobs) >= max_jobs or (monitor and monitor.should_stop()):
+                        ending['cut'] = True
                         break
-                except:
-                    logging.info("No next page or error navigating.")
-                    break
+                    wave = urls[i:i + MAX_PARALLEL_PAGES]
+                    results = await asyncio.gather(
+                        *(fetch_result_page(browser, url, location, deadline, semaphore, route_stats, storage_state) for url in wave),
+                        return_exceptions=True
+                    )
+                    for url, result in zip(wave, results):
+                        if isinstance(result, Exception):
+                            logging.warning(f"Page {url} failed: {result}")
+                            status['degraded'] = f"page failed: {result}"
+                        else:
+                            merge(result)
+            if deadline.expired():
+                logging.warning(f"⏰  Time budget used up. Keeping {len(jobs)} jobs.")
+            status['complete'] = ending['ran_out'] and not ending['cut'] and not deadline.expired() and not status.get('degraded')
             
         except Exception as e:
             logging.error(f"Scrape failed: {e}")
-            
-        finally:
-            browser.close()
-            
+            if not jobs:
+                raise
+            status['degraded'] = f"scrape failed: {e}"
+
+    logging.info(route_stats.summary())
     logging.info(f"✅  Indeed Scrape complete. Found {len(jobs)} jobs.")
     return jobs
 
-def save_jobs(jobs, filename):
-    with open(filename, 'w') as f:
-        json.dump(jobs, f, indent=2)
-    logging.info(f"💾  Saved {len(jobs)} jobs to {filename}")
+def scrape_indeed_jobs(keywords, location, max_jobs=15, deadline=None, headless=False, since=None, monitor=None, status=None):
+    """Sync entry point for scrape_indeed_jobs_async()."""
+    return asyncio.run(scrape_indeed_jobs_async(keywords, location, max_jobs, deadline, headless, since=since, monitor=monitor,
+                                                status=status))
+
+async def run_async(ctx):
+    """Pipeline entry point on the orchestrator's event loop (uses ctx.browser when set)."""
+    monitor = early_stop.from_config(ctx.config)
+    status = {}
+    jobs = await scrape_indeed_jobs_async(
+        ctx.option('keywords', DEFAULT_KEYWORDS),
+        ctx.option('location', DEFAULT_LOCATION),
+        max_jobs=ctx.option('max', DEFAULT_MAX_JOBS),
+        deadline=ctx.deadline,
+        headless=ctx.option('headless', ctx.config.get('indeed_headless', False)),
+        browser=ctx.browser,
+        since=ctx.option('since'),
+        monitor=monitor,
+        status=status
+    )
+    if monitor:
+        logging.info(monitor.summary())
+    tag_search(jobs, ctx.option('keywords', DEFAULT_KEYWORDS), ctx.option('location', DEFAULT_LOCATION))
+    output_file = ctx.option('output_file', OUTPUT_FILE)
+    ctx.sink.write(output_file, jobs, status=status)
+    logging.info(f"💾  Saved {len(jobs)} jobs to {ctx.sink.path(output_file)}")
+    return jobs
+
+def run(ctx):
+    """Pipeline entry point (see stage.StageContext)."""
+    return asyncio.run(run_async(ctx))
 
 if __name__ == "__main__":
     import argparse
-    import os
+    from stage import context_from_args
     parser = argparse.ArgumentParser()
-    parser.add_argument("--keywords", default="Junior Developer")
-    parser.add_argument("--location", default="London, Ontario")
-    parser.add_argument("--max", type=int, default=15)
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS)
+    parser.add_argument("--location", default=DEFAULT_LOCATION)
+    parser.add_argument("--max", type=int, default=DEFAULT_MAX_JOBS)
     parser.add_argument("--output-dir", default="data/jobs")
+    parser.add_argument("--output-file", default=OUTPUT_FILE)
+    parser.add_argument("--headless", action="store_true", help="Run a private browser headless (works best with a saved session)")
+    parser.add_argument("--since", type=float, help="Only postings newer than this (epoch seconds, the orchestrator's watermark)")
     parser.add_argument("--run-id", type=str, help="Unused but accepted for consistency")
+    parser.add_argument("--config", type=str, help="Unused but accepted for consistency")
     args = parser.parse_args()
 
-    # Ensure output dir exists
-    os.makedirs(args.output_dir, exist_ok=True)
-
-    jobs = scrape_indeed_jobs(args.keywords, args.location, max_jobs=args.max)
-    save_jobs(jobs, os.path.join(args.output_dir, "indeed_local_results.json"))
+    run(context_from_args(args, keywords=args.keywords, location=args.location, max=args.max, output_file=args.output_file,
+                           headless=args.headless or None, since=args.since))
@@ -2,11 +2,13 @@ import json
 import os
 import glob
 import argparse
+from tracing import span
+from stage import RUN_FILES
 
 DEFAULT_DATA_DIR = 'data/jobs'
 DEFAULT_OUTPUT_DIR = 'readable_summaries'
 
-def json_to_md(json_path, output_dir):
+def json_to_md(json_path, output_dir, data=None):
     filename = os.path.basename(json_path)
     md_filename = filename.replace('.json', '.md')
     md_path = os.path.join(output_dir, md_filename)
@@ -14,8 +16,9 @@ def json_to_md(json_path, output_dir):
     print(f"📄 Converting {filename} -> {md_filename}...")
     
     try:
-        with open(json_path, 'r') as f:
-            data = json.load(f)
+        if data is None:
+            with open(json_path, 'r') as f:
+                data = json.load(f)
             
         if not isinstance(data, list):
             print(f"   ⚠️ Skipping {filename}: Not a list of items.")
@@ -54,10 +57,22 @@ def json_to_md(json_path, output_dir):
     except Exception as e:
         print(f"   ❌ Error converting {filename}: {e}")
 
+def run(ctx):
+    """Pipeline entry point: converts every JSON output of the run, reusing in-memory records."""
+    os.makedirs(DEFAULT_OUTPUT_DIR, exist_ok=True)
+    for filename, data in ctx.sink.collect('*.json').items():
+        if filename in RUN_FILES:
+            continue
+        with span('markdown', cat='markdown', file=filename):
+            json_to_md(ctx.sink.path(filename), DEFAULT_OUTPUT_DIR, data=data)
+
+    print(f"\n✨ All conversions complete. Check '{DEFAULT_OUTPUT_DIR}'")
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--output-dir", default=DEFAULT_DATA_DIR, help="Directory containing JSON files")
     parser.add_argument("--run-id", type=str, help="Run ID")
+    parser.add_argument("--config", type=str, help="Unused but accepted for consistency")
     args = parser.parse_args()
 
     data_dir = args.output_dir
@@ -66,9 +81,10 @@ def main():
     if not os.path.exists(output_md_dir):
         os.makedirs(output_md_dir)
         
-    json_files = glob.glob(os.path.join(data_dir, '*.json'))
+    json_files = [f for f in glob.glob(os.path.join(data_dir, '*.json')) if os.path.basename(f) not in RUN_FILES]
     for f in json_files:
-        json_to_md(f, output_md_dir)
+        with span('markdown', cat='markdown', file=os.path.basename(f)):
+            json_to_md(f, output_md_dir)
     
     print(f"\n✨ All conversions complete. Check '{output_md_dir}'")
 
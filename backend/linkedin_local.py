@@ -1,134 +1,446 @@
-import time
-import random
-import json
+import os
+import asyncio
 import logging
-from playwright.sync_api import sync_playwright
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from browser_server import async_browser
+from tracing import span
+from deadline import Deadline
+from stage import tag_search
+import resilience
+import request_policy
+import sessions
+import pacing
+import watermarks
+import early_stop
+
+DEFAULT_KEYWORDS = "Junior Developer"
+DEFAULT_LOCATION = "London, Ontario, Canada"
+DEFAULT_MAX_JOBS = 15
+OUTPUT_FILE = "linkedin_local_results.json"
+
+# Guest jobs endpoint: the HTML fragments the public search page loads while
+# scrolling. Base URL is overridable so the pager can run against a stand-in server.
+GUEST_BASE_URL = "https://www.linkedin.com"
+GUEST_BASE_URL_ENV = "JOBHUNTR_LINKEDIN_BASE_URL"
+GUEST_SEARCH_PATH = "/jobs-guest/jobs/api/seeMoreJobPostings/search"
+GUEST_PAGE_SIZE = 10 # Cards per fragment; pages are requested by start offset
+GUEST_WORKERS = 4
+GUEST_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+BLOCKED_STATUSES = {403, 429, 999} # 999 is LinkedIn's "go away" status
+DEFAULT_BACKEND = "auto" # auto: guest pager, Playwright if blocked | guest | browser
+
+# Runs in the page: collects every card not returned by an earlier call
+# (marked with a data attribute) in one round trip
+EXTRACT_NEW_CARDS_JS = """
+() => {
+    const text = (card, selector) => {
+        const el = card.querySelector(selector);
+        return el ? el.innerText.trim() : null;
+    };
+    const fresh = [];
+    for (const card of document.querySelectorAll('.base-card, .job-search-card')) {
+        if (card.dataset.jobhuntrSeen) continue;
+        const link = card.querySelector('a.base-card__full-link');
+        const title = text(card, '.base-search-card__title');
+        // Not rendered yet: leave it unmarked so the next pass picks it up
+        if (!link || !link.getAttribute('href') || !title) continue;
+        card.dataset.jobhuntrSeen = '1';
+        const time = card.querySelector('time');
+        fresh.push({
+            title: title,
+            company: text(card, '.base-search-card__subtitle'),
+            location: text(card, '.job-search-card__location'),
+            href: link.getAttribute('href'),
+            date: time ? time.getAttribute('datetime') : null,
+        });
+    }
+    return fresh;
+}
+"""
+
+def card_to_job(card, location):
+    """Maps a raw card ({title, company, location, href, date}) to our job record."""
+    return {
+        "title": card['title'],
+        "company": card.get('company') or "Unknown",
+        "location": card.get('location') or location,
+        "url": card['href'].split('?')[0], # Clean URL
+        "date": card.get('date') or "Recently",
+        "source": "LinkedIn (Local)"
+    }
+
+def parse_guest_cards(html):
+    """Raw cards from one guest endpoint fragment (same selectors as the search page)."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, 'html.parser')
+
+    def text(card, selector):
+        el = card.select_one(selector)
+        return el.get_text(strip=True) if el else None
+
+    cards = []
+    for card in soup.select('.base-card, .job-search-card'):
+        link = card.select_one('a.base-card__full-link')
+        title = text(card, '.base-search-card__title')
+        if not link or not link.get('href') or not title:
+            continue
+        time_el = card.select_one('time')
+        cards.append({
+            'title': title,
+            'company': text(card, '.base-search-card__subtitle'),
+            'location': text(card, '.job-search-card__location'),
+            'href': link['href'],
+            'date': time_el.get('datetime') if time_el else None,
+        })
+    return cards
+
+def guest_session(workers=GUEST_WORKERS):
+    from http_client import make_session
+    # One keep-alive connection per worker instead of a handshake per page
+    return make_session(workers, GUEST_USER_AGENT, {'Accept-Language': 'en-CA,en;q=0.9'})
+
+def delta_params(since):
+    """
+    Newest-first order, plus a date-posted filter (f_TPR=r<seconds>) for a
+    delta hunt. Always newest first, so a first run cut short by max_jobs can
+    still set the watermark at the oldest posting it captured.
+    """
+    params = {'sortBy': 'DD'}
+    if since:
+        params['f_TPR'] = f"r{watermarks.age_seconds(since)}"
+    return params
+
+def fetch_guest_page(session, base_url, keywords, location, start, deadline, since=None):
+    """Raw cards at offset start. Raises resilience.Blocked when LinkedIn refuses us."""
+    query = urllib.parse.urlencode({'keywords': keywords, 'location': location, 'start': start, **delta_params(since)})
+    url = f"{base_url.rstrip('/')}{GUEST_SEARCH_PATH}?{query}"
+    pacer = pacing.pacer('linkedin_guest')
+    pacer.acquire()
+    with span('guest_page', cat='http', start=start):
+        response = session.get(url, timeout=deadline.timeout_s(15), allow_redirects=False)
+    pacer.observe(response.status_code)
+    if response.status_code in BLOCKED_STATUSES or response.is_redirect:
+        # Redirects go to the authwall / login page
+        raise resilience.Blocked(f"LinkedIn guest endpoint answered {response.status_code}")
+    if response.status_code == 400 or response.status_code == 404:
+        return [] # Past the last page
+    response.raise_for_status()
+    return parse_guest_cards(response.text)
+
+def scrape_linkedin_guest(keywords, location, max_jobs=15, deadline=None, base_url=None, workers=GUEST_WORKERS, since=None,
+                          monitor=None, jobs=None, status=None):
+    """
+    Lists public postings through the guest jobs endpoint, several pages at a
+    time over one pooled session, until max_jobs, an empty page or the deadline.
+    Postings come newest first; with since (epoch seconds of the last complete
+    run) only newer ones are asked for, and paging stops at the first older card.
+    monitor (an early_stop.YieldMonitor) scores the cards and can end it sooner.
+    Raises resilience.Blocked / CircuitOpen so the caller can fall back to the browser;
+    pass jobs (a list the pager appends to) to keep what it found before that.
+    status gets 'complete' (paging ran out on its own: an empty page or the
+    watermark, nothing dropped for max_jobs) and 'newest_first'.
+    """
+    deadline = deadline or Deadline()
+    base_url = base_url or os.environ.get(GUEST_BASE_URL_ENV) or GUEST_BASE_URL
+    status = {} if status is None else status
+    status.update(complete=False, newest_first=True)
+    logging.info(f"⚡ Paging LinkedIn guest search for '{keywords}' in '{location}' (Target: {max_jobs})...")
+
+    jobs = [] if jobs is None else jobs
+    seen_urls = {job['url'] for job in jobs}
+    ended = cut = False
+    session = guest_session(workers)
+    start = 0
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while len(jobs) < max_jobs:
+                if deadline.expired():
+                    logging.warning(f"⏰  Time budget used up. Keeping {len(jobs)} jobs.")
+                    break
+                # One wave: just enough pages to reach max_jobs, at most one per worker
+                wave = min(workers, -(-(max_jobs - len(jobs)) // GUEST_PAGE_SIZE))
+                starts = [start + i * GUEST_PAGE_SIZE for i in range(wave)]
+                start += wave * GUEST_PAGE_SIZE
+                futures = [
+                    pool.submit(resilience.call, 'linkedin_guest', fetch_guest_page, session, base_url, keywords, location, s, deadline,
+                                since, deadline=deadline, retry_on=(OSError, ValueError))
+                    for s in starts
+                ]
+                # Pages in order up to the first failed one, which is raised once those are kept
+                pages, error = [], None
+                for future in futures:
+                    try:
+                        pages.append(future.result())
+                    except Exception as e:
+                        error = e
+                        break
+                reached_watermark = False
+                for cards in pages:
+                    for card in cards:
+                        if watermarks.is_older(card.get('date'), since):
+                            reached_watermark = True
+                            continue
+                        job = card_to_job(card, location)
+                        if job['url'] in seen_urls:
+                            continue
+                        if len(jobs) >= max_jobs:
+                            cut = True
+                            continue
+                        seen_urls.add(job['url'])
+                        jobs.append(job)
+                        if monitor:
+                            monitor.add(job)
+                if error:
+                    raise error
+                if not all(pages):
+                    ended = True
+                    break # An empty page means we ran past the results
+                if reached_watermark:
+                    logging.info("🌊 Reached postings from before the last run. Stopping.")
+                    ended = True
+                    break
+                if monitor and monitor.should_stop():
+                    break
+    finally:
+        session.close()
+
+    status['complete'] = ended and not cut
+    logging.info(f"✅  Guest pager found {len(jobs)} jobs.")
+    return jobs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def scrape_linkedin_jobs(keywords, location, max_jobs=15):
+async def scrape_linkedin_jobs_async(keywords, location, max_jobs=15, deadline=None, browser=None, since=None, monitor=None,
+                                     seed=None, status=None):
     """
     Scrapes LinkedIn public job search using local Playwright.
+    Stops scrolling once the deadline expires and returns what it has, or
+    (with since) once the newest-first list reaches postings older than it,
+    or when monitor (an early_stop.YieldMonitor) says the yield dried up.
+    Pass browser to run in a caller's browser (e.g. the orchestrator's event
+    loop); it is left open, only our context is closed.
+    seed: jobs found already (by the guest pager before it was blocked); they
+    count towards max_jobs and aren't captured twice.
+    status gets 'complete' (the list ran out or reached the watermark before
+    max_jobs), 'newest_first', and 'degraded' when the breaker skipped us.
     """
+    deadline = deadline or Deadline()
+    status = {} if status is None else status
+    status.update(complete=False, newest_first=True)
+    jobs = list(seed or [])
+    seen_urls = {job['url'] for job in jobs}
+    if resilience.breaker('linkedin').is_open():
+        logging.warning("⏭️  LinkedIn has been failing lately (circuit open). Skipping.")
+        status['degraded'] = "circuit open"
+        return jobs
     logging.info(f"🕵️  Searching LinkedIn for '{keywords}' in '{location}' (Target: {max_jobs})...")
     
-    jobs = []
-    
-    with sync_playwright() as p:
-        # Launch browser - headless=True for speed, but sometimes False helps with detection
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    # Launch browser - headless=True for speed, but sometimes False helps with detection
+    # (connects to the orchestrator's shared browser when there is one)
+    async with async_browser(browser, headless=True) as browser:
+        context = await browser.new_context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            storage_state=sessions.load('linkedin')
         )
         
         # Block resources to speed up
-        await_resources = ['image', 'media', 'font']
-        def route_intercept(route):
-            if route.request.resource_type in await_resources:
-                route.abort()
-            else:
-                route.continue_()
-        
-        page = context.new_page()
-        page.route("**/*", route_intercept)
-        
-        # Construct URL
-        # e.g. https://www.linkedin.com/jobs/search?keywords=python&location=London%2C%20Ontario%2C%20Canada
-        url = f"https://www.linkedin.com/jobs/search?keywords={keywords}&location={location}&redirect=false&position=1&pageNum=0"
-        
-        logging.info(f"Navigating to {url}")
-        page.goto(url, timeout=60000)
-        
-        # Initial wait
-        time.sleep(random.uniform(2, 4))
+        route_stats = await request_policy.apply_async(context, 'linkedin')
         
-        previous_height = 0
-        consecutive_scrolls = 0
-        
-        while len(jobs) < max_jobs and consecutive_scrolls < 5:
-            # Parse visible jobs
-            # LinkedIn public job cards usually have class 'base-card' or 'job-search-card'
-            job_cards = page.locator(".base-card, .job-search-card").all()
+        pacer = pacing.pacer('linkedin')
+        pacer.watch(context)
+        try:
+            page = await context.new_page()
             
-            logging.info(f"Found {len(job_cards)} visible cards...")
+            # Construct URL
+            # e.g. https://www.linkedin.com/jobs/search?keywords=python&location=London%2C%20Ontario%2C%20Canada
+            url = f"https://www.linkedin.com/jobs/search?keywords={keywords}&location={location}&redirect=false&position=1&pageNum=0"
+            url += "&" + urllib.parse.urlencode(delta_params(since))
             
-            for card in job_cards:
-                if len(jobs) >= max_jobs:
+            logging.info(f"Navigating to {url}")
+            await pacer.acquire_async()
+            with span('navigate', cat='browser', url=url):
+                await resilience.call_async('linkedin', page.goto, url, deadline=deadline, timeout=deadline.timeout_ms(60000))
+            
+            # Wait for the first cards rather than a fixed pause
+            with span('wait_cards', cat='wait'):
+                await pacing.wait_for_selector_async(page, ".base-card, .job-search-card", deadline.timeout_ms(10000))
+            
+            previous_height = await page.evaluate("document.body.scrollHeight")
+            consecutive_scrolls = 0
+            reached_watermark = False
+            cut = False
+            
+            while len(jobs) < max_jobs and consecutive_scrolls < 5 and not reached_watermark:
+                if deadline.expired():
+                    logging.warning(f"⏰  Time budget used up. Keeping {len(jobs)} jobs.")
                     break
+
+                # Parse the cards that appeared since the last scroll
+                # LinkedIn public job cards usually have class 'base-card' or 'job-search-card'
+                with span('parse_cards', cat='parse'):
+                    try:
+                        new_cards = await page.evaluate(EXTRACT_NEW_CARDS_JS)
+                    except Exception as e:
+                        # Page navigated mid-evaluation; try again after the scroll
+                        logging.warning(f"Card extraction failed: {e}")
+                        new_cards = []
+                
+                    logging.info(f"Found {len(new_cards)} new cards...")
+                
+                    for card in new_cards:
+                        if len(jobs) >= max_jobs:
+                            cut = True
+                            break
+                        if watermarks.is_older(card.get('date'), since):
+                            reached_watermark = True
+                            continue
+
+                        job = card_to_job(card, location)
                     
+                        # Dedup check
+                        if job['url'] not in seen_urls:
+                            seen_urls.add(job['url'])
+                            jobs.append(job)
+                            logging.info(f"   + Captured: {job['title']} at {job['company']}")
+                            if monitor:
+                                monitor.add(job)
+                
+                if len(jobs) >= max_jobs:
+                    break
+                if monitor and monitor.should_stop():
+                    break
+                if reached_watermark:
+                    logging.info("🌊 Reached postings from before the last run. Stopping.")
+                    break
+
+                # Scroll down, then wait until more cards actually loaded
+                await pacer.acquire_async()
+                await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+                with span('wait_scroll', cat='wait'):
+                    current_height = await pacing.wait_for_height_change_async(page, previous_height, deadline.timeout_ms(4000))
+                
+                # Check for "See more jobs" button
                 try:
-                    title_el = card.locator(".base-search-card__title")
-                    company_el = card.locator(".base-search-card__subtitle")
-                    location_el = card.locator(".job-search-card__location")
-                    link_el = card.locator("a.base-card__full-link")
-                    date_el = card.locator("time")
-
-                    if not title_el.count() or not link_el.count():
-                        continue
-
-                    job = {
-                        "title": title_el.inner_text().strip(),
-                        "company": company_el.inner_text().strip() if company_el.count() else "Unknown",
-                        "location": location_el.inner_text().strip() if location_el.count() else location,
-                        "url": link_el.get_attribute("href").split('?')[0], # Clean URL
-                        "date": date_el.get_attribute("datetime") if date_el.count() else "Recently",
-                        "source": "LinkedIn (Local)"
-                    }
-                    
-                    # Dedup check
-                    if not any(j['url'] == job['url'] for j in jobs):
-                        jobs.append(job)
-                        logging.info(f"   + Captured: {job['title']} at {job['company']}")
-                        
-                except Exception as e:
-                    # Ignore partial render errors
-                    continue
-            
-            # Scroll down
-            page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            time.sleep(random.uniform(1.5, 3))
-            
-            # Check for "See more jobs" button
-            try:
-                see_more = page.locator("button.infinite-scroller__show-more-button")
-                if see_more.is_visible():
-                    see_more.click()
-                    time.sleep(random.uniform(2, 4))
-            except:
-                pass
-
-            # Check if we are stuck
-            current_height = page.evaluate("document.body.scrollHeight")
-            if current_height == previous_height:
-                consecutive_scrolls += 1
-            else:
-                consecutive_scrolls = 0
-            previous_height = current_height
-
-        browser.close()
+                    see_more = page.locator("button.infinite-scroller__show-more-button")
+                    if await see_more.is_visible():
+                        await pacer.acquire_async()
+                        await see_more.click()
+                        with span('wait_scroll', cat='wait'):
+                            current_height = await pacing.wait_for_height_change_async(page, current_height, deadline.timeout_ms(4000))
+                except:
+                    pass
+
+                # Check if we are stuck
+                if current_height == previous_height:
+                    consecutive_scrolls += 1
+                else:
+                    consecutive_scrolls = 0
+                previous_height = current_height
+
+            # Ran out of cards (or into the watermark) rather than being stopped
+            status['complete'] = (reached_watermark or consecutive_scrolls >= 5) and not cut and not deadline.expired()
+            if jobs:
+                await sessions.save_async(context, 'linkedin')
+        finally:
+            await context.close()
         
+    logging.info(route_stats.summary())
     logging.info(f"✅  Scrape complete. Found {len(jobs)} jobs.")
     return jobs
 
-def save_jobs(jobs, filename):
-    with open(filename, 'w') as f:
-        json.dump(jobs, f, indent=2)
-    logging.info(f"💾  Saved {len(jobs)} jobs to {filename}")
+def scrape_linkedin_jobs(keywords, location, max_jobs=15, deadline=None, since=None, monitor=None, status=None):
+    """Sync entry point for scrape_linkedin_jobs_async()."""
+    return asyncio.run(scrape_linkedin_jobs_async(keywords, location, max_jobs, deadline, since=since, monitor=monitor, status=status))
+
+async def scrape_linkedin_async(keywords, location, max_jobs=15, deadline=None, backend=DEFAULT_BACKEND, base_url=None, browser=None,
+                                since=None, monitor=None, status=None):
+    """
+    Guest pager first (unless backend='browser'), the Playwright scroller when it's blocked.
+    The pager is blocking HTTP, so it runs on a worker thread and leaves the loop free.
+    The scroller starts from whatever the pager found before it failed.
+    status ends up describing whichever of the two produced the result.
+    """
+    deadline = deadline or Deadline()
+    status = {} if status is None else status
+    found = []
+    if backend in ('auto', 'guest'):
+        try:
+            return await asyncio.to_thread(scrape_linkedin_guest, keywords, location, max_jobs, deadline, base_url,
+                                           since=since, monitor=monitor, jobs=found, status=status)
+        except (resilience.Blocked, resilience.CircuitOpen, ImportError) as e:
+            if backend == 'guest':
+                raise
+            logging.warning(f"⚠️  Guest pager unavailable ({e}). Falling back to the browser.")
+        except Exception as e:
+            if backend == 'guest':
+                raise
+            logging.warning(f"⚠️  Guest pager failed ({e.__class__.__name__}: {e}). Falling back to the browser.")
+        if found:
+            logging.info(f"↪️  Keeping {len(found)} jobs from the guest pager.")
+        if monitor:
+            # The scroller lists in its own order: judge its cards on their own
+            monitor.reset()
+    try:
+        return await scrape_linkedin_jobs_async(keywords, location, max_jobs, deadline, browser, since, monitor, seed=found,
+                                                status=status)
+    except Exception as e:
+        if not found:
+            raise
+        logging.warning(f"⚠️  Browser fallback failed too ({e}). Keeping the guest pager's {len(found)} jobs.")
+        status.update(complete=False, degraded=f"browser fallback failed: {e}")
+        return found
+
+def scrape_linkedin(keywords, location, max_jobs=15, deadline=None, backend=DEFAULT_BACKEND, base_url=None, since=None, monitor=None,
+                    status=None):
+    """Sync entry point for scrape_linkedin_async()."""
+    return asyncio.run(scrape_linkedin_async(keywords, location, max_jobs, deadline, backend, base_url, since=since, monitor=monitor,
+                                             status=status))
+
+async def run_async(ctx):
+    """Pipeline entry point on the orchestrator's event loop (uses ctx.browser when set)."""
+    monitor = early_stop.from_config(ctx.config)
+    status = {}
+    jobs = await scrape_linkedin_async(
+        ctx.option('keywords', DEFAULT_KEYWORDS),
+        ctx.option('location', DEFAULT_LOCATION),
+        max_jobs=ctx.option('max', DEFAULT_MAX_JOBS),
+        deadline=ctx.deadline,
+        backend=ctx.option('backend', ctx.config.get('linkedin_backend', DEFAULT_BACKEND)),
+        base_url=ctx.option('base_url'),
+        browser=ctx.browser,
+        since=ctx.option('since'),
+        monitor=monitor,
+        status=status
+    )
+    if monitor:
+        logging.info(monitor.summary())
+    tag_search(jobs, ctx.option('keywords', DEFAULT_KEYWORDS), ctx.option('location', DEFAULT_LOCATION))
+    output_file = ctx.option('output_file', OUTPUT_FILE)
+    ctx.sink.write(output_file, jobs, status=status)
+    logging.info(f"💾  Saved {len(jobs)} jobs to {ctx.sink.path(output_file)}")
+    return jobs
+
+def run(ctx):
+    """Pipeline entry point (see stage.StageContext)."""
+    return asyncio.run(run_async(ctx))
 
 if __name__ == "__main__":
     import argparse
-    import os
+    from stage import context_from_args
     parser = argparse.ArgumentParser()
-    parser.add_argument("--keywords", default="Junior Developer")
-    parser.add_argument("--location", default="London, Ontario, Canada")
-    parser.add_argument("--max", type=int, default=15)
+    parser.add_argument("--keywords", default=DEFAULT_KEYWORDS)
+    parser.add_argument("--location", default=DEFAULT_LOCATION)
+    parser.add_argument("--max", type=int, default=DEFAULT_MAX_JOBS)
     parser.add_argument("--output-dir", default="data/jobs")
+    parser.add_argument("--output-file", default=OUTPUT_FILE)
+    parser.add_argument("--backend", choices=['auto', 'guest', 'browser'], help=f"Default: config linkedin_backend or {DEFAULT_BACKEND}")
+    parser.add_argument("--base-url", help=f"Guest endpoint host (default ${GUEST_BASE_URL_ENV} or {GUEST_BASE_URL})")
+    parser.add_argument("--since", type=float, help="Only postings newer than this (epoch seconds, the orchestrator's watermark)")
     parser.add_argument("--run-id", type=str, help="Unused but accepted for consistency")
+    parser.add_argument("--config", type=str, help="Unused but accepted for consistency")
     args = parser.parse_args()
 
-    # Ensure output dir exists
-    os.makedirs(args.output_dir, exist_ok=True)
-
-    jobs = scrape_linkedin_jobs(args.keywords, args.location, max_jobs=args.max)
-    save_jobs(jobs, os.path.join(args.output_dir, "linkedin_local_results.json"))
+    run(context_from_args(args, keywords=args.keywords, location=args.location, max=args.max, output_file=args.output_file,
+                           backend=args.backend, base_url=args.base_url, since=args.since))
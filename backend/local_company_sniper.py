@@ -3,10 +3,17 @@ import re
 import json
 import os
 import argparse
-from playwright.async_api import async_playwright
+from browser_server import async_browser
+from tracing import span
+from deadline import Deadline
+import sharding
+import request_policy
 
 DEFAULT_CACHE_FILE = 'data/companies/known_career_pages.json'
 DEFAULT_OUTPUT_FILE = 'data/jobs/local_direct_sweep.json'
+CACHE_FILENAME = 'known_career_pages.json'
+OUTPUT_FILENAME = 'local_direct_sweep.json'
+DEFAULT_INPUTS = ['data/companies/London_Tech_Landscape.md']
 MAX_CONCURRENCY = 5
 
 # Default keywords if none provided
@@ -46,7 +53,8 @@ async def load_json_companies(filepath):
             })
     return companies
 
-async def check_site(context, company, keywords, cache):
+async def check_site(context, company, keywords, cache, deadline=None):
+    deadline = deadline or Deadline()
     page = await context.new_page()
     jobs = []
     
@@ -59,7 +67,8 @@ async def check_site(context, company, keywords, cache):
         else:
             print(f"🔎 Scanning {company['name']} ({company['url']})...")
             try:
-                await page.goto(company['url'], timeout=15000)
+                with span('navigate', cat='browser', url=company['url']):
+                    await page.goto(company['url'], timeout=deadline.timeout_ms(15000))
             except:
                 print(f"   x Failed to load {company['name']}")
                 await page.close()
@@ -92,7 +101,8 @@ async def check_site(context, company, keywords, cache):
         # 2. Visit Career Page & Extract
         if page.url != target_url:
             try:
-                await page.goto(target_url, timeout=15000)
+                with span('navigate', cat='browser', url=target_url):
+                    await page.goto(target_url, timeout=deadline.timeout_ms(15000))
             except:
                 print(f"   x Failed to load career page: {target_url}")
                 await page.close()
@@ -103,34 +113,35 @@ async def check_site(context, company, keywords, cache):
         count = await potential_elements.count()
         seen_titles = set()
         
-        for i in range(min(count, 100)): # Scan first 100 elements max
-            if len(jobs) >= 5: 
-                break
+        with span('parse_cards', cat='parse', company=company['name']):
+            for i in range(min(count, 100)): # Scan first 100 elements max
+                if len(jobs) >= 5: 
+                    break
             
-            try:
-                el = potential_elements.nth(i)
-                if not await el.is_visible(): continue
+                try:
+                    el = potential_elements.nth(i)
+                    if not await el.is_visible(): continue
                 
-                text = await el.inner_text()
-                text = text.strip()
+                    text = await el.inner_text()
+                    text = text.strip()
                 
-                if any(kw.lower() in text.lower() for kw in keywords) and 4 < len(text) < 100:
-                    if text.lower() in ["careers", "jobs", "home", "contact", "about us", "join us", "read more"]:
-                        continue
+                    if any(kw.lower() in text.lower() for kw in keywords) and 4 < len(text) < 100:
+                        if text.lower() in ["careers", "jobs", "home", "contact", "about us", "join us", "read more"]:
+                            continue
                         
-                    if text not in seen_titles:
-                        job_url = await el.evaluate("el => el.closest('a')?.href") or target_url
-                        jobs.append({
-                            "title": text,
-                            "company": company['name'],
-                            "url": job_url,
-                            "location": "London, ON (Presumed)",
-                            "source": "Direct Site"
-                        })
-                        seen_titles.add(text)
-                        print(f"      + Found: {text}")
-            except:
-                continue
+                        if text not in seen_titles:
+                            job_url = await el.evaluate("el => el.closest('a')?.href") or target_url
+                            jobs.append({
+                                "title": text,
+                                "company": company['name'],
+                                "url": job_url,
+                                "location": "London, ON (Presumed)",
+                                "source": "Direct Site"
+                            })
+                            seen_titles.add(text)
+                            print(f"      + Found: {text}")
+                except:
+                    continue
 
     except Exception as e:
         print(f"   x Error processing {company['name']}: {e}")
@@ -139,68 +150,64 @@ async def check_site(context, company, keywords, cache):
     
     return jobs
 
-async def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--inputs", nargs="+", help="List of input files (JSON or MD)")
-    parser.add_argument("--keywords", nargs="+", help="Keywords to search for")
-    parser.add_argument("--output-dir", default="data", help="Output directory")
-    parser.add_argument("--run-id", type=str, help="Run ID")
-    parser.add_argument("--config", type=str, help="Path to config JSON file")
-    args = parser.parse_args()
-
-    # Determine paths
-    output_dir = args.output_dir
-    cache_file = os.path.join(output_dir, 'known_career_pages.json')
-    output_file = os.path.join(output_dir, 'local_direct_sweep.json')
-    
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Load resources
-    cache = load_cache(cache_file)
-    
+def resolve_keywords(keywords, config):
     # Get keywords from args or config or default
-    keywords = args.keywords
-    if not keywords and args.config and os.path.exists(args.config):
-        try:
-            with open(args.config, 'r') as f:
-                config = json.load(f)
-                keywords = list(config.get('positive_keywords', {}).keys())
-        except:
-            pass
-    
-    if not keywords:
-        keywords = DEFAULT_KEYWORDS
-    
+    if not keywords and config:
+        keywords = list(config.get('positive_keywords', {}).keys())
+    return keywords or DEFAULT_KEYWORDS
+
+async def load_companies(inputs):
     companies = []
-    # Default inputs if none provided
-    inputs = args.inputs if args.inputs else ['data/companies/London_Tech_Landscape.md']
-    
     for filepath in inputs:
         if filepath.endswith('.md'):
             companies.extend(await extract_urls_from_md(filepath))
         elif filepath.endswith('.json'):
             companies.extend(await load_json_companies(filepath))
-            
+
     # Dedup companies by URL
-    unique_companies = {c['url']: c for c in companies}.values()
-    print(f"🎯 Loaded {len(unique_companies)} unique companies from {inputs}")
+    return list({c['url']: c for c in companies}.values())
+
+async def sweep(inputs, keywords, output_dir, deadline=None, shard=None, browser=None):
+    """Checks every company's site for keyword matches; browser is borrowed when given (left open)."""
+    deadline = deadline or Deadline()
+    cache_file = os.path.join(output_dir, CACHE_FILENAME)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Load resources
+    cache = load_cache(cache_file)
+    if shard:
+        # Shared lists are split by URL hash; companies this shard discovered itself
+        # (inputs inside its own output dir) aren't known to any other shard
+        shared = [f for f in inputs if not os.path.abspath(f).startswith(os.path.abspath(output_dir) + os.sep)]
+        own = [f for f in inputs if f not in shared]
+        companies_list = sharding.partition(await load_companies(shared), shard, key=lambda c: c['url'])
+        owned_urls = {c['url'] for c in companies_list}
+        companies_list += [c for c in await load_companies(own) if c['url'] not in owned_urls]
+        print(f"🧩 Shard {shard}: {len(companies_list)} companies")
+    else:
+        companies_list = await load_companies(inputs)
+    print(f"🎯 Loaded {len(companies_list)} unique companies from {inputs}")
     print(f"🔑 Filtering for keywords: {keywords}")
     
     all_jobs = []
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
+    async with async_browser(browser, headless=True) as browser:
         context = await browser.new_context(
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         )
+        # Company sites: no images, fonts, media, trackers or chat widgets. Their own and
+        # third-party scripts still load (site builders and ATS widgets render the jobs)
+        route_stats = await request_policy.apply_async(context, 'sniper')
         
         # Process in chunks
         chunk_size = MAX_CONCURRENCY
-        companies_list = list(unique_companies)
         
         for i in range(0, len(companies_list), chunk_size):
+            if deadline.expired():
+                print(f"⏰ Time budget used up after {i}/{len(companies_list)} companies. Keeping {len(all_jobs)} jobs.")
+                break
             chunk = companies_list[i:i + chunk_size]
-            tasks = [check_site(context, company, keywords, cache) for company in chunk]
+            tasks = [check_site(context, company, keywords, cache, deadline) for company in chunk]
             results = await asyncio.gather(*tasks)
             
             for res in results:
@@ -209,14 +216,39 @@ async def main():
             # Periodic cache save
             save_cache(cache, cache_file)
                 
-        await browser.close()
+        await context.close()
         
+    print(route_stats.summary())
     save_cache(cache, cache_file) # Final save
-    
+    return all_jobs
+
+async def run_async(ctx):
+    """Pipeline entry point on the orchestrator's event loop (uses ctx.browser when set)."""
+    keywords = resolve_keywords(ctx.option('keywords'), ctx.config)
+    inputs = ctx.option('inputs', DEFAULT_INPUTS)
+    all_jobs = await sweep(inputs, keywords, ctx.output_dir, ctx.deadline, ctx.option('shard'), ctx.browser)
+
     # Save results
-    with open(output_file, 'w') as f:
-        json.dump(all_jobs, f, indent=2)
+    output_file = ctx.sink.write(OUTPUT_FILENAME, all_jobs)
     print(f"✅ Sweep complete. Found {len(all_jobs)} jobs. Saved to {output_file}")
+    return all_jobs
+
+def run(ctx):
+    """Pipeline entry point (see stage.StageContext)."""
+    return asyncio.run(run_async(ctx))
+
+def main():
+    from stage import context_from_args
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--inputs", nargs="+", help="List of input files (JSON or MD)")
+    parser.add_argument("--keywords", nargs="+", help="Keywords to search for")
+    parser.add_argument("--output-dir", default="data", help="Output directory")
+    parser.add_argument("--run-id", type=str, help="Run ID")
+    parser.add_argument("--config", type=str, help="Path to config JSON file")
+    parser.add_argument("--shard", type=str, help="Only sweep shard I/N of the companies (by URL hash)")
+    args = parser.parse_args()
+
+    run(context_from_args(args, inputs=args.inputs, keywords=args.keywords, shard=args.shard))
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
@@ -1,66 +1,43 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import os
+from deadline import Deadline
+import board_engine
+from http_client import make_session, cache_summaries
 
-def scrape_london_tech_jobs():
+BOARD = 'londontechjobs'
+OUTPUT_FILE = "london_tech_results.json"
+
+def scrape_london_tech_jobs(deadline=None, spec=None):
     print("🕵️  Scanning LondonTechJobs.ca...")
-    url = "https://londontechjobs.ca/joblist.aspx"
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-    }
-    
+    # Selectors, keyword filter and paging live in board_engine.BOARDS
+    spec = spec or board_engine.BOARDS[BOARD]
     try:
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        with make_session(board_engine.BOARD_WORKERS) as session:
+            board_engine.mount_caches(session, {BOARD: spec})
+            jobs = board_engine.scrape_board(session, BOARD, spec, deadline or Deadline())
+            for line in cache_summaries(session):
+                print(line)
+            return jobs
     except Exception as e:
         print(f"❌ Failed to fetch LondonTechJobs: {e}")
         return []
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
-    # Based on the HTML structure analyzed
-    cards = soup.find_all('div', class_='gm-card')
-    print(f"   > Found {len(cards)} raw cards on the first page.")
-    
-    jobs = []
-    for card in cards:
-        try:
-            title_elem = card.find('h4', class_='gm-card-title')
-            company_elem = card.find('h3', class_='gm-card-subtitle')
-            link_elem = card.find('a', class_='gm-card-link')
-            date_elem = card.find('div', class_='gm-card-timestamp')
-            
-            if title_elem and company_elem:
-                title = title_elem.get_text(strip=True).replace("NEW", "").strip()
-                company = company_elem.get_text(strip=True)
-                link = "https://londontechjobs.ca/" + link_elem['href'] if link_elem else ""
-                date_str = date_elem.get_text(strip=True) if date_elem else "Recent"
-                
-                # Check for keywords relevant to Noah
-                keywords = ["developer", "engineer", "programmer", "analyst", "ai", "software", "data", "web", "android"]
-                if any(kw in title.lower() for kw in keywords):
-                    jobs.append({
-                        "title": title,
-                        "company": company,
-                        "url": link,
-                        "posted": date_str,
-                        "source": "LondonTechJobs.ca"
-                    })
-        except Exception as e:
-            continue
-            
+def run(ctx):
+    """Pipeline entry point (see stage.StageContext)."""
+    spec = board_engine.boards_from_config(ctx.config).get(BOARD)
+    jobs = scrape_london_tech_jobs(ctx.deadline, spec) if spec else []
+    ctx.sink.write(OUTPUT_FILE, jobs)
+    print(f"✅ Saved {len(jobs)} relevant tech jobs from LondonTechJobs.ca to {ctx.sink.path(OUTPUT_FILE)}")
     return jobs
 
 def main():
-    jobs = scrape_london_tech_jobs()
-    output_path = 'tools/scrapers/london_tech_results.json'
-    
-    with open(output_path, 'w') as f:
-        json.dump(jobs, f, indent=2)
-    
-    print(f"✅ Saved {len(jobs)} relevant tech jobs from LondonTechJobs.ca to {output_path}")
+    import argparse
+    from stage import context_from_args
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output-dir", default="data/jobs")
+    parser.add_argument("--run-id", type=str, help="Unused but accepted for consistency")
+    parser.add_argument("--config", type=str, help="Config JSON (its \"boards\" entry can override the board)")
+    args = parser.parse_args()
+
+    run(context_from_args(args))
 
 if __name__ == "__main__":
     main()
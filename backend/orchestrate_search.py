@@ -4,29 +4,220 @@ import time
 import os
 import argparse
 import json
+import importlib
+import traceback
+import contextlib
+import glob
+import shutil
+import re
+import itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait, TimeoutError as FutureTimeout
 
 SCRIPTS_DIR = 'backend' # Now that scripts are in backend/
 PYTHON_EXEC = sys.executable
+DEFAULT_WORKERS = 4
+DEFAULT_MODE = 'inprocess'
 
-def run_script(script_name, keywords=None, run_id=None, config_path=None):
+# --deadline budgeting: ranking/markdown keep this share of the budget (at
+# least MIN_RANK_RESERVE seconds), scrapers share the rest. A scraper that is
+# still running HARD_STOP_GRACE seconds after its soft deadline is stopped:
+# its subprocess killed, or its coroutine cancelled on the browser loop.
+RANK_RESERVE_SHARE = 0.15
+MIN_RANK_RESERVE = 15
+HARD_STOP_GRACE = 20
+
+# Stage plugins are imported from next to this file in in-process mode
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from stage import StageContext, OutputSink, read_status, clear_status, RUN_FILES
+from deadline import Deadline, DEADLINE_ENV
+from browser_server import browser_server, shared_endpoint, BrowserLoop
+import stage_cache
+import tracing
+import resilience
+import sharding
+import watermarks
+
+SCRAPERS = [
+    'linkedin_local.py',
+    'indeed_local.py',
+    'gmaps_scrape.py',
+    'local_company_sniper.py',
+    'hn_scrape.py',
+    'niche_scrape.py',
+]
+
+# Stage -> stages it has to wait for. Only dependencies that are scheduled
+# in the current run are honoured, everything else starts immediately.
+DEPENDENCIES = {
+    'local_company_sniper.py': ['gmaps_scrape.py'],
+    'rank_jobs.py': SCRAPERS,
+    'json_to_md.py': ['rank_jobs.py'],
+}
+
+def as_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [v for v in value if v]
+
+def slugify(text):
+    return re.sub(r'[^a-z0-9]+', '-', (text or 'any').lower()).strip('-') or 'any'
+
+def expand_searches(queries, locations):
+    """Cartesian product of the configured queries and locations, one entry per distinct pair."""
+    searches = []
+    for query, location in itertools.product(queries or [None], locations or [None]):
+        search = {'query': query, 'location': location, 'slug': f"{slugify(query)}--{slugify(location)}"}
+        if search not in searches:
+            searches.append(search)
+    return searches
+
+def stage_task(script_name, search, hunt_searches):
+    # Per-search stages get the search slug appended once a hunt has more than one search
+    if search is None or len(hunt_searches) < 2:
+        return script_name
+    return f"{script_name}[{search['slug']}]"
+
+def base_stage(task):
+    return task.split('[', 1)[0]
+
+def search_options(search, hunt):
+    return {'keywords': search['query'], 'location': search['location']}
+
+def gmaps_options(search, hunt):
+    # Map query to Maps search
+    return {'query': search['query'], 'location': search['location']}
+
+def shard_options(search, hunt):
+    # Stages that split their own work list (HN posts) by hash
+    return {'shard': hunt.get('shard')}
+
+def sniper_options(search, hunt):
+    inputs = ["data/companies/London_Tech_Landscape.md", "data/companies/gmaps_discovered.json"]
+    # Companies discovered by every gmaps_scrape.py search earlier in this run
+    for task, task_search in hunt['task_searches'].items():
+        if base_stage(task) == 'gmaps_scrape.py':
+            inputs.extend(stage_outputs(task, hunt))
+    # One sweep covers all searches: match the words of every query
+    keywords = []
+    for s in hunt['searches']:
+        for word in (s['query'] or '').split():
+            if word not in keywords:
+                keywords.append(word)
+    return {'keywords': keywords or None, 'inputs': inputs, 'shard': hunt.get('shard')}
+
+# Stages that drive Playwright and can share one browser
+BROWSER_STAGES = {'linkedin_local.py', 'indeed_local.py', 'local_company_sniper.py'}
+
+def rank_inputs(run_dir):
+    return glob.glob(os.path.join(run_dir, '*_results.json')) + ['data/applied_history.json']
+
+def md_inputs(run_dir):
+    return [p for p in glob.glob(os.path.join(run_dir, '*.json')) if os.path.basename(p) not in RUN_FILES]
+
+# Stage -> plugin module (exposing run(ctx)) and the options it gets.
+# In-process mode hands the options over as ctx.options, subprocess mode
+# turns them into CLI flags of the same name.
+#
+# 'outputs' are the files a stage produces ({run_dir}/{run_id} templates);
+# stages declaring them are cached by stage_cache. 'config_keys' are the
+# only config entries that go into the stage fingerprint, so changing the
+# ranking weights doesn't invalidate the scrapes. 'inputs' overrides the
+# files hashed as the stage's input (default: upstream outputs).
+# 'budget_share' is the fraction of the --deadline scrape window a scraper
+# may use, measured from the pipeline start (default: all of it).
+# 'per_search' stages run once per (query, location) of the hunt; their
+# output names carry a {suffix} that tells the searches apart.
+# 'watermark' stages get the time of their last complete run of the search as
+# the 'since' option (unless --full) and only list what was posted after it.
+STAGES = {
+    'linkedin_local.py': {
+        'module': 'linkedin_local', 'options': search_options, 'per_search': True, 'watermark': 'linkedin',
+        'outputs': ['{run_dir}/linkedin_local{suffix}_results.json'],
+        # Scored inline for early stopping
+        'config_keys': ['positive_keywords', 'negative_keywords', 'early_stop'],
+    },
+    'indeed_local.py': {
+        'module': 'indeed_local', 'options': search_options, 'per_search': True, 'watermark': 'indeed',
+        'outputs': ['{run_dir}/indeed_local{suffix}_results.json'],
+        'config_keys': ['positive_keywords', 'negative_keywords', 'early_stop'],
+    },
+    'gmaps_scrape.py': {
+        'module': 'gmaps_scrape', 'options': gmaps_options, 'per_search': True,
+        'outputs': ['{run_dir}/gmaps_discovered{suffix}.json'],
+        # Leaves the rest of the scrape window to the sniper that waits on it
+        'budget_share': 0.4,
+    },
+    'local_company_sniper.py': {
+        'module': 'local_company_sniper', 'options': sniper_options,
+        'outputs': ['{run_dir}/local_direct_sweep.json', '{run_dir}/known_career_pages.json'],
+        'config_keys': ['positive_keywords'],
+    },
+    'hn_scrape.py': {
+        'module': 'hn_scrape', 'options': shard_options,
+        'outputs': ['{run_dir}/hn_results.json'],
+    },
+    'niche_scrape.py': {
+        'module': 'niche_scrape',
+        'outputs': ['{run_dir}/niche_boards_results.json'],
+        'config_keys': ['boards'],
+    },
+    'rank_jobs.py': {
+        'module': 'rank_jobs',
+        'outputs': ['{run_dir}/master_listings.json', 'readable_summaries/Report_{run_id}.md'],
+        'config_keys': ['positive_keywords', 'negative_keywords'],
+        'inputs': rank_inputs,
+    },
+    'json_to_md.py': {
+        'module': 'json_to_md',
+        'inputs': md_inputs,
+    },
+}
+
+def options_to_args(options):
+    args = []
+    for name, value in options.items():
+        if value is None or value is False:
+            continue
+        flag = "--" + name.replace('_', '-')
+        if value is True:
+            args.append(flag)
+        elif isinstance(value, (list, tuple)):
+            args.append(flag)
+            args.extend(str(v) for v in value)
+        else:
+            args.extend([flag, str(value)])
+    return args
+
+def resolve_script(script_name):
     script_path = os.path.join(script_name) # Assuming we are in backend/ or scripts are in current dir
     if not os.path.exists(script_path):
         # Try looking in SCRIPTS_DIR if not found in current dir
         script_path = os.path.join(SCRIPTS_DIR, script_name)
         if not os.path.exists(script_path):
-             script_path = script_name # Fallback
+             script_path = os.path.join(BACKEND_DIR, script_name) # Fallback
+    return script_path
 
-    print(f"\n{'='*60}")
-    print(f"🚀 Launching {script_name}...")
-    print(f"{'='*60}")
-    
-    start_time = time.time()
+def trace_parts_dir(run_id):
+    return os.path.join("data", run_id, "trace_parts")
+
+def run_script(script_name, options=None, run_id=None, config_path=None, deadline=None, hard_stop=None):
+    """Runs a stage in its own interpreter (isolated, but pays the startup and import cost)."""
     try:
         # Pass environment variables
         env = os.environ.copy()
         env['PYTHONPATH'] = os.getcwd() 
+        if run_id:
+            # The child drops its spans here for the final trace.json
+            env[tracing.TRACE_DIR_ENV] = trace_parts_dir(run_id)
+        if deadline and deadline.at:
+            env[DEADLINE_ENV] = str(deadline.at)
         
-        cmd = [PYTHON_EXEC, script_path]
+        cmd = [PYTHON_EXEC, resolve_script(base_stage(script_name))]
         
         # Pass Run ID if provided
         if run_id:
@@ -37,44 +228,429 @@ def run_script(script_name, keywords=None, run_id=None, config_path=None):
         if config_path:
             cmd.extend(["--config", config_path])
         
-        # Argument Injection Logic for legacy scripts
-        if keywords:
-            if script_name in ['linkedin_local.py', 'indeed_local.py', 'backend/linkedin_local.py', 'backend/indeed_local.py']:
-                cmd.extend(["--keywords", keywords])
-                
-            elif script_name in ['gmaps_scrape.py', 'backend/gmaps_scrape.py']:
-                # Map query to Maps search
-                cmd.extend(["--query", keywords])
-                
-            elif script_name in ['local_company_sniper.py', 'backend/local_company_sniper.py']:
-                kw_list = keywords.split()
-                if kw_list:
-                    cmd.append("--keywords")
-                    cmd.extend(kw_list)
-                
-                cmd.extend(["--inputs", "data/companies/London_Tech_Landscape.md", "data/companies/gmaps_discovered.json"])
+        cmd.extend(options_to_args(options or {}))
 
         print(f"Running command: {' '.join(cmd)}")
         result = subprocess.run(
             cmd, 
             env=env,
             capture_output=False, 
-            text=True
+            text=True,
+            timeout=max(1, hard_stop - time.time()) if hard_stop else None
         )
         
-        duration = time.time() - start_time
-        if result.returncode == 0:
-            print(f"✅ {script_name} completed in {duration:.2f}s")
-            return True
-        else:
+        if result.returncode != 0:
             print(f"❌ {script_name} failed with code {result.returncode}")
-            return False
+        return result.returncode == 0
             
+    except subprocess.TimeoutExpired:
+        print(f"⏰ {script_name} overran its time budget and was stopped.")
+        return False
     except Exception as e:
         print(f"💥 Critical error running {script_name}: {e}")
         return False
 
-def main():
+def runs_on_loop(script_name, browser_loop):
+    """True if the stage goes on browser_loop as a coroutine (which, unlike a thread, can be cancelled)."""
+    if not browser_loop or base_stage(script_name) not in STAGES:
+        return False
+    return hasattr(importlib.import_module(STAGES[base_stage(script_name)]['module']), 'run_async')
+
+def run_in_process(script_name, ctx, browser_loop=None, hard_stop=None):
+    """
+    Runs a stage's run(ctx) inside the orchestrator process. Stages with a
+    run_async(ctx) go on browser_loop instead (when there is one), sharing
+    its event loop and browser with the other async stages; at hard_stop
+    their coroutine is cancelled.
+    """
+    try:
+        module = importlib.import_module(STAGES[base_stage(script_name)]['module'])
+        if runs_on_loop(script_name, browser_loop):
+            ctx.browser = browser_loop.browser
+            browser_loop.run(module.run_async(ctx), timeout=max(1, hard_stop - time.time()) if hard_stop else None)
+        else:
+            module.run(ctx)
+        return True
+    except FutureTimeout:
+        print(f"⏰ {script_name} overran its time budget and was cancelled.")
+        return False
+    except SystemExit as e:
+        if e.code in (None, 0):
+            return True
+        print(f"❌ {script_name} exited with code {e.code}")
+        return False
+    except Exception as e:
+        print(f"💥 Critical error running {script_name}: {e}")
+        traceback.print_exc()
+        return False
+
+def stage_outputs(script_name, hunt):
+    run_dir = os.path.join("data", hunt['run_id'])
+    search = hunt['task_searches'].get(script_name)
+    suffix = f"__{search['slug']}" if search and script_name != base_stage(script_name) else ''
+    templates = STAGES.get(base_stage(script_name), {}).get('outputs', [])
+    return [p.format(run_dir=run_dir, run_id=hunt['run_id'], suffix=suffix) for p in templates]
+
+def stage_fingerprint(script_name, options, hunt):
+    spec = STAGES.get(base_stage(script_name), {})
+    run_dir = os.path.join("data", hunt['run_id'])
+    if 'inputs' in spec:
+        inputs = spec['inputs'](run_dir)
+    else:
+        inputs = [p for dep in stage_dependencies(hunt['tasks'])[script_name] for p in stage_outputs(dep, hunt)]
+        # Plain input files handed over as options (e.g. the sniper's company lists)
+        for value in options.values():
+            for item in (value if isinstance(value, (list, tuple)) else [value]):
+                if isinstance(item, str) and os.path.isfile(item):
+                    inputs.append(item)
+    config = {key: hunt['config'].get(key) for key in spec.get('config_keys', [])}
+    return stage_cache.fingerprint(resolve_script(base_stage(script_name)), config, options, inputs, run_id=hunt['run_id'])
+
+def reuse_stage(script_name, key, hunt):
+    """Skips the stage if --resume says it already finished, or restores it from the cache."""
+    outputs = stage_outputs(script_name, hunt)
+    if hunt['resume'] and hunt['state'].finished(script_name, key) and all(os.path.exists(p) for p in outputs):
+        print(f"⏭️  {script_name} already finished in this run. Skipping.")
+        return True
+    if not outputs:
+        return False
+    cached = stage_cache.lookup(key, ttl=hunt['cache_ttl'])
+    if cached and len(cached) == len(outputs):
+        stage_cache.restore(cached, outputs)
+        print(f"♻️  {script_name} restored from cache ({key[:12]})")
+        return True
+    return False
+
+def emit(hunt, event, **fields):
+    """Forwards a progress event to hunt['on_event'] (the daemon streams these), if anyone listens."""
+    if hunt.get('on_event'):
+        try:
+            hunt['on_event'](event, {'run_id': hunt['run_id'], 'time': time.time(), **fields})
+        except Exception as e:
+            print(f"   x Progress listener failed: {e}")
+
+def run_stage(script_name, hunt):
+    emit(hunt, 'stage_started', stage=script_name)
+    start = time.time()
+    success = False
+    try:
+        with tracing.span(script_name, cat='stage', mode=hunt['mode']):
+            success = execute_stage(script_name, hunt)
+        if success and base_stage(script_name) == 'rank_jobs.py':
+            commit_watermarks(hunt)
+        return success
+    finally:
+        emit(hunt, 'stage_finished', stage=script_name, success=bool(success), seconds=round(time.time() - start, 2))
+
+def execute_stage(script_name, hunt):
+    print(f"\n{'='*60}")
+    print(f"🚀 Launching {script_name} ({hunt['mode']})...")
+    print(f"{'='*60}")
+
+    run_id = hunt['run_id']
+    spec = STAGES.get(base_stage(script_name), {})
+    options = spec['options'](hunt['task_searches'].get(script_name), hunt) if 'options' in spec else {}
+    if spec.get('per_search') and stage_outputs(script_name, hunt):
+        options['output_file'] = os.path.basename(stage_outputs(script_name, hunt)[0])
+    search = hunt['task_searches'].get(script_name)
+    if spec.get('watermark') and search and not hunt['full']:
+        options['since'] = stage_since(script_name, spec['watermark'], search, hunt)
+
+    start_time = time.time()
+    key = stage_fingerprint(script_name, options, hunt)
+    if reuse_stage(script_name, key, hunt):
+        hunt['state'].record(script_name, key, True)
+        return True
+
+    deadline = stage_deadline(script_name, hunt)
+    if deadline.at:
+        print(f"⏱️  {script_name} budget: {deadline.remaining():.0f}s")
+
+    outputs = stage_outputs(script_name, hunt)
+    for path in outputs:
+        # Left by an earlier attempt of this run
+        clear_status(path)
+    hunt['state'].hold_watermark(script_name, None)
+
+    # A thread can't be stopped: under --deadline, stages that would run on one
+    # go to their own interpreter instead, which is killed at the hard stop
+    stop_at = hard_stop(script_name, hunt)
+    killable = not stop_at or runs_on_loop(script_name, hunt.get('browser_loop'))
+    if hunt['mode'] == 'subprocess' or base_stage(script_name) not in STAGES or not killable:
+        success = run_script(
+            script_name, options, run_id=run_id, config_path=hunt['config_path'],
+            deadline=deadline, hard_stop=stop_at
+        )
+    else:
+        ctx = StageContext(
+            config=hunt['config'],
+            run_id=run_id,
+            output_dir=os.path.join("data", run_id),
+            sink=hunt['sink'],
+            options=options,
+            config_path=hunt['config_path'],
+            deadline=deadline
+        )
+        success = run_in_process(script_name, ctx, hunt.get('browser_loop'), stop_at)
+
+    # Output cut short by the time budget is fine for this run, but not worth caching
+    complete = not deadline.expired()
+    status = read_status(outputs[0]) if outputs else {}
+    found = result_count(outputs)
+    if status.get('degraded'):
+        print(f"⚠️  {script_name} ran degraded ({status['degraded']}). Not caching it.")
+    elif success and complete and found and hunt['cache_ttl'] > 0 and all(os.path.exists(p) for p in outputs):
+        # An empty result is what a blocked or skipped source looks like: try again next time
+        try:
+            stage_cache.store(key, outputs, script_name)
+        except OSError as e:
+            print(f"⚠️  Could not cache {script_name}: {e}")
+    hunt['state'].record(script_name, key, success)
+    if success and complete and found and not status.get('degraded') and spec.get('watermark') and search:
+        hold_watermark(script_name, spec['watermark'], search, hunt, outputs, status)
+
+    duration = time.time() - start_time
+    if success:
+        print(f"✅ {script_name} completed in {duration:.2f}s")
+    return success
+
+def result_count(outputs):
+    """Records in a stage's first output (0 when it has none or it's unreadable)."""
+    try:
+        with open(outputs[0], 'r') as f:
+            return len(json.load(f))
+    except (OSError, ValueError, TypeError, IndexError):
+        return 0
+
+def oldest_posting(outputs):
+    """Epoch seconds of the oldest dated record in a stage's first output, or None."""
+    try:
+        with open(outputs[0], 'r') as f:
+            records = json.load(f)
+    except (OSError, ValueError, IndexError):
+        return None
+    dates = [watermarks.posted_at(r.get('date')) for r in records if isinstance(r, dict)]
+    dates = [d for d in dates if d is not None]
+    return min(dates) if dates else None
+
+def stage_since(script_name, source, search, hunt):
+    """
+    The watermark a stage lists from, remembered in the pipeline state: a
+    resumed run hands its stages the one they started with, so their
+    fingerprints (and finished outputs) stay valid.
+    """
+    started, since = hunt['state'].since(script_name)
+    if hunt['resume'] and started:
+        return since
+    since = watermarks.get(source, search['query'], search['location'])
+    hunt['state'].record_since(script_name, since)
+    return since
+
+def hold_watermark(script_name, source, search, hunt, outputs, status):
+    """
+    Works out how far the search's watermark can move past what this run
+    listed, and holds that in the pipeline state until ranking has taken in
+    the results (commit_watermarks): moving it before would lose the postings
+    if ranking fails and the run is resumed. Only called for non-empty,
+    non-degraded results: a blocked scraper returns nothing too, and skipping
+    ahead then would lose those postings for good.
+
+    If paging ran out on its own (status 'complete': an empty/short page or
+    the old watermark), everything posted before this run started was seen.
+    If it was cut short (max_jobs, early stop), a newest-first listing was
+    only seen down to its oldest captured posting, so the watermark goes
+    there; a relevance-ordered one proves nothing and leaves it alone.
+    """
+    if status.get('complete'):
+        mark = hunt['started']
+    elif status.get('newest_first'):
+        mark = oldest_posting(outputs)
+    else:
+        mark = None
+    if mark:
+        hunt['state'].hold_watermark(script_name, {'source': source, 'query': search['query'],
+                                                   'location': search['location'], 'at': mark})
+    else:
+        print(f"🌊 {source} was cut short before reaching older postings. Keeping its watermark.")
+
+def commit_watermarks(hunt):
+    """Records the watermarks held by this run's scrapers (and, for --merge, its shards') once ranking succeeded."""
+    states = [hunt['state']]
+    if hunt.get('merge'):
+        states.extend(stage_cache.PipelineState(d) for d in sharding.shard_dirs(os.path.join("data", hunt['run_id'])))
+    for state in states:
+        for mark in state.held_watermarks().values():
+            watermarks.record(mark['source'], mark['query'], mark['location'], mark['at'])
+        state.release_watermarks()
+
+def stage_deadline(script_name, hunt):
+    """Soft deadline of a stage under --deadline: scrapers share the scrape window, ranking is unbounded."""
+    if not hunt.get('scrape_end') or base_stage(script_name) not in SCRAPERS:
+        return Deadline()
+    window = hunt['scrape_end'] - hunt['started']
+    share = STAGES.get(base_stage(script_name), {}).get('budget_share', 1.0)
+    return Deadline(min(hunt['scrape_end'], hunt['started'] + share * window))
+
+def hard_stop(script_name, hunt):
+    deadline = stage_deadline(script_name, hunt)
+    return deadline.at + HARD_STOP_GRACE if deadline.at else None
+
+@contextlib.contextmanager
+def shared_browser(tasks, enabled=True):
+    """Runs one browser for every Playwright stage of this run, if any are scheduled."""
+    if not enabled or not BROWSER_STAGES.intersection(base_stage(t) for t in tasks):
+        yield None
+        return
+    if shared_endpoint():
+        # Someone (the hunt daemon) is already keeping a warm browser around
+        yield shared_endpoint()
+        return
+    with contextlib.ExitStack() as stack:
+        try:
+            endpoint = stack.enter_context(browser_server())
+        except Exception as e:
+            print(f"⚠️  Shared browser unavailable ({e}). Stages will launch their own.")
+            endpoint = None
+        yield endpoint
+
+@contextlib.contextmanager
+def browser_loop(tasks, endpoint, mode):
+    """
+    In-process runs with a shared browser drive their async Playwright stages
+    from one event loop holding one connection to it, instead of a loop and
+    a CDP connection per stage.
+    """
+    if mode == 'subprocess' or not endpoint or not BROWSER_STAGES.intersection(base_stage(t) for t in tasks):
+        yield None
+        return
+    try:
+        loop = BrowserLoop().__enter__()
+    except Exception as e:
+        print(f"⚠️  Browser event loop unavailable ({e}). Stages will run their own.")
+        yield None
+        return
+    try:
+        yield loop
+    finally:
+        loop.__exit__(None, None, None)
+
+def stage_dependencies(tasks):
+    """task -> scheduled tasks it waits for (every search instance of a dependency counts)."""
+    return {
+        task: [dep for dep in tasks if base_stage(dep) in DEPENDENCIES.get(base_stage(task), [])]
+        for task in tasks
+    }
+
+def run_pipeline(tasks, run_task, max_workers=DEFAULT_WORKERS, hard_deadline=None):
+    """
+    Runs the stages as a dependency graph: every stage starts as soon as the
+    scheduled stages it depends on have finished (successfully or not) and a
+    worker is free. Returns ({task: success}, {task: (start, end)}).
+
+    hard_deadline(task) may return an epoch time after which a running stage
+    is given up on (counted as failed) so its dependents can go ahead.
+    """
+    deps = stage_dependencies(tasks)
+    results = {}
+    timings = {}
+    pending = list(tasks)
+    running = {}
+    limits = {}
+    submitted = {}
+
+    def timed(task):
+        start = time.time()
+        try:
+            success = run_task(task)
+        except Exception as e:
+            print(f"💥 Critical error in stage {task}: {e}")
+            success = False
+        return success, start, time.time()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        while pending or running:
+            for task in list(pending):
+                if all(dep in results for dep in deps[task]):
+                    pending.remove(task)
+                    future = pool.submit(timed, task)
+                    running[future] = task
+                    submitted[future] = time.time()
+                    limit = hard_deadline(task) if hard_deadline else None
+                    if limit:
+                        limits[future] = limit
+
+            if not running:
+                # Only reachable with a dependency cycle
+                print(f"💥 Unresolvable stage dependencies: {', '.join(pending)}")
+                for task in pending:
+                    results[task] = False
+                break
+
+            timeout = None
+            active_limits = [limits[f] for f in running if f in limits]
+            if active_limits:
+                timeout = max(0, min(active_limits) - time.time())
+
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                success, start, end = future.result()
+                results[task] = success
+                timings[task] = (start, end)
+                if not success:
+                    print(f"⚠️  Task {task} failed.")
+
+            now = time.time()
+            for future in [f for f in running if f in limits and limits[f] <= now]:
+                # Its subprocess is killed / coroutine cancelled at the same time; dependents move on
+                task = running.pop(future)
+                results[task] = False
+                timings[task] = (submitted[future], now)
+                print(f"⏰ {task} overran its time budget. Continuing without it.")
+    finally:
+        pool.shutdown(wait=False)
+
+    return results, timings
+
+def critical_path(tasks, timings):
+    """
+    Walks back from the last stage to finish, always following the dependency
+    that finished last (the one that actually gated the stage).
+    """
+    if not timings:
+        return []
+    deps = stage_dependencies(tasks)
+    path = [max(timings, key=lambda t: timings[t][1])]
+    while True:
+        gating = [dep for dep in deps[path[-1]] if dep in timings]
+        if not gating:
+            break
+        path.append(max(gating, key=lambda t: timings[t][1]))
+    return list(reversed(path))
+
+def print_timing_summary(tasks, timings):
+    if not timings:
+        return
+    pipeline_start = min(start for start, _ in timings.values())
+    wall_time = max(end for _, end in timings.values()) - pipeline_start
+    serial_time = sum(end - start for start, end in timings.values())
+
+    print(f"\n{'='*60}")
+    print("⏱️  Stage timings")
+    print(f"{'='*60}")
+    for task in sorted(timings, key=lambda t: timings[t][0]):
+        start, end = timings[task]
+        print(f"   {task:<28} +{start - pipeline_start:7.2f}s  {end - start:7.2f}s")
+
+    path = critical_path(tasks, timings)
+    print("\n🧭 Critical path:")
+    for task in path:
+        start, end = timings[task]
+        print(f"   -> {task} ({end - start:.2f}s)")
+    print(f"\n   Wall time: {wall_time:.2f}s (serial equivalent: {serial_time:.2f}s)")
+
+def build_parser():
     parser = argparse.ArgumentParser(description="🛡️ Unified Job Search Pipeline Orchestrator")
     parser.add_argument("--linkedin", action="store_true", help="Scrape LinkedIn")
     parser.add_argument("--indeed", action="store_true", help="Scrape Indeed (Local)")
@@ -83,11 +659,34 @@ def main():
     parser.add_argument("--niche", action="store_true", help="Scrape Niche Boards")
     parser.add_argument("--rank", action="store_true", help="Merge and Rank results (Report generation)")
     parser.add_argument("--all", action="store_true", help="Run all modules (default if no flags)")
-    parser.add_argument("--query", type=str, help="Search keywords (e.g. 'Cannabis Retail')")
+    parser.add_argument("--query", type=str, action="append", help="Search keywords (e.g. 'Cannabis Retail'), repeatable")
     parser.add_argument("--config", type=str, help="Path to config JSON file")
     parser.add_argument("--run-id", type=str, help="Run ID for this session")
+    parser.add_argument("--location", type=str, action="append", help="Search location (e.g. 'London, Ontario'), repeatable")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Max stages running at the same time")
+    parser.add_argument("--mode", choices=['inprocess', 'subprocess'], default=DEFAULT_MODE,
+                        help="Run stages inside this process (fast) or one interpreter per stage (isolated)")
+    parser.add_argument("--no-shared-browser", action="store_true",
+                        help="Let every Playwright stage launch its own Chromium")
+    parser.add_argument("--cache-ttl", type=int, default=stage_cache.DEFAULT_TTL,
+                        help="Reuse cached stage outputs younger than this many seconds (0 disables the cache)")
+    parser.add_argument("--deadline", type=float, metavar="SECONDS",
+                        help="Total time budget: scrapers stop early and keep partial results, ranking always runs")
+    parser.add_argument("--resume", type=str, metavar="RUN_ID",
+                        help="Continue a crashed run, skipping the stages that already finished")
+    parser.add_argument("--shard", type=str, metavar="I/N",
+                        help="Scrape only shard I of N (1-based) into data/<run_id>/shard-I-of-N/; rank later with --merge")
+    parser.add_argument("--merge", action="store_true",
+                        help="Combine the shard outputs of --run-id, then rank them as one run")
+    parser.add_argument("--full", action="store_true",
+                        help=f"Ignore the watermarks in {watermarks.WATERMARK_FILE} and list every posting again")
+    return parser
 
-    args = parser.parse_args()
+def run_hunt(args, on_event=None):
+    """
+    Runs one hunt for parsed orchestrator args. on_event(event, fields) gets
+    per-stage progress. Returns (run_id, {task: success}).
+    """
 
     # Load config if provided
     config_data = {}
@@ -95,52 +694,149 @@ def main():
         with open(args.config, 'r') as f:
             config_data = json.load(f)
 
-    # Override query if in config and not on CLI
-    query = args.query or config_data.get('query')
-    run_id = args.run_id or config_data.get('run_id') or f"run_{int(time.time())}"
+    run_id = args.resume or args.run_id or config_data.get('run_id') or f"run_{int(time.time())}"
+    shard = sharding.parse_shard(args.shard)
+    if shard and args.merge:
+        raise SystemExit("❌ --shard and --merge are separate steps")
+    if shard and not run_id.endswith(sharding.shard_label(shard)):
+        # Every shard is a sub-run of the hunt, so the merge step finds them all in one place
+        run_id = f"{run_id}/{sharding.shard_label(shard)}"
+    state = stage_cache.PipelineState(os.path.join("data", run_id))
+    if args.resume and not state.get('stages'):
+        print(f"⚠️  No finished stages recorded for {run_id}. Running everything.")
+
+    # Override query if in config and not on CLI (a resumed run keeps its original search).
+    # Both accept lists; every (query, location) pair becomes one search.
+    queries = as_list(args.query or config_data.get('query') or (state.get('queries') if args.resume else None))
+    locations = as_list(args.location or config_data.get('location') or (state.get('locations') if args.resume else None))
+    searches = expand_searches(queries, locations)
 
     # Ensure data directory exists
     os.makedirs(os.path.join("data", run_id), exist_ok=True)
+    state.update(queries=queries, locations=locations, started_at=time.time())
+
+    if args.cache_ttl > 0:
+        stage_cache.prune(args.cache_ttl)
+
+    # Subprocess spans of an earlier attempt of this run would overlap the new ones
+    for part in glob.glob(os.path.join(trace_parts_dir(run_id), 'trace_*.json')):
+        os.remove(part)
+    tracing.name_process('orchestrator')
+    resilience.reset_budgets()
 
     # Determine what to run
     run_any = any([args.linkedin, args.indeed, args.companies, args.hn, args.niche, args.rank])
     do_all = args.all or not run_any
 
-    print(f"🤖 Starting Job Search Pipeline (Run ID: {run_id}, Mode: {'Full' if do_all else 'Targeted'})...")
+    print(f"🤖 Starting Job Search Pipeline (Run ID: {run_id}, Mode: {'Full' if do_all else 'Targeted'}, Execution: {args.mode})...")
+
+    if len(searches) > 1:
+        print(f"🔀 Fanning out over {len(searches)} searches: " + ", ".join(f"'{s['query']}' in '{s['location']}'" for s in searches))
 
     tasks = []
-    if do_all or args.linkedin: tasks.append('linkedin_local.py')
-    if do_all or args.indeed: tasks.append('indeed_local.py')
+    task_searches = {}
+
+    def add_per_search(script_name, searches_for_stage):
+        for search in searches_for_stage:
+            task = stage_task(script_name, search, searches)
+            tasks.append(task)
+            task_searches[task] = search
+
+    # A shard takes the searches whose slug hashes to it; the sniper and HN split their own lists
+    shard_searches = sharding.partition(searches, shard, key=lambda s: s['slug'])
+
+    if do_all or args.linkedin: add_per_search('linkedin_local.py', shard_searches)
+    if do_all or args.indeed: add_per_search('indeed_local.py', shard_searches)
     
     if do_all or args.companies:
-        if query:
-            tasks.append('gmaps_scrape.py')
+        add_per_search('gmaps_scrape.py', [s for s in shard_searches if s['query']])
         tasks.append('local_company_sniper.py')
         
     if do_all or args.hn: tasks.append('hn_scrape.py')
-    if do_all or args.niche: tasks.append('niche_scrape.py')
+    # A single request, not worth splitting: the first shard does it
+    if (do_all or args.niche) and (not shard or shard[0] == 1): tasks.append('niche_scrape.py')
     
-    # Always run ranker and converter last if we ran any scraper, or if specifically requested
-    if do_all or args.rank or (run_any and not args.rank):
+    # Always run ranker and converter last if we ran any scraper, or if specifically requested.
+    # Shards leave ranking to the --merge step.
+    if shard:
+        print(f"🧩 Shard {shard[0]}/{shard[1]}: {len(shard_searches)}/{len(searches)} searches. Rank with --merge once all shards are done.")
+        if len(searches) < shard[1]:
+            # Searches aren't split any further (one search's pages stay in one shard)
+            print(f"⚠️  Only {len(searches)} search(es) for {shard[1]} shards: some shards get no LinkedIn/Indeed/Maps work. "
+                  "Add queries or locations to spread it.")
+    elif args.merge:
+        tasks = ['rank_jobs.py', 'json_to_md.py']
+    elif do_all or args.rank or (run_any and not args.rank):
         tasks.append('rank_jobs.py')
         tasks.append('json_to_md.py')
 
-    failed = []
-    for task in tasks:
-        # Check if task is in current dir or backend/
-        task_path = task
-        if not os.path.exists(task_path):
-            task_path = os.path.join('backend', task)
-            
-        success = run_script(task_path, keywords=query, run_id=run_id, config_path=args.config)
-        if not success:
-            failed.append(task)
-            print(f"⚠️  Task {task} failed.")
+    # A resumed run keeps its original stage selection unless flags say otherwise
+    if args.resume and not run_any and state.get('tasks'):
+        tasks = [task for task in state.get('tasks') if base_stage(task) in STAGES]
+    state.update(tasks=tasks)
+
+    hunt = {
+        'mode': args.mode,
+        'searches': searches,
+        'task_searches': task_searches,
+        'run_id': run_id,
+        'config_path': args.config,
+        'config': config_data,
+        'tasks': tasks,
+        # Shared by all in-process stages so results are handed over in memory
+        'sink': OutputSink(os.path.join("data", run_id)),
+        'cache_ttl': args.cache_ttl,
+        'state': state,
+        'resume': bool(args.resume),
+        'started': time.time(),
+        'scrape_end': None,
+        'on_event': on_event,
+        'shard': f"{shard[0]}/{shard[1]}" if shard else None,
+        'full': bool(args.full),
+        'merge': bool(args.merge),
+    }
 
+    if args.merge:
+        shards = sharding.shard_dirs(os.path.join("data", run_id))
+        if not shards:
+            print(f"⚠️  No shard outputs under data/{run_id}/. Ranking whatever is already there.")
+        with tracing.span('merge_shards', cat='stage', shards=len(shards)):
+            counts = sharding.merge_outputs(os.path.join("data", run_id), hunt['sink'])
+        print(f"🧩 Merged {len(shards)} shard(s): " + ", ".join(f"{name} ({n})" for name, n in sorted(counts.items())))
+    emit(hunt, 'hunt_started', tasks=tasks)
+
+    deadline_seconds = float(args.deadline or config_data.get('deadline') or 0)
+    if deadline_seconds:
+        reserve = max(MIN_RANK_RESERVE, RANK_RESERVE_SHARE * deadline_seconds)
+        hunt['scrape_end'] = hunt['started'] + max(0, deadline_seconds - reserve)
+        print(f"⏳ Time budget: {deadline_seconds:.0f}s ({deadline_seconds - reserve:.0f}s scraping, {reserve:.0f}s reserved for ranking)")
+
+    with shared_browser(tasks, enabled=not args.no_shared_browser) as endpoint, \
+            browser_loop(tasks, endpoint, args.mode) as loop:
+        hunt['browser_loop'] = loop
+        results, timings = run_pipeline(
+            tasks,
+            lambda task: run_stage(task, hunt),
+            max_workers=args.workers,
+            hard_deadline=lambda task: hard_stop(task, hunt)
+        )
+    print_timing_summary(tasks, timings)
+
+    trace_path = tracing.write_trace(os.path.join("data", run_id, "trace.json"), trace_parts_dir(run_id),
+                                     since_us=int(hunt['started'] * 1e6))
+    shutil.rmtree(trace_parts_dir(run_id), ignore_errors=True)
+    print(f"🧵 Trace written to {trace_path} (open in chrome://tracing or ui.perfetto.dev)")
+
+    failed = [task for task in tasks if not results.get(task)]
     if failed:
         print(f"\n❌ Pipeline finished with failures in: {', '.join(failed)}")
     else:
         print(f"\n🎉 Pipeline Complete! Results in data/{run_id}/")
+    emit(hunt, 'hunt_finished', failed=failed)
+    return run_id, results
+
+def main():
+    run_hunt(build_parser().parse_args())
 
 if __name__ == "__main__":
     main()
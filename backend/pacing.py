@@ -0,0 +1,147 @@
+import time
+import random
+import asyncio
+import logging
+import threading
+
+# rate: requests per second to start with; min_rate/max_rate bound the adaptation
+# burst: requests allowed back to back after a quiet period
+# jitter: extra random seconds per request, so the cadence isn't machine-regular
+PACING = {
+    'linkedin': {'rate': 1.0, 'min_rate': 0.1, 'max_rate': 4.0, 'burst': 3, 'jitter': 0.3},
+    'linkedin_guest': {'rate': 4.0, 'min_rate': 0.2, 'max_rate': 10.0, 'burst': 4, 'jitter': 0.1},
+    'indeed': {'rate': 0.5, 'min_rate': 0.05, 'max_rate': 2.0, 'burst': 2, 'jitter': 0.5},
+    'descriptions': {'rate': 0.5, 'min_rate': 0.1, 'max_rate': 2.0, 'burst': 1, 'jitter': 0.5},
+    # Firebase serves HN items from a CDN; the cap just keeps a full thread scan polite
+    'hn': {'rate': 50.0, 'min_rate': 5.0, 'max_rate': 100.0, 'burst': 20, 'jitter': 0.0},
+    # Small local boards: a few pages in parallel, not a flood
+    'knighthunter': {'rate': 2.0, 'min_rate': 0.2, 'max_rate': 4.0, 'burst': 3, 'jitter': 0.2},
+    'londontechjobs': {'rate': 2.0, 'min_rate': 0.2, 'max_rate': 4.0, 'burst': 4, 'jitter': 0.2},
+    'hn_algolia': {'rate': 2.0, 'min_rate': 0.2, 'max_rate': 5.0, 'burst': 3, 'jitter': 0.0},
+}
+DEFAULT_PACING = {'rate': 1.0, 'min_rate': 0.1, 'max_rate': 4.0, 'burst': 2, 'jitter': 0.2}
+THROTTLE_STATUSES = {429, 503, 999}
+SPEEDUP_STEP = 0.1 # Requests/second added per healthy response (additive increase)
+SLOWDOWN_FACTOR = 0.5 # Rate multiplier on a 429 or challenge (multiplicative decrease)
+
+class Pacer:
+    """
+    Token bucket for one source whose rate adapts AIMD-style: every healthy
+    response nudges it up, a 429 or challenge page halves it. Scrapers call
+    acquire() before each request instead of sleeping a fixed random time.
+    """
+
+    def __init__(self, source):
+        settings = {**DEFAULT_PACING, **PACING.get(source, {})}
+        self.source = source
+        self.rate = settings['rate']
+        self.min_rate = settings['min_rate']
+        self.max_rate = settings['max_rate']
+        self.burst = settings['burst']
+        self.jitter = settings['jitter']
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Takes a token (possibly going into debt) and returns how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return wait + random.uniform(0, self.jitter)
+
+    def acquire(self):
+        time.sleep(self._reserve())
+
+    async def acquire_async(self):
+        await asyncio.sleep(self._reserve())
+
+    def ok(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + SPEEDUP_STEP)
+
+    def throttled(self, reason=''):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * SLOWDOWN_FACTOR)
+            # Drop the burst allowance too: the next request waits a full interval
+            self.tokens = min(self.tokens, 0.0)
+            rate = self.rate
+        logging.warning(f"🐢 {self.source}: slowing down to {rate:.2f} req/s{f' ({reason})' if reason else ''}")
+
+    def observe(self, status):
+        """Feeds an HTTP status into the rate."""
+        if status in THROTTLE_STATUSES:
+            self.throttled(f"HTTP {status}")
+        elif 200 <= status < 400:
+            self.ok()
+
+    def watch(self, context):
+        """Adapts to every navigation response of a Playwright context (sync or async API)."""
+        def on_response(response):
+            try:
+                if response.request.is_navigation_request() or response.status in THROTTLE_STATUSES:
+                    self.observe(response.status)
+            except Exception:
+                pass
+        context.on("response", on_response)
+
+_pacers = {}
+_registry_lock = threading.Lock()
+
+def pacer(source):
+    """The process-wide pacer for source (shared by parallel pages and threads)."""
+    with _registry_lock:
+        if source not in _pacers:
+            _pacers[source] = Pacer(source)
+        return _pacers[source]
+
+# Signal waits: return as soon as the page is ready instead of sleeping blind.
+# They never raise; a timeout just means "carry on with what's there".
+
+def wait_for_selector(page, selector, timeout_ms=10000):
+    try:
+        page.wait_for_selector(selector, state='attached', timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+async def wait_for_selector_async(page, selector, timeout_ms=10000):
+    try:
+        await page.wait_for_selector(selector, state='attached', timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+def wait_for_network_idle(page, timeout_ms=5000):
+    try:
+        page.wait_for_load_state('networkidle', timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
+
+HEIGHT_GREW_JS = "h => document.body.scrollHeight > h"
+
+def wait_for_height_change(page, previous_height, timeout_ms=5000):
+    """Waits for the document to grow past previous_height (infinite scroll loaded more). Returns the new height."""
+    try:
+        page.wait_for_function(HEIGHT_GREW_JS, arg=previous_height, timeout=timeout_ms)
+    except Exception:
+        pass
+    return page.evaluate("document.body.scrollHeight")
+
+async def wait_for_height_change_async(page, previous_height, timeout_ms=5000):
+    try:
+        await page.wait_for_function(HEIGHT_GREW_JS, arg=previous_height, timeout=timeout_ms)
+    except Exception:
+        pass
+    return await page.evaluate("document.body.scrollHeight")
+
+async def wait_for_function_async(page, expression, arg=None, timeout_ms=10000):
+    try:
+        await page.wait_for_function(expression, arg=arg, timeout=timeout_ms)
+        return True
+    except Exception:
+        return False
@@ -3,6 +3,7 @@ import os
 import glob
 import argparse
 from datetime import datetime
+from tracing import span
 
 DEFAULT_DATA_DIR = 'data/jobs'
 DEFAULT_HISTORY_FILE = 'data/applied_history.json'
@@ -34,45 +35,54 @@ DEFAULT_NEGATIVE_KEYWORDS = {
     "Principal": -5
 }
 
+def keywords_from_config(config):
+    pos = config.get('positive_keywords', DEFAULT_POSITIVE_KEYWORDS)
+    neg = config.get('negative_keywords', DEFAULT_NEGATIVE_KEYWORDS)
+    return pos, neg
+
 def load_config(config_path):
     if not config_path or not os.path.exists(config_path):
         return DEFAULT_POSITIVE_KEYWORDS, DEFAULT_NEGATIVE_KEYWORDS
     
     try:
         with open(config_path, 'r') as f:
-            config = json.load(f)
-            pos = config.get('positive_keywords', DEFAULT_POSITIVE_KEYWORDS)
-            neg = config.get('negative_keywords', DEFAULT_NEGATIVE_KEYWORDS)
-            return pos, neg
+            return keywords_from_config(json.load(f))
     except Exception as e:
         print(f"⚠️ Error loading config {config_path}: {e}. Using defaults.")
         return DEFAULT_POSITIVE_KEYWORDS, DEFAULT_NEGATIVE_KEYWORDS
 
-def load_all_jobs(data_dir):
+def merge_results(results):
+    """Flattens {filename: records} into one job list."""
     all_jobs = []
+    print(f"📂 Found {len(results)} data files to merge.")
+
+    for name, data in results.items():
+        # Ensure it's a list
+        if isinstance(data, list):
+            # Add source filename if not present
+            for job in data:
+                if 'source' not in job:
+                    job['source'] = name
+            all_jobs.extend(data)
+
+    return all_jobs
+
+def load_all_jobs(data_dir):
+    results = {}
     # Find all json files in data_dir ending in _results.json
     files = glob.glob(os.path.join(data_dir, '*_results.json'))
     
-    print(f"📂 Found {len(files)} data files to merge.")
-    
     for fpath in files:
         try:
             with open(fpath, 'r') as f:
-                data = json.load(f)
-                # Ensure it's a list
-                if isinstance(data, list):
-                    # Add source filename if not present
-                    for job in data:
-                        if 'source' not in job:
-                            job['source'] = os.path.basename(fpath)
-                    all_jobs.extend(data)
+                results[os.path.basename(fpath)] = json.load(f)
         except Exception as e:
             print(f"   x Error reading {fpath}: {e}")
             
-    return all_jobs
+    return merge_results(results)
 
 def score_job(job, positive_keywords, negative_keywords):
-    text = (job.get('title', '') + " " + job.get('description', '')).lower()
+    text = (job.get('title', '') + " " + job.get('description', '') + " " + (job.get('salary') or '')).lower()
     score = 0
     matched = []
     
@@ -108,7 +118,11 @@ def generate_markdown(jobs):
             lines.append(f"### [{job.get('score')}] {job.get('title')} @ {job.get('company')}")
             lines.append(f"- **Location:** {job.get('location', 'Unknown')}")
             lines.append(f"- **Source:** {job.get('source')}")
+            if job.get('salary'):
+                lines.append(f"- **Salary:** {job['salary']}")
             lines.append(f"- **Match:** {', '.join(job.get('matching_keywords', []))}")
+            if job.get('matched_queries'):
+                lines.append(f"- **Found by:** {', '.join(job['matched_queries'])}")
             lines.append(f"- [Apply Here]({job.get('url')})")
             lines.append("")
             
@@ -126,6 +140,63 @@ def load_history(history_file):
             return set()
     return set()
 
+def rank_jobs(jobs, pos_keywords, neg_keywords, history_file=DEFAULT_HISTORY_FILE):
+    history_urls = load_history(history_file)
+    print(f"📜 Loaded {len(history_urls)} previously applied/seen jobs.")
+
+    # Deduplicate by URL, remembering every search (query) that surfaced the job
+    unique_jobs = {}
+    for j in jobs:
+        if not j.get('url'):
+            continue
+        queries = unique_jobs[j['url']].get('matched_queries', []) if j['url'] in unique_jobs else []
+        if j.get('query') and j['query'] not in queries:
+            queries = queries + [j['query']]
+        unique_jobs[j['url']] = j
+        if queries:
+            j['matched_queries'] = queries
+    unique_jobs = unique_jobs.values()
+    processed_jobs = []
+    
+    for job in unique_jobs:
+        if job.get('url') in history_urls:
+            continue
+            
+        s, m = score_job(job, pos_keywords, neg_keywords)
+        job['score'] = s
+        job['matching_keywords'] = m
+        processed_jobs.append(job)
+        
+    # Sort by score descending
+    processed_jobs.sort(key=lambda x: x['score'], reverse=True)
+    return processed_jobs
+
+def report_path(run_id, output_md_dir=DEFAULT_OUTPUT_MD_DIR):
+    return os.path.join(output_md_dir, f'Report_{run_id}.md' if run_id else 'Daily_Job_Report.md')
+
+def save_report(processed_jobs, output_md):
+    os.makedirs(os.path.dirname(output_md) or '.', exist_ok=True)
+    md_content = generate_markdown(processed_jobs)
+    with open(output_md, 'w') as f:
+        f.write(md_content)
+    print(f"📝 Report generated at {output_md}")
+
+def run(ctx):
+    """Pipeline entry point: ranks whatever the scrapers handed to ctx.sink."""
+    pos_keywords, neg_keywords = keywords_from_config(ctx.config)
+
+    print("⚖️  Ranking and merging jobs...")
+    with span('merge', cat='rank'):
+        jobs = merge_results(ctx.sink.collect('*_results.json'))
+    with span('rank', cat='rank', jobs=len(jobs)):
+        processed_jobs = rank_jobs(jobs, pos_keywords, neg_keywords)
+
+    output_json = ctx.sink.write('master_listings.json', processed_jobs)
+    print(f"✅ Saved {len(processed_jobs)} unique jobs to {output_json}")
+    with span('report', cat='markdown'):
+        save_report(processed_jobs, report_path(ctx.run_id))
+    return processed_jobs
+
 def main():
     parser = argparse.ArgumentParser(description="⚖️ Rank and merge job listings")
     parser.add_argument("--config", type=str, help="Path to config JSON file")
@@ -135,7 +206,6 @@ def main():
 
     data_dir = DEFAULT_DATA_DIR
     output_md_dir = DEFAULT_OUTPUT_MD_DIR
-    history_file = DEFAULT_HISTORY_FILE
 
     if args.run_id:
         data_dir = os.path.join('data', args.run_id)
@@ -144,41 +214,24 @@ def main():
         os.makedirs(output_md_dir, exist_ok=True)
 
     output_json = os.path.join(data_dir, 'master_listings.json')
-    output_md = os.path.join(output_md_dir, f'Report_{args.run_id}.md' if args.run_id else 'Daily_Job_Report.md')
+    output_md = report_path(args.run_id, output_md_dir)
 
     pos_keywords, neg_keywords = load_config(args.config)
 
     print("⚖️  Ranking and merging jobs...")
-    jobs = load_all_jobs(data_dir)
-    history_urls = load_history(history_file)
-    print(f"📜 Loaded {len(history_urls)} previously applied/seen jobs.")
-
-    # Deduplicate by URL
-    unique_jobs = {j.get('url'): j for j in jobs if j.get('url')}.values()
-    processed_jobs = []
-    
-    for job in unique_jobs:
-        if job.get('url') in history_urls:
-            continue
-            
-        s, m = score_job(job, pos_keywords, neg_keywords)
-        job['score'] = s
-        job['matching_keywords'] = m
-        processed_jobs.append(job)
-        
-    # Sort by score descending
-    processed_jobs.sort(key=lambda x: x['score'], reverse=True)
+    with span('merge', cat='rank'):
+        jobs = load_all_jobs(data_dir)
+    with span('rank', cat='rank', jobs=len(jobs)):
+        processed_jobs = rank_jobs(jobs, pos_keywords, neg_keywords)
     
     # Save Master JSON
-    with open(output_json, 'w') as f:
+    with span('json_dump', cat='io', file='master_listings.json'), open(output_json, 'w') as f:
         json.dump(processed_jobs, f, indent=2)
     print(f"✅ Saved {len(processed_jobs)} unique jobs to {output_json}")
     
     # Save Markdown
-    md_content = generate_markdown(processed_jobs)
-    with open(output_md, 'w') as f:
-        f.write(md_content)
-    print(f"📝 Report generated at {output_md}")
+    with span('report', cat='markdown'):
+        save_report(processed_jobs, output_md)
 
 if __name__ == "__main__":
     main()
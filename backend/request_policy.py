@@ -0,0 +1,140 @@
+import threading
+import urllib.parse
+
+# Analytics, ads, chat widgets and session recorders: never needed to read a job listing
+TRACKER_DOMAINS = [
+    'google-analytics.com', 'googletagmanager.com', 'googleadservices.com', 'googlesyndication.com',
+    'doubleclick.net', 'facebook.net', 'connect.facebook.net', 'hotjar.com', 'clarity.ms',
+    'segment.io', 'segment.com', 'mixpanel.com', 'amplitude.com', 'fullstory.com', 'newrelic.com',
+    'nr-data.net', 'optimizely.com', 'bat.bing.com', 'ads.linkedin.com', 'analytics.tiktok.com',
+    'intercom.io', 'intercomcdn.com', 'drift.com', 'driftt.com', 'tawk.to', 'crisp.chat',
+    'zdassets.com', 'livechatinc.com', 'hs-analytics.net', 'hs-scripts.com', 'hsadspixel.net',
+    'quantserve.com', 'scorecardresearch.com', 'adnxs.com', 'criteo.com', 'taboola.com',
+]
+
+# block_types: resource types never loaded
+# block_domains: hosts (and their subdomains) never loaded
+# allow_domains: always loaded, overriding everything above
+POLICIES = {
+    'linkedin': {
+        'block_types': {'image', 'media', 'font'},
+        'block_domains': TRACKER_DOMAINS,
+    },
+    'indeed': {
+        # Scripts stay: the Cloudflare challenge needs them
+        'block_types': {'image', 'media', 'font'},
+        'block_domains': TRACKER_DOMAINS,
+        'allow_domains': ['challenges.cloudflare.com'],
+    },
+    'sniper': {
+        # Third-party scripts and data stay: small-business career pages are often
+        # rendered by site builders (Wix, Squarespace, Webflow) or ATS widgets from
+        # their CDNs, and come back empty without them
+        'block_types': {'image', 'media', 'font', 'manifest', 'texttrack'},
+        'block_domains': TRACKER_DOMAINS,
+    },
+    'descriptions': {
+        'block_types': {'image', 'media', 'font'},
+        'block_domains': TRACKER_DOMAINS,
+    },
+}
+
+def host_of(url):
+    try:
+        return (urllib.parse.urlsplit(url).hostname or '').lower()
+    except ValueError:
+        return ''
+
+def matches(host, domains):
+    return any(host == d or host.endswith('.' + d) for d in domains)
+
+class RouteStats:
+    """
+    What the policy let through or blocked. Aborted requests never report a
+    size, so blocked traffic is counted in requests (per type and domain);
+    bytes are only known for what was loaded (from Content-Length).
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.allowed = 0
+        self.blocked = 0
+        self.loaded_bytes = 0
+        self.blocked_by_type = {}
+        self.blocked_by_domain = {}
+        self._lock = threading.Lock()
+
+    def record(self, resource_type, host, blocked):
+        with self._lock:
+            if not blocked:
+                self.allowed += 1
+                return
+            self.blocked += 1
+            self.blocked_by_type[resource_type] = self.blocked_by_type.get(resource_type, 0) + 1
+            self.blocked_by_domain[host] = self.blocked_by_domain.get(host, 0) + 1
+
+    def record_response(self, headers):
+        try:
+            size = int(headers.get('content-length') or 0)
+        except (TypeError, ValueError):
+            size = 0
+        with self._lock:
+            self.loaded_bytes += size
+
+    def summary(self):
+        top = sorted(self.blocked_by_domain.items(), key=lambda kv: kv[1], reverse=True)[:3]
+        by_type = ", ".join(f"{t} {n}" for t, n in sorted(self.blocked_by_type.items(), key=lambda kv: -kv[1]))
+        return (f"🛡️  {self.source}: blocked {self.blocked}/{self.blocked + self.allowed} requests"
+                f"{f' ({by_type})' if by_type else ''}, loaded ~{self.loaded_bytes / 1024:.0f} KiB"
+                f"{'; top blocked: ' + ', '.join(f'{h} ({n})' for h, n in top) if top else ''}")
+
+def should_block(request, rules):
+    """(blocked, host) for a Playwright request under rules."""
+    host = host_of(request.url)
+    if request.url.startswith(('data:', 'blob:')):
+        return False, host
+    if matches(host, rules.get('allow_domains', [])):
+        return False, host
+    resource_type = request.resource_type
+    if resource_type in rules.get('block_types', ()):
+        return True, host
+    if matches(host, rules.get('block_domains', [])):
+        return True, host
+    return False, host
+
+def apply(context, source, stats=None):
+    """
+    Installs the source's policy on a sync-API BrowserContext. Returns its
+    RouteStats (pass stats to pool the counts of several contexts).
+    """
+    rules = POLICIES.get(source, {})
+    stats = stats or RouteStats(source)
+
+    def handle(route):
+        blocked, host = should_block(route.request, rules)
+        stats.record(route.request.resource_type, host, blocked)
+        if blocked:
+            route.abort()
+        else:
+            route.continue_()
+
+    context.route("**/*", handle)
+    context.on("response", lambda response: stats.record_response(response.headers))
+    return stats
+
+async def apply_async(context, source, stats=None):
+    """apply() for async-API contexts."""
+    rules = POLICIES.get(source, {})
+    stats = stats or RouteStats(source)
+
+    async def handle(route):
+        blocked, host = should_block(route.request, rules)
+        stats.record(route.request.resource_type, host, blocked)
+        if blocked:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handle)
+    context.on("response", lambda response: stats.record_response(response.headers))
+    return stats
@@ -0,0 +1,235 @@
+import os
+import json
+import time
+import random
+import threading
+from tracing import span
+from deadline import Deadline
+
+# Committed with the run results by the workflow, so breaker state survives
+# between hunts on fresh runners too.
+BREAKER_FILE = 'data/circuit_breakers.json'
+
+# attempts: tries per call (1 = no retry)
+# budget: retries a source may spend per process, across all its calls
+# base_delay/max_delay: seconds, for the jittered exponential backoff
+# threshold: consecutive failed calls that open the breaker
+# cooldown: seconds an open breaker skips the source before letting one trial call through
+DEFAULT_POLICY = {'attempts': 3, 'budget': 10, 'base_delay': 1.0, 'max_delay': 20.0, 'threshold': 3, 'cooldown': 3600}
+POLICIES = {
+    'hn': {'attempts': 3, 'budget': 20, 'base_delay': 0.5, 'max_delay': 8.0, 'threshold': 5, 'cooldown': 1800},
+    'hn_algolia': {'attempts': 2, 'budget': 4, 'base_delay': 1.0, 'max_delay': 8.0, 'threshold': 3, 'cooldown': 3600},
+    'knighthunter': {'attempts': 2, 'budget': 2, 'base_delay': 2.0, 'threshold': 3, 'cooldown': 6 * 3600},
+    'indeed': {'attempts': 2, 'budget': 2, 'base_delay': 5.0, 'max_delay': 30.0, 'threshold': 2, 'cooldown': 6 * 3600},
+    'linkedin_guest': {'attempts': 2, 'budget': 6, 'base_delay': 1.0, 'max_delay': 10.0, 'threshold': 2, 'cooldown': 3 * 3600},
+    'linkedin': {'attempts': 2, 'budget': 3, 'base_delay': 3.0, 'max_delay': 30.0, 'threshold': 3, 'cooldown': 3 * 3600},
+}
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a source whose breaker is open."""
+
+class Blocked(Exception):
+    """A source answered with a challenge/captcha page instead of results."""
+
+def policy(source):
+    return {**DEFAULT_POLICY, **POLICIES.get(source, {})}
+
+def backoff_delay(attempt, base_delay, max_delay):
+    # "Full jitter": uniform over the exponential window, so retries of
+    # parallel callers don't line up
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker for one source, persisted in BREAKER_FILE.
+    Closed: calls go through. Open: calls are refused until the cooldown has
+    passed, then a single trial call decides whether it closes again.
+    """
+
+    _lock = threading.Lock()
+
+    def __init__(self, source, path=BREAKER_FILE):
+        self.source = source
+        self.path = path
+        self.policy = policy(source)
+        self._trial = False
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f"{self.path}.tmp{os.getpid()}_{threading.get_ident()}"
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def state(self):
+        return self._load().get(self.source, {'failures': 0, 'opened_at': None})
+
+    def is_open(self):
+        """True while the source should be skipped (no side effects, unlike allow())."""
+        opened_at = self.state().get('opened_at')
+        return bool(opened_at) and time.time() - opened_at < self.policy['cooldown']
+
+    def allow(self):
+        with self._lock:
+            state = self.state()
+            if not state.get('opened_at'):
+                return True
+            if time.time() - state['opened_at'] < self.policy['cooldown']:
+                return False
+            if self._trial:
+                return False
+            self._trial = True # Half-open: let one call find out if the source is back
+            return True
+
+    def end_trial(self):
+        with self._lock:
+            self._trial = False
+
+    def record_success(self):
+        with self._lock:
+            self._trial = False
+            data = self._load()
+            if data.get(self.source, {}).get('failures') or data.get(self.source, {}).get('opened_at'):
+                if data[self.source].get('opened_at'):
+                    print(f"🔌 {self.source}: circuit closed again.")
+                data[self.source] = {'failures': 0, 'opened_at': None}
+                self._save(data)
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self._trial = False
+            data = self._load()
+            state = data.get(self.source, {'failures': 0, 'opened_at': None})
+            state['failures'] = state.get('failures', 0) + 1
+            state['last_error'] = str(error)[:200] if error else None
+            if state['failures'] >= self.policy['threshold']:
+                if not state.get('opened_at'):
+                    print(f"🔌 {self.source}: {state['failures']} failures in a row, skipping it for {self.policy['cooldown'] // 60}min.")
+                # Re-opened after a failed trial, the cooldown starts over
+                state['opened_at'] = time.time()
+            data[self.source] = state
+            self._save(data)
+
+_breakers = {}
+_budgets = {}
+_registry_lock = threading.Lock()
+
+def breaker(source):
+    """The process-wide breaker for source."""
+    with _registry_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(source)
+        return _breakers[source]
+
+def reset_budgets():
+    """Starts every source with a fresh retry budget (once per hunt in long-lived processes)."""
+    with _registry_lock:
+        _budgets.clear()
+
+def take_retry(source):
+    """Spends one retry from the source's per-process budget. False once it's used up."""
+    with _registry_lock:
+        left = _budgets.get(source, policy(source)['budget'])
+        if left <= 0:
+            return False
+        _budgets[source] = left - 1
+        return True
+
+class Attempts:
+    """
+    The bookkeeping of one call()/call_async(): breaker admission, backoff
+    delays within the policy's attempts, the retry budget and the deadline,
+    and the outcome recorded on the breaker. The sync and async loops only
+    differ in how they call fn and sleep.
+    """
+
+    def __init__(self, source, deadline=None):
+        self.source = source
+        self.deadline = deadline or Deadline()
+        self.breaker = breaker(source)
+        if not self.breaker.allow():
+            raise CircuitOpen(f"{source} circuit is open (failing since {time.ctime(self.breaker.state().get('opened_at') or 0)})")
+        self.rules = self.breaker.policy
+        self.attempt = 0
+
+    def retry_delay(self, error, retryable):
+        """
+        Seconds to back off before the next attempt, or None to give up. Giving
+        up records the failure on the breaker, unless our own time budget is to
+        blame: a timeout shortened by the deadline, or no time left to retry.
+        """
+        if self.deadline.expired() and not isinstance(error, Blocked):
+            return None
+        if retryable:
+            self.attempt += 1
+            delay = backoff_delay(self.attempt - 1, self.rules['base_delay'], self.rules['max_delay'])
+            if self.attempt < self.rules['attempts']:
+                if delay >= self.deadline.remaining():
+                    return None
+                if take_retry(self.source):
+                    print(f"   ↻ {self.source}: {error.__class__.__name__} ({error}). Retry {self.attempt}/{self.rules['attempts'] - 1} in {delay:.1f}s")
+                    return delay
+        # Out of attempts, or not worth retrying (e.g. Blocked): counts against the source either way
+        self.breaker.record_failure(error)
+        return None
+
+    def succeeded(self):
+        self.breaker.record_success()
+
+    def backoff_span(self):
+        return span('backoff', cat='retry', source=self.source, attempt=self.attempt)
+
+    def finish(self):
+        """Always called last: a trial call that ended without an outcome (cancelled, interrupted) frees the half-open slot."""
+        self.breaker.end_trial()
+
+def call(source, fn, *args, deadline=None, retry_on=(Exception,), **kwargs):
+    """
+    fn(*args, **kwargs) with the source's retry policy: jittered exponential
+    backoff between attempts, bounded by the per-source retry budget and the
+    deadline. Raises CircuitOpen without calling fn while the breaker is open;
+    the last error once attempts run out.
+    """
+    attempts = Attempts(source, deadline)
+    try:
+        while True:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = attempts.retry_delay(e, isinstance(e, retry_on))
+                if delay is None:
+                    raise
+                with attempts.backoff_span():
+                    time.sleep(delay)
+            else:
+                attempts.succeeded()
+                return result
+    finally:
+        attempts.finish()
+
+async def call_async(source, fn, *args, deadline=None, retry_on=(Exception,), **kwargs):
+    """call() for coroutine functions: backs off with asyncio.sleep so other tasks keep running."""
+    import asyncio
+    attempts = Attempts(source, deadline)
+    try:
+        while True:
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = attempts.retry_delay(e, isinstance(e, retry_on))
+                if delay is None:
+                    raise
+                with attempts.backoff_span():
+                    await asyncio.sleep(delay)
+            else:
+                attempts.succeeded()
+                return result
+    finally:
+        attempts.finish()
@@ -0,0 +1,58 @@
+import os
+import json
+import time
+import logging
+
+# Playwright storage state (cookies + localStorage) per source. Never
+# committed: the workflow restores it with actions/cache instead.
+SESSIONS_DIR = 'data/sessions'
+DEFAULT_MAX_AGE = 24 * 3600
+MAX_AGE = {
+    'indeed': 12 * 3600, # Cloudflare clearance cookies don't live much longer
+    'linkedin': 24 * 3600,
+}
+
+def session_path(source, sessions_dir=SESSIONS_DIR):
+    return os.path.join(sessions_dir, f"{source}.json")
+
+def load(source, max_age=None, sessions_dir=SESSIONS_DIR):
+    """Path of a usable storage state for source (for new_context(storage_state=...)), or None."""
+    path = session_path(source, sessions_dir)
+    if not os.path.exists(path):
+        return None
+    max_age = max_age if max_age is not None else MAX_AGE.get(source, DEFAULT_MAX_AGE)
+    age = time.time() - os.path.getmtime(path)
+    if age > max_age:
+        invalidate(source, f"expired ({age / 3600:.1f}h old)", sessions_dir)
+        return None
+    try:
+        with open(path, 'r') as f:
+            json.load(f)
+    except (OSError, ValueError) as e:
+        invalidate(source, f"unreadable ({e})", sessions_dir)
+        return None
+    logging.info(f"🍪 Reusing {source} session ({age / 60:.0f}min old)")
+    return path
+
+def invalidate(source, reason, sessions_dir=SESSIONS_DIR):
+    """Drops the saved state, e.g. when a challenge shows up despite it."""
+    path = session_path(source, sessions_dir)
+    if os.path.exists(path):
+        os.remove(path)
+        logging.info(f"🍪 Dropped {source} session: {reason}")
+
+def _prepare(source, sessions_dir):
+    os.makedirs(sessions_dir, exist_ok=True)
+    path = session_path(source, sessions_dir)
+    return path, f"{path}.tmp{os.getpid()}"
+
+def save(context, source, sessions_dir=SESSIONS_DIR):
+    """Stores a sync-API context's state after a session that got through."""
+    path, tmp = _prepare(source, sessions_dir)
+    context.storage_state(path=tmp)
+    os.replace(tmp, path)
+
+async def save_async(context, source, sessions_dir=SESSIONS_DIR):
+    path, tmp = _prepare(source, sessions_dir)
+    await context.storage_state(path=tmp)
+    os.replace(tmp, path)
@@ -0,0 +1,92 @@
+import os
+import re
+import glob
+import json
+import hashlib
+
+# A shard of run <run_id> is a sub-run writing to data/<run_id>/shard-<i>-of-<N>/,
+# so --merge can find every shard's outputs (locally or downloaded CI artifacts).
+SHARD_DIR_PATTERN = 'shard-*-of-*'
+MERGE_SKIP = {'pipeline_state.json', 'trace.json', 'config.json'}
+
+def parse_shard(value):
+    """'i/N' (1-based, like Playwright's --shard) -> (i, N). None/'' -> None."""
+    if not value:
+        return None
+    if isinstance(value, (tuple, list)):
+        return tuple(value)
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', str(value))
+    if not match:
+        raise ValueError(f"Shard must look like i/N, got {value!r}")
+    index, total = int(match.group(1)), int(match.group(2))
+    if total < 1 or not 1 <= index <= total:
+        raise ValueError(f"Shard index must be between 1 and N, got {value!r}")
+    return index, total
+
+def shard_label(shard):
+    return f"shard-{shard[0]}-of-{shard[1]}"
+
+def shard_of(key, total):
+    """1-based shard owning key. Stable across processes and machines (unlike hash())."""
+    digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+    return int(digest[:12], 16) % total + 1
+
+def owns(key, shard):
+    """True if key belongs to shard (always True when not sharding)."""
+    shard = parse_shard(shard)
+    return shard is None or shard_of(key, shard[1]) == shard[0]
+
+def partition(items, shard, key=lambda item: item):
+    """The items whose key falls into shard, in their original order."""
+    shard = parse_shard(shard)
+    if shard is None:
+        return list(items)
+    return [item for item in items if shard_of(key(item), shard[1]) == shard[0]]
+
+def shard_dirs(run_dir):
+    def index(path):
+        match = re.search(r'shard-(\d+)-of-(\d+)$', path)
+        return int(match.group(1)) if match else 0
+    return sorted((d for d in glob.glob(os.path.join(run_dir, SHARD_DIR_PATTERN)) if os.path.isdir(d)), key=index)
+
+def record_key(record):
+    if isinstance(record, dict):
+        for field in ('url', 'id'):
+            if record.get(field):
+                return f"{field}:{record[field]}"
+    return json.dumps(record, sort_keys=True, default=str)
+
+def merge_outputs(run_dir, sink, pattern='*.json'):
+    """
+    Combines same-named JSON outputs of every shard into run_dir via sink:
+    lists are concatenated in shard order (first occurrence of a url/id wins),
+    dicts (e.g. the career page cache) are merged key by key.
+    Returns {filename: number of records}.
+    """
+    lists, seen, dicts = {}, {}, {}
+    for shard_dir in shard_dirs(run_dir):
+        for path in sorted(glob.glob(os.path.join(shard_dir, pattern))):
+            name = os.path.basename(path)
+            if name in MERGE_SKIP:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"   x Skipping {path}: {e}")
+                continue
+            if isinstance(data, list):
+                for record in data:
+                    key = record_key(record)
+                    if key not in seen.setdefault(name, set()):
+                        seen[name].add(key)
+                        lists.setdefault(name, []).append(record)
+                lists.setdefault(name, [])
+            elif isinstance(data, dict):
+                dicts.setdefault(name, {}).update(data)
+
+    counts = {}
+    for name, records in {**dicts, **lists}.items():
+        sink.write(name, records)
+        counts[name] = len(records)
+    return counts
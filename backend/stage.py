@@ -0,0 +1,129 @@
+import os
+import json
+import glob
+import fnmatch
+import threading
+from tracing import span
+from deadline import Deadline
+
+# How a scrape ended, next to its output: {"degraded": reason} when it was
+# blocked, skipped or lost pages. Read by the orchestrator before caching.
+STATUS_DIR = '.status'
+# Kept in the run directory by the orchestrator, next to the stage outputs, but not results
+RUN_FILES = {'pipeline_state.json', 'trace.json'}
+
+class OutputSink:
+    """
+    Collects stage outputs in memory and mirrors them to the run directory,
+    so downstream stages in the same process don't have to re-read JSON files
+    while subprocess stages still see the usual files on disk.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def path(self, filename):
+        return os.path.join(self.output_dir, filename)
+
+    def write(self, filename, records, status=None):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with span('json_dump', cat='io', file=filename), open(self.path(filename), 'w') as f:
+            json.dump(records, f, indent=2)
+        with self._lock:
+            self._records[filename] = records
+        if status:
+            write_status(self.path(filename), status)
+        return self.path(filename)
+
+    def read(self, filename, default=None):
+        with self._lock:
+            if filename in self._records:
+                return self._records[filename]
+        if os.path.exists(self.path(filename)):
+            with open(self.path(filename), 'r') as f:
+                return json.load(f)
+        return default
+
+    def collect(self, pattern='*_results.json'):
+        """Returns {filename: records} for everything matching pattern, memory first, then disk."""
+        collected = {}
+        for fpath in glob.glob(os.path.join(self.output_dir, pattern)):
+            name = os.path.basename(fpath)
+            try:
+                collected[name] = self.read(name)
+            except Exception as e:
+                print(f"   x Error reading {fpath}: {e}")
+        with self._lock:
+            for name, records in self._records.items():
+                if fnmatch.fnmatch(name, pattern):
+                    collected[name] = records
+        return collected
+
+def status_path(output_path):
+    return os.path.join(os.path.dirname(output_path), STATUS_DIR, os.path.basename(output_path))
+
+def write_status(output_path, status):
+    os.makedirs(os.path.dirname(status_path(output_path)), exist_ok=True)
+    with open(status_path(output_path), 'w') as f:
+        json.dump(status, f, indent=2)
+
+def read_status(output_path):
+    """The status a stage left next to output_path ({} when it left none)."""
+    try:
+        with open(status_path(output_path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def clear_status(output_path):
+    try:
+        os.remove(status_path(output_path))
+    except OSError:
+        pass
+
+class StageContext:
+    """
+    Everything a pipeline stage needs to run: the loaded config, the run id,
+    the output sink, the stage specific options (keywords, inputs, ...) and
+    the stage's soft deadline. browser is an async Playwright browser lent by
+    the orchestrator to stages running on its event loop (None otherwise).
+    """
+
+    def __init__(self, config=None, run_id=None, output_dir=None, sink=None, options=None, config_path=None, deadline=None, browser=None):
+        self.config = config or {}
+        self.run_id = run_id
+        self.output_dir = output_dir or (os.path.join('data', run_id) if run_id else 'data/jobs')
+        self.sink = sink or OutputSink(self.output_dir)
+        self.options = options or {}
+        self.config_path = config_path
+        self.deadline = deadline or Deadline.from_env()
+        self.browser = browser
+
+    def option(self, name, default=None):
+        value = self.options.get(name)
+        return default if value is None else value
+
+def tag_search(jobs, query, location):
+    """Records which search found each job, so a merged multi-search listing can tell them apart."""
+    for job in jobs:
+        job['query'] = query
+        job['search_location'] = location
+    return jobs
+
+def load_config(config_path):
+    if config_path and os.path.exists(config_path):
+        with open(config_path, 'r') as f:
+            return json.load(f)
+    return {}
+
+def context_from_args(args, **options):
+    """Builds a StageContext for a script launched on its own (subprocess mode)."""
+    return StageContext(
+        config=load_config(getattr(args, 'config', None)),
+        run_id=getattr(args, 'run_id', None),
+        output_dir=args.output_dir,
+        options=options,
+        config_path=getattr(args, 'config', None)
+    )
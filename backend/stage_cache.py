@@ -0,0 +1,188 @@
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+CACHE_DIR = 'data/.stage_cache'
+DEFAULT_TTL = 6 * 3600 # Seconds a cached stage output stays reusable
+STATE_FILE = 'pipeline_state.json'
+
+def file_digest(path):
+    if not path or not os.path.isfile(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(script_path, config, options, inputs, run_id=None):
+    """
+    Hashes everything a stage's output depends on: the script source, the
+    config keys it reads, its options and the contents of its input files
+    (upstream outputs included). The run id is masked out so the same work
+    in a new run maps to the same key.
+    """
+    run_dir = re.compile(re.escape(os.path.join('data', run_id)) + r'(?=/|$)') if run_id else None
+
+    def mask(value):
+        if run_dir and isinstance(value, str):
+            return run_dir.sub('<run_dir>', value)
+        if isinstance(value, (list, tuple)):
+            return [mask(v) for v in value]
+        if isinstance(value, dict):
+            return {k: mask(v) for k, v in value.items()}
+        return value
+
+    payload = {
+        'script': file_digest(script_path),
+        'config': config,
+        'options': mask(options),
+        'inputs': {mask(path): file_digest(path) for path in sorted(set(inputs))},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+def entry_dir(key, cache_dir=CACHE_DIR):
+    return os.path.join(cache_dir, key[:2], key)
+
+def lookup(key, ttl=DEFAULT_TTL, cache_dir=CACHE_DIR):
+    """Returns the cached file paths for key (in output order) if it exists and is younger than ttl."""
+    if not ttl or ttl <= 0:
+        return None
+    meta_path = os.path.join(entry_dir(key, cache_dir), 'meta.json')
+    try:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - meta.get('created', 0) > ttl:
+        return None
+    files = [os.path.join(entry_dir(key, cache_dir), name) for name in meta.get('files', [])]
+    if not all(os.path.exists(p) for p in files):
+        return None
+    return files
+
+def store(key, outputs, script_name, cache_dir=CACHE_DIR):
+    """Copies the stage outputs (paths) into the cache under key."""
+    target = entry_dir(key, cache_dir)
+    tmp = target + f".tmp{os.getpid()}_{threading.get_ident()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp, exist_ok=True)
+    # Stored by position: output names may contain the run id
+    names = [f"{i}_{os.path.basename(path)}" for i, path in enumerate(outputs)]
+    for path, name in zip(outputs, names):
+        shutil.copyfile(path, os.path.join(tmp, name))
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({
+            'stage': script_name,
+            'created': time.time(),
+            'files': names,
+        }, f, indent=2)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(tmp, target)
+
+def restore(files, outputs):
+    """Copies cached files back to the stage's declared output paths."""
+    for cached, dest in zip(files, outputs):
+        os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+        shutil.copyfile(cached, dest)
+
+def prune(ttl=DEFAULT_TTL, cache_dir=CACHE_DIR):
+    """Drops cache entries older than ttl."""
+    if not os.path.isdir(cache_dir):
+        return 0
+    removed = 0
+    now = time.time()
+    for bucket in os.listdir(cache_dir):
+        bucket_dir = os.path.join(cache_dir, bucket)
+        if not os.path.isdir(bucket_dir):
+            continue
+        for key in os.listdir(bucket_dir):
+            meta_path = os.path.join(bucket_dir, key, 'meta.json')
+            try:
+                with open(meta_path, 'r') as f:
+                    created = json.load(f).get('created', 0)
+            except (OSError, ValueError):
+                created = 0
+            if now - created > ttl:
+                shutil.rmtree(os.path.join(bucket_dir, key), ignore_errors=True)
+                removed += 1
+    return removed
+
+class PipelineState:
+    """
+    Per-run record of which stages finished (and with which fingerprint),
+    kept in data/<run_id>/pipeline_state.json so --resume can pick a crashed
+    run back up.
+    """
+
+    def __init__(self, run_dir):
+        self.path = os.path.join(run_dir, STATE_FILE)
+        self._lock = threading.Lock()
+        self.data = {'stages': {}}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    self.data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  Ignoring unreadable pipeline state {self.path}: {e}")
+        self.data.setdefault('stages', {})
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def update(self, **values):
+        with self._lock:
+            self.data.update(values)
+            self._save()
+
+    def finished(self, task, key):
+        entry = self.data['stages'].get(task)
+        return bool(entry and entry.get('success') and entry.get('fingerprint') == key)
+
+    def record(self, task, key, success):
+        with self._lock:
+            self.data['stages'][task] = {
+                'fingerprint': key,
+                'success': success,
+                'finished_at': time.time(),
+            }
+            self._save()
+
+    def since(self, task):
+        """(True, watermark) the task listed from in this run, or (False, None) if it hasn't started yet."""
+        recorded = self.data.get('since', {})
+        return (True, recorded[task]) if task in recorded else (False, None)
+
+    def record_since(self, task, since):
+        with self._lock:
+            self.data.setdefault('since', {})[task] = since
+            self._save()
+
+    def hold_watermark(self, task, mark):
+        """Keeps a scraper's watermark advance (or drops it: mark None) until the run is ranked."""
+        with self._lock:
+            held = self.data.setdefault('watermarks', {})
+            if mark:
+                held[task] = mark
+            else:
+                held.pop(task, None)
+            self._save()
+
+    def held_watermarks(self):
+        return dict(self.data.get('watermarks', {}))
+
+    def release_watermarks(self):
+        with self._lock:
+            self.data['watermarks'] = {}
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
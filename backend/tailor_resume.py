@@ -8,6 +8,7 @@ import json
 from google import genai
 from google.genai import types
 from playwright.sync_api import sync_playwright
+from browser_server import launch_browser
 
 # Paths
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -235,6 +236,15 @@ def reword_with_ai(data, jd_text):
         print(f"⚠️ AI Rewording failed: {e}. Falling back to original content.")
         return data
 
+def render_pdf(browser, html, out_path):
+    page = browser.new_page()
+    try:
+        page.set_content(html)
+        page.wait_for_timeout(3000) 
+        page.pdf(path=out_path, format="Letter", print_background=True)
+    finally:
+        page.close()
+
 def main():
     parser = argparse.ArgumentParser(description="Resume Tailor")
     parser.add_argument("--jd", type=str, help="Job Description")
@@ -271,32 +281,26 @@ def main():
     # Updated filename convention: companyname_NoahOosting_resume
     base_filename = f"{safe_company}_NoahOosting_resume"
 
-    print("🎨 Generating Human version...")
-    data['keywords'] = []
-    html_human = template.render(data)
-    out_path_human = os.path.join(job_dir, f"{base_filename}_Human.pdf")
+    # One browser for both versions; each render gets its own page/context
     with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        page.set_content(html_human)
-        page.wait_for_timeout(3000) 
-        page.pdf(path=out_path_human, format="Letter", print_background=True)
-        browser.close()
-    print(f"✅ Generated Human: {out_path_human}")
+        browser = launch_browser(p)
+
+        print("🎨 Generating Human version...")
+        data['keywords'] = []
+        html_human = template.render(data)
+        out_path_human = os.path.join(job_dir, f"{base_filename}_Human.pdf")
+        render_pdf(browser, html_human, out_path_human)
+        print(f"✅ Generated Human: {out_path_human}")
 
-    if all_keywords:
-        print("🚀 Generating AI Boosted version...")
-        data['keywords'] = all_keywords
-        html_boosted = template.render(data)
-        out_path_boosted = os.path.join(job_dir, f"{base_filename}_AI_Boosted.pdf")
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page()
-            page.set_content(html_boosted)
-            page.wait_for_timeout(3000) 
-            page.pdf(path=out_path_boosted, format="Letter", print_background=True)
-            browser.close()
-        print(f"✅ Generated AI Boosted: {out_path_boosted}")
+        if all_keywords:
+            print("🚀 Generating AI Boosted version...")
+            data['keywords'] = all_keywords
+            html_boosted = template.render(data)
+            out_path_boosted = os.path.join(job_dir, f"{base_filename}_AI_Boosted.pdf")
+            render_pdf(browser, html_boosted, out_path_boosted)
+            print(f"✅ Generated AI Boosted: {out_path_boosted}")
+
+        browser.close()
 
 if __name__ == "__main__":
     main()
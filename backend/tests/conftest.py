@@ -0,0 +1,80 @@
+import os
+import sys
+import json
+import threading
+import collections
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# The stage modules import each other by bare name, like the orchestrator does
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """Runs the test in an empty directory with fresh breakers, retry budgets and pacers."""
+    import resilience
+    import pacing
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(resilience, '_breakers', {})
+    monkeypatch.setattr(resilience, '_budgets', {})
+    monkeypatch.setattr(pacing, '_pacers', {})
+    return tmp_path
+
+# What a stand-in handler gets: the path, the parsed query ({name: [values]}) and the request headers
+Request = collections.namedtuple('Request', 'path query headers')
+
+class StandIn:
+    """
+    A site on localhost: every GET is answered by handler(Request), which
+    returns (status, body) or (status, body, headers). A dict/list body is sent
+    as JSON. Requests are kept in .requests, in arrival order.
+    """
+
+    def __init__(self, handler):
+        self.requests = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, fmt, *args):
+                pass
+
+            def do_GET(self):
+                parts = urllib.parse.urlsplit(self.path)
+                request = Request(parts.path, urllib.parse.parse_qs(parts.query), dict(self.headers))
+                stand_in.requests.append(request)
+                status, body, *extra = handler(request)
+                headers = extra[0] if extra else {}
+                if isinstance(body, (dict, list)):
+                    body = json.dumps(body)
+                    headers = {'Content-Type': 'application/json', **headers}
+                data = body.encode() if isinstance(body, str) else body
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stand_in():
+    """stand_in(handler) starts a StandIn; they are all shut down after the test."""
+    servers = []
+
+    def start(handler):
+        servers.append(StandIn(handler))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
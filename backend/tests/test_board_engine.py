@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('lxml.cssselect')
+
+import board_engine
+from http_client import make_session
+
+def job_board(total, page_of):
+    """A job board with total listings, 5 per page; page_of(query) picks which page a request gets."""
+    def handle(request):
+        page = page_of(request.query)
+        jobs = "".join(f'<li class="job"><a href="/job/{n}">Developer {n}</a></li>'
+                       for n in range(page * 5, min(page * 5 + 5, total)))
+        return 200, f'<ul>{jobs}</ul><a class="next" href="/jobs?p={page + 1}">Next</a>'
+    return handle
+
+def board(site, pagination):
+    return {'url': f"{site.url}/jobs", 'items': 'li.job', 'fields': {'title': 'a', 'url': 'a@href'},
+            'pagination': pagination, 'cache': False}
+
+def scrape(spec, workers=2):
+    with make_session(workers) as session:
+        return board_engine.scrape_board(session, 'stand-in', spec, workers=workers)
+
+def test_param_paging_stops_at_page_without_new_listings(isolated, stand_in):
+    site = stand_in(job_board(total=100, page_of=lambda query: 0)) # Ignores the parameter
+    jobs = scrape(board(site, {'param': 'page', 'start': 1, 'max_pages': 10}))
+    assert len(jobs) == 5
+    assert len(site.requests) <= 3 # The first page and one wave
+
+def test_param_paging_reads_every_page(isolated, stand_in):
+    site = stand_in(job_board(total=12, page_of=lambda query: int(query.get('page', ['1'])[0]) - 1))
+    jobs = scrape(board(site, {'param': 'page', 'start': 1, 'max_pages': 10}))
+    assert [job['title'] for job in jobs] == [f"Developer {n}" for n in range(12)]
+
+def test_next_link_paging_stops_at_page_without_new_listings(isolated, stand_in):
+    # Page 3 and later repeat page 2
+    site = stand_in(job_board(total=100, page_of=lambda query: min(int(query.get('p', ['0'])[0]), 2)))
+    jobs = scrape(board(site, {'next': 'a.next', 'max_pages': 10}))
+    assert len(jobs) == 15
+    assert len(site.requests) == 4
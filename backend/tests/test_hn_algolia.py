@@ -0,0 +1,58 @@
+import pytest
+
+pytest.importorskip('requests')
+
+import hn_scrape
+from deadline import Deadline
+from hn_cache import ItemCache
+from http_client import make_session
+
+STORY_ID = 1
+KIDS = list(range(100, 130)) # Thread order: 30 top-level posts
+
+def hn_api(hit_cap):
+    """
+    Algolia's comment search and Firebase's items for one story. Search hits are
+    capped at hit_cap (replies first, like a busy thread), so some posts never
+    come back from Algolia.
+    """
+    replies = [{'objectID': str(200 + n), 'parent_id': KIDS[0], 'author': "replier",
+                'created_at_i': 0, 'comment_text': f"Reply {n}"} for n in range(10)]
+    posts = [{'objectID': str(kid), 'parent_id': STORY_ID, 'author': f"poster{kid}",
+              'created_at_i': 0, 'comment_text': f"Post {kid} | Remote"} for kid in reversed(KIDS)]
+    hits = (replies + posts)[:hit_cap]
+
+    def handle(request):
+        if request.path == '/search':
+            return 200, {'hits': hits, 'nbPages': 1}
+        if request.path.startswith('/item/'):
+            item_id = int(request.path[len('/item/'):-len('.json')])
+            return 200, {'id': item_id, 'parent': STORY_ID, 'by': f"poster{item_id}", 'time': 0,
+                         'text': f"Post {item_id} | Remote"}
+        return 404, ""
+    return handle
+
+def items_requested(site):
+    return [int(r.path[len('/item/'):-len('.json')]) for r in site.requests if r.path.startswith('/item/')]
+
+def fetch(site, cache, monkeypatch, shard=None):
+    monkeypatch.setattr(hn_scrape, 'HN_API', site.url)
+    story = {'id': STORY_ID, 'kids': KIDS, 'time': 0}
+    with make_session(hn_scrape.HN_WORKERS) as session:
+        return hn_scrape.fetch_posts_algolia(session, story, shard, cache, Deadline(), site.url)
+
+def test_truncated_search_is_filled_from_firebase(isolated, stand_in, monkeypatch):
+    cache = ItemCache(str(isolated / 'items.json'))
+    site = stand_in(hn_api(hit_cap=25)) # 10 replies + 15 of the 30 posts
+    comment_ids = fetch(site, cache, monkeypatch)
+    assert comment_ids == KIDS
+    assert sorted(items_requested(site)) == KIDS[:15] # Only the posts Algolia left out
+    assert all(cache.item(kid)['thread'] == STORY_ID for kid in KIDS)
+    assert cache.item(200) is None # Replies aren't posts
+
+def test_complete_search_needs_no_firebase(isolated, stand_in, monkeypatch):
+    cache = ItemCache(str(isolated / 'items.json'))
+    site = stand_in(hn_api(hit_cap=1000))
+    comment_ids = fetch(site, cache, monkeypatch)
+    assert comment_ids == KIDS
+    assert items_requested(site) == []
@@ -0,0 +1,68 @@
+import pytest
+
+pytest.importorskip('requests')
+
+import requests
+from http_cache import HttpCache, CachingAdapter
+
+def session_over(cache, max_age):
+    session = requests.Session()
+    session.mount('http://', CachingAdapter('stand-in', cache=cache, max_age=max_age))
+    return session
+
+def revalidating_site(etag='"v1"', modified="Wed, 01 Oct 2026 00:00:00 GMT", cache_control=None):
+    """Pages carrying validators; a conditional GET matching them gets a 304."""
+    def handle(request):
+        if request.headers.get('If-None-Match') == etag:
+            return 304, ""
+        headers = {'ETag': etag, 'Last-Modified': modified}
+        if cache_control:
+            headers['Cache-Control'] = cache_control
+        return 200, f"page {request.path}", headers
+    return handle
+
+def test_fresh_entry_is_served_without_a_request(isolated, stand_in):
+    site = stand_in(revalidating_site())
+    cache = HttpCache(root=str(isolated / 'http'))
+    with session_over(cache, max_age=300) as session:
+        first = session.get(f"{site.url}/jobs")
+        second = session.get(f"{site.url}/jobs")
+    assert second.text == first.text == "page /jobs"
+    assert second.from_cache
+    assert len(site.requests) == 1
+    assert cache.stats['stand-in'] == {'hit': 1, 'revalidated': 0, 'miss': 1}
+
+def test_stale_entry_is_revalidated(isolated, stand_in):
+    site = stand_in(revalidating_site())
+    cache = HttpCache(root=str(isolated / 'http'))
+    with session_over(cache, max_age=0) as session:
+        session.get(f"{site.url}/jobs")
+        again = session.get(f"{site.url}/jobs")
+    assert again.status_code == 200 and again.text == "page /jobs"
+    conditional = site.requests[1].headers
+    assert conditional['If-None-Match'] == '"v1"'
+    assert conditional['If-Modified-Since'] == "Wed, 01 Oct 2026 00:00:00 GMT"
+    assert cache.stats['stand-in']['revalidated'] == 1
+
+def test_no_store_responses_are_not_stored(isolated, stand_in):
+    site = stand_in(revalidating_site(cache_control="private, no-store"))
+    cache = HttpCache(root=str(isolated / 'http'))
+    with session_over(cache, max_age=300) as session:
+        session.get(f"{site.url}/jobs")
+        session.get(f"{site.url}/jobs")
+    assert len(site.requests) == 2
+    assert 'If-None-Match' not in site.requests[1].headers
+    assert cache.load(cache.key(f"{site.url}/jobs")) is None
+
+def test_least_recently_used_entries_are_evicted(isolated, stand_in):
+    site = stand_in(lambda request: (200, "x" * 100))
+    cache = HttpCache(root=str(isolated / 'http'), max_bytes=250)
+    with session_over(cache, max_age=300) as session:
+        session.get(f"{site.url}/a")
+        session.get(f"{site.url}/b")
+        session.get(f"{site.url}/a") # A fresh hit: now /b is the least recently used
+        session.get(f"{site.url}/c")
+    assert cache.load(cache.key(f"{site.url}/a"))
+    assert cache.load(cache.key(f"{site.url}/b")) is None
+    assert cache.load(cache.key(f"{site.url}/c"))
+    assert cache.evicted == 1
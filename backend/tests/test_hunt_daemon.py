@@ -0,0 +1,10 @@
+import hunt_daemon
+
+def test_only_the_latest_finished_hunts_are_kept(isolated):
+    hunts = hunt_daemon.HuntQueue()
+    for n in range(5):
+        hunts.hunts[f"done_{n}"] = {'run_id': f"done_{n}", 'status': 'done', 'events': [], 'finished_at': n}
+    hunts.hunts["waiting"] = {'run_id': "waiting", 'status': 'queued', 'events': []}
+    with hunts.cond:
+        hunts._forget_finished(keep=2)
+    assert sorted(hunts.hunts) == ["done_3", "done_4", "waiting"]
@@ -0,0 +1,97 @@
+import json
+import asyncio
+import datetime
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+import linkedin_local
+import orchestrate_search
+import watermarks
+from early_stop import YieldMonitor
+
+CARD = """
+<li><div class="base-card">
+  <a class="base-card__full-link" href="https://ca.linkedin.com/jobs/view/{n}?refId=x"></a>
+  <h3 class="base-search-card__title">Junior Developer {n}</h3>
+  <h4 class="base-search-card__subtitle">Company {n}</h4>
+  <span class="job-search-card__location">London, ON</span>
+  <time datetime="{date}"></time>
+</div></li>
+"""
+
+def posted(n):
+    return (datetime.date(2026, 10, 1) - datetime.timedelta(days=n)).isoformat()
+
+def guest_endpoint(total, blocked_from=None):
+    """
+    The guest endpoint: total cards, 10 per start offset, card n posted n days
+    before 2026-10-01; offsets >= blocked_from answer 999.
+    """
+    def handle(request):
+        start = int(request.query['start'][0])
+        if request.path != linkedin_local.GUEST_SEARCH_PATH:
+            return 404, ""
+        if blocked_from is not None and start >= blocked_from:
+            return 999, ""
+        return 200, "".join(CARD.format(n=n, date=posted(n)) for n in range(start, min(start + 10, total)))
+    return handle
+
+def test_pager_stops_at_empty_page(isolated, stand_in):
+    status = {}
+    site = stand_in(guest_endpoint(total=25))
+    jobs = linkedin_local.scrape_linkedin_guest("developer", "London", max_jobs=100, base_url=site.url, status=status)
+    assert len(jobs) == 25
+    assert jobs[0]['url'] == "https://ca.linkedin.com/jobs/view/0"
+    assert len({job['url'] for job in jobs}) == 25
+    assert status['complete'] # Ran out of results: the watermark may move to the run start
+
+def test_pager_cut_by_max_jobs_is_incomplete(isolated, stand_in):
+    status = {}
+    site = stand_in(guest_endpoint(total=100))
+    jobs = linkedin_local.scrape_linkedin_guest("developer", "London", max_jobs=15, base_url=site.url, status=status)
+    assert len(jobs) == 15
+    assert not status['complete']
+    assert status['newest_first'] # So the watermark can still move to the oldest of the 15
+
+def test_pager_keeps_jobs_found_before_block(isolated, stand_in):
+    found = []
+    site = stand_in(guest_endpoint(total=100, blocked_from=20))
+    with pytest.raises(linkedin_local.resilience.Blocked):
+        linkedin_local.scrape_linkedin_guest("developer", "London", max_jobs=40, base_url=site.url, workers=2, jobs=found)
+    assert [job['url'].rsplit('/', 1)[1] for job in found] == [str(n) for n in range(20)]
+
+def test_browser_fallback_starts_from_guest_jobs(isolated, stand_in, monkeypatch):
+    calls = {}
+
+    async def browser_scrape(keywords, location, max_jobs, deadline, browser, since, monitor, seed=None, status=None):
+        calls['seed'] = list(seed)
+        calls['monitor_seen'] = monitor.seen
+        return list(seed) + [{'url': "https://ca.linkedin.com/jobs/view/browser", 'title': "From the browser"}]
+
+    monkeypatch.setattr(linkedin_local, 'scrape_linkedin_jobs_async', browser_scrape)
+    monitor = YieldMonitor({}, {}, min_yield=0)
+    site = stand_in(guest_endpoint(total=100, blocked_from=20))
+    jobs = asyncio.run(linkedin_local.scrape_linkedin_async("developer", "London", max_jobs=40, base_url=site.url,
+                                                            monitor=monitor))
+    assert len(calls['seed']) >= 10
+    assert calls['monitor_seen'] == 0 # A fresh window for the browser's cards
+    assert jobs[:len(calls['seed'])] == calls['seed']
+    assert jobs[-1]['title'] == "From the browser"
+
+def test_first_hunt_cut_short_sets_a_watermark(isolated, stand_in, monkeypatch):
+    site = stand_in(guest_endpoint(total=100))
+    monkeypatch.setenv(linkedin_local.GUEST_BASE_URL_ENV, site.url)
+    with open('config.json', 'w') as f:
+        json.dump({'linkedin_backend': 'guest', 'early_stop': False}, f)
+    assert watermarks.get('linkedin', "developer", "London") is None
+
+    args = orchestrate_search.build_parser().parse_args(['--linkedin', '--query', "developer", '--location', "London",
+                                                         '--config', 'config.json', '--run-id', "r1", '--no-shared-browser'])
+    _, results = orchestrate_search.run_hunt(args)
+    assert all(results.values())
+    assert all(request.query['sortBy'] == ['DD'] for request in site.requests) # Newest first without a watermark too
+    # Cut short at the default max of 15 cards: the watermark goes to the oldest one captured
+    oldest = posted(linkedin_local.DEFAULT_MAX_JOBS - 1)
+    assert watermarks.get('linkedin', "developer", "London") == watermarks.posted_at(oldest)
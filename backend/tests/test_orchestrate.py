@@ -0,0 +1,114 @@
+import sys
+import json
+import types
+import pytest
+
+import orchestrate_search
+import watermarks
+
+LISTINGS = [
+    {'title': "Junior Developer", 'url': "https://example.com/1", 'date': "2026-10-03"},
+    {'title': "Developer", 'url': "https://example.com/2", 'date': "2026-10-02"},
+    {'title': "Web Developer", 'url': "https://example.com/3", 'date': "2026-10-01"},
+]
+
+class Stages:
+    """
+    Stand-in stage plugins for the orchestrator: a LinkedIn scraper returning
+    LISTINGS (newest first, cut short), a ranker and a converter. Every run is
+    logged in .calls as (stage, options).
+    """
+
+    def __init__(self, monkeypatch):
+        self.calls = []
+        self.rank_fails = False
+        self.listings = LISTINGS
+        self.status = {'complete': False, 'newest_first': True}
+        for stage, run in [('linkedin_local.py', self.scrape), ('rank_jobs.py', self.rank), ('json_to_md.py', self.convert)]:
+            name = f"stand_in_{stage[:-3]}"
+            monkeypatch.setitem(sys.modules, name, types.SimpleNamespace(run=run))
+            monkeypatch.setitem(orchestrate_search.STAGES, stage, {**orchestrate_search.STAGES[stage], 'module': name})
+
+    def scrape(self, ctx):
+        self.calls.append(('linkedin_local.py', dict(ctx.options)))
+        ctx.sink.write(ctx.option('output_file'), self.listings, status=self.status)
+
+    def rank(self, ctx):
+        self.calls.append(('rank_jobs.py', dict(ctx.options)))
+        if self.rank_fails:
+            raise RuntimeError("ranking crashed")
+        ctx.sink.write('master_listings.json', [job for jobs in ctx.sink.collect().values() for job in jobs])
+
+    def convert(self, ctx):
+        self.calls.append(('json_to_md.py', dict(ctx.options)))
+
+    def ran(self, stage):
+        return [options for name, options in self.calls if name == stage]
+
+def hunt(*flags, cache_ttl=0):
+    args = orchestrate_search.build_parser().parse_args(['--no-shared-browser', '--cache-ttl', str(cache_ttl), *flags])
+    return orchestrate_search.run_hunt(args)
+
+def linkedin_mark():
+    return watermarks.get('linkedin', "developer", "London")
+
+@pytest.fixture
+def stages(isolated, monkeypatch):
+    return Stages(monkeypatch)
+
+def test_watermark_waits_for_ranking(stages):
+    stages.rank_fails = True
+    _, results = hunt('--linkedin', '--query', "developer", '--location', "London", '--run-id', "r1")
+    assert not results['rank_jobs.py']
+    assert linkedin_mark() is None # The listings were never ranked
+
+    stages.rank_fails = False
+    _, results = hunt('--resume', "r1")
+    assert all(results.values())
+    assert len(stages.ran('linkedin_local.py')) == 1 # Finished before the crash: not scraped again
+    with open('data/r1/master_listings.json') as f:
+        assert len(json.load(f)) == len(LISTINGS)
+    assert linkedin_mark() == watermarks.posted_at("2026-10-01") # Oldest posting of a cut-short newest-first list
+
+def test_resume_reuses_the_since_its_stages_started_with(stages):
+    watermarks.record('linkedin', "developer", "London", 1000)
+    hunt('--linkedin', '--query', "developer", '--location', "London", '--run-id', "r1")
+    assert stages.ran('linkedin_local.py')[0]['since'] == 1000
+
+    watermarks.record('linkedin', "developer", "London", 2000) # Another hunt moved it meanwhile
+    stages.calls.clear()
+    hunt('--resume', "r1", '--linkedin')
+    assert stages.ran('linkedin_local.py') == [] # Same since, same fingerprint: still finished
+
+def test_resume_skips_finished_stages(stages):
+    stages.rank_fails = True
+    hunt('--linkedin', '--query', "developer", '--location', "London", '--run-id', "r1")
+    stages.rank_fails = False
+    _, results = hunt('--resume', "r1")
+    assert all(results.values())
+    assert len(stages.ran('linkedin_local.py')) == 1
+    assert len(stages.ran('rank_jobs.py')) == 2 # Failed the first time: run again
+
+def search(run_id):
+    # --full keeps the watermark (moved by the first run's ranking) out of the fingerprint
+    return ('--linkedin', '--query', "developer", '--location', "London", '--full', '--run-id', run_id)
+
+def test_cached_stage_is_reused_by_the_next_run(stages):
+    hunt(*search("r1"), cache_ttl=3600)
+    hunt(*search("r2"), cache_ttl=3600)
+    assert len(stages.ran('linkedin_local.py')) == 1 # Same fingerprint under another run id
+    with open('data/r2/linkedin_local_results.json') as f:
+        assert json.load(f) == LISTINGS
+
+def test_empty_results_are_not_cached(stages):
+    stages.listings = []
+    hunt(*search("r1"), cache_ttl=3600)
+    hunt(*search("r2"), cache_ttl=3600)
+    assert len(stages.ran('linkedin_local.py')) == 2
+
+def test_degraded_results_are_not_cached(stages):
+    stages.status = {'degraded': "circuit open"}
+    hunt(*search("r1"), cache_ttl=3600)
+    hunt(*search("r2"), cache_ttl=3600)
+    assert len(stages.ran('linkedin_local.py')) == 2
+    assert linkedin_mark() is None # Nor do they move the watermark
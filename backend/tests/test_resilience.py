@@ -0,0 +1,53 @@
+import time
+import asyncio
+import pytest
+
+import resilience
+from deadline import Deadline
+
+def failing(error):
+    calls = []
+
+    def fn():
+        calls.append(time.time())
+        raise error
+    return fn, calls
+
+def failures(source):
+    return resilience.breaker(source).state()['failures']
+
+def test_exhausted_attempts_count_against_the_source(isolated, monkeypatch):
+    monkeypatch.setitem(resilience.POLICIES, 'stand-in', {'attempts': 2, 'base_delay': 0.01, 'max_delay': 0.01})
+    fn, calls = failing(OSError("connection reset"))
+    with pytest.raises(OSError):
+        resilience.call('stand-in', fn)
+    assert len(calls) == 2
+    assert failures('stand-in') == 1
+
+def test_errors_past_the_deadline_dont_count(isolated):
+    # What a navigation timeout shortened to the end of the budget looks like
+    fn, calls = failing(TimeoutError("timed out"))
+    with pytest.raises(TimeoutError):
+        resilience.call('indeed', fn, deadline=Deadline(time.time() - 1))
+    assert len(calls) == 1
+    assert failures('indeed') == 0
+
+def test_retry_skipped_for_lack_of_time_doesnt_count(isolated, monkeypatch):
+    monkeypatch.setitem(resilience.POLICIES, 'stand-in', {'attempts': 3, 'base_delay': 60, 'max_delay': 60})
+    monkeypatch.setattr(resilience.random, 'uniform', lambda low, high: high)
+    fn, calls = failing(OSError("connection reset"))
+    with pytest.raises(OSError):
+        resilience.call('stand-in', fn, deadline=Deadline.after(5))
+    assert len(calls) == 1
+    assert failures('stand-in') == 0
+
+def test_blocked_is_not_retried_when_excluded(isolated):
+    async def open_page():
+        calls.append(time.time())
+        raise resilience.Blocked("challenge did not clear")
+
+    calls = []
+    with pytest.raises(resilience.Blocked):
+        asyncio.run(resilience.call_async('indeed', open_page, retry_on=(OSError,)))
+    assert len(calls) == 1
+    assert failures('indeed') == 1
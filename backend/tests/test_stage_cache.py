@@ -0,0 +1,49 @@
+import os
+import json
+import time
+
+import stage_cache
+
+def write(path, records):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(records, f)
+
+def test_fingerprint_is_the_same_across_run_ids(isolated):
+    keys = []
+    for run_id in ("run_1", "run_2"):
+        upstream = f"data/{run_id}/gmaps_discovered.json"
+        write(upstream, [{'name': "Acme"}])
+        options = {'inputs': [upstream], 'output_file': "local_direct_sweep.json"}
+        keys.append(stage_cache.fingerprint("sniper.py", {'positive_keywords': ["python"]}, options, [upstream], run_id=run_id))
+    assert keys[0] == keys[1]
+
+def test_fingerprint_follows_inputs_and_config(isolated):
+    write("data/run_1/in.json", [1])
+    key = stage_cache.fingerprint("stage.py", {'a': 1}, {}, ["data/run_1/in.json"], run_id="run_1")
+    assert key != stage_cache.fingerprint("stage.py", {'a': 2}, {}, ["data/run_1/in.json"], run_id="run_1")
+    write("data/run_1/in.json", [2])
+    assert key != stage_cache.fingerprint("stage.py", {'a': 1}, {}, ["data/run_1/in.json"], run_id="run_1")
+
+def test_entries_expire_after_the_ttl(isolated):
+    write("data/run_1/out.json", [1, 2])
+    stage_cache.store("ab" * 32, ["data/run_1/out.json"], "stage.py")
+    assert stage_cache.lookup("ab" * 32, ttl=60)
+
+    meta_path = os.path.join(stage_cache.entry_dir("ab" * 32), 'meta.json')
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta['created'] = time.time() - 120
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    assert stage_cache.lookup("ab" * 32, ttl=60) is None
+    assert stage_cache.prune(ttl=60) == 1
+    assert not os.path.exists(stage_cache.entry_dir("ab" * 32))
+
+def test_restore_copies_entries_back_in_output_order(isolated):
+    write("data/run_1/a.json", ["a"])
+    write("data/run_1/b.json", ["b"])
+    stage_cache.store("cd" * 32, ["data/run_1/a.json", "data/run_1/b.json"], "stage.py")
+    stage_cache.restore(stage_cache.lookup("cd" * 32), ["data/run_2/a.json", "data/run_2/b.json"])
+    with open("data/run_2/b.json") as f:
+        assert json.load(f) == ["b"]
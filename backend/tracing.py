@@ -0,0 +1,103 @@
+import os
+import sys
+import json
+import time
+import glob
+import atexit
+import asyncio
+import threading
+import contextlib
+
+# Directory where subprocess stages drop their events; the orchestrator sets
+# it and merges everything into data/<run_id>/trace.json at the end.
+TRACE_DIR_ENV = 'JOBHUNTR_TRACE_DIR'
+
+_events = []
+_lock = threading.Lock()
+
+def now_us():
+    # Wall clock, so events from different processes line up
+    return time.time_ns() // 1000
+
+def current_tid():
+    # Coroutines running concurrently on one thread get their own track,
+    # otherwise their overlapping spans would render as garbage
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return id(task) % 2**31
+    return threading.get_ident() % 2**31
+
+def add_event(event):
+    with _lock:
+        _events.append(event)
+
+def name_thread(name, tid=None):
+    """Labels the current thread (or task) track in the trace viewer."""
+    add_event({
+        'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(),
+        'tid': tid if tid is not None else current_tid(), 'args': {'name': name},
+    })
+
+def name_process(name):
+    add_event({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(), 'tid': 0, 'args': {'name': name}})
+
+@contextlib.contextmanager
+def span(name, cat='stage', **args):
+    """Records a complete ('X') event around the block."""
+    start = now_us()
+    tid = current_tid()
+    try:
+        yield
+    finally:
+        add_event({
+            'name': name, 'cat': cat, 'ph': 'X',
+            'ts': start, 'dur': now_us() - start,
+            'pid': os.getpid(), 'tid': tid,
+            'args': {k: str(v) for k, v in args.items()},
+        })
+
+def events():
+    with _lock:
+        return list(_events)
+
+def flush_to_dir(trace_dir=None):
+    """Writes this process' events as one part file for the orchestrator to merge."""
+    trace_dir = trace_dir or os.environ.get(TRACE_DIR_ENV)
+    if not trace_dir or not _events:
+        return None
+    os.makedirs(trace_dir, exist_ok=True)
+    path = os.path.join(trace_dir, f"trace_{os.getpid()}.json")
+    with open(path, 'w') as f:
+        json.dump(events(), f)
+    return path
+
+def discard_before(ts_us):
+    """Drops events older than ts_us (long-lived processes would otherwise keep every run's events)."""
+    with _lock:
+        _events[:] = [e for e in _events if e.get('ph') == 'M' or e.get('ts', 0) >= ts_us]
+
+def write_trace(path, parts_dir=None, since_us=None):
+    """Merges in-process events and subprocess part files into a Chrome trace JSON."""
+    merged = [e for e in events() if since_us is None or e.get('ph') == 'M' or e.get('ts', 0) >= since_us]
+    if parts_dir and os.path.isdir(parts_dir):
+        for part in glob.glob(os.path.join(parts_dir, 'trace_*.json')):
+            try:
+                with open(part, 'r') as f:
+                    merged.extend(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"   x Skipping trace part {part}: {e}")
+    merged.sort(key=lambda e: e.get('ts', 0))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': merged, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+def _flush_at_exit():
+    if os.environ.get(TRACE_DIR_ENV) and _events:
+        name_process(os.path.basename(sys.argv[0]) or 'python')
+        flush_to_dir()
+
+atexit.register(_flush_at_exit)
@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import datetime
+import threading
+
+# Up to when each source has listed every posting of a (query, location):
+# the start of its last complete scrape, or the oldest posting a newest-first
+# scrape reached before it was cut short.
+# Committed with the run results like the breaker file, so scheduled hunts
+# on fresh runners only ask the sites for what was posted since.
+WATERMARK_FILE = 'data/watermarks.json'
+# Subtracted from the watermark before it goes into a site's date filter:
+# postings get indexed a little after they are published
+OVERLAP_SECONDS = 2 * 3600
+
+_lock = threading.Lock()
+
+def key(query, location):
+    return f"{(query or '').strip().lower()}|{(location or '').strip().lower()}"
+
+def _load(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def get(source, query, location, path=WATERMARK_FILE):
+    """Epoch seconds up to which this search has been listed completely, or None."""
+    return _load(path).get(source, {}).get(key(query, location))
+
+def record(source, query, location, timestamp=None, path=WATERMARK_FILE):
+    """Moves the watermark forward (never back)."""
+    timestamp = timestamp or time.time()
+    with _lock:
+        data = _load(path)
+        marks = data.setdefault(source, {})
+        search = key(query, location)
+        if timestamp <= marks.get(search, 0):
+            return
+        marks[search] = timestamp
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.tmp{os.getpid()}_{threading.get_ident()}"
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(tmp, path)
+
+def age_seconds(since, now=None):
+    """How far back a date-posted filter has to reach to cover everything after since."""
+    now = now or time.time()
+    return max(0, int(now - since + OVERLAP_SECONDS))
+
+def posted_at(value):
+    """Epoch seconds of a card's date ('YYYY-MM-DD', ISO datetime or epoch ms), or None."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value / 1000 if value > 1e11 else float(value)
+    try:
+        parsed = datetime.datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None # "Recently", "3 days ago", ...
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+def is_older(value, since):
+    """
+    True if a card posted at value predates the watermark. Sites mostly give
+    a day, so a card only counts as older when its whole day lies before
+    since - OVERLAP_SECONDS; undated cards never do.
+    """
+    if not since:
+        return False
+    posted = posted_at(value)
+    if posted is None:
+        return False
+    day_only = isinstance(value, str) and len(value.strip()) == 10
+    return posted + (86400 if day_only else 0) <= since - OVERLAP_SECONDS